@@ -1,10 +1,12 @@
 # app/auth_utils.py
 from __future__ import annotations
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, update
+from sqlalchemy.orm import Session, contains_eager, joinedload
 
 from app.db.database import get_db
 from app.models import User
@@ -12,7 +14,9 @@ from app.models.artisan import ArtisanProfile
 from app.models.enums import UserRole, VerificationStatus
 from app.models.session import Session as UserSession
 from app.services.auth_service import decode_access_token
-from app.config import INACTIVITY_TIMEOUT_MINUTES
+from app.services import session_cache
+from app.security.revocation import revocations
+from app.config import INACTIVITY_TIMEOUT_MINUTES, SESSION_TOUCH_INTERVAL_SECONDS, AUTH_STATELESS_TOKENS
 
 # OAuth2 scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -20,10 +24,121 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 def _unauth(msg="Not authenticated"):
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=msg)
 
-def get_current_user_with_session(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> tuple[User, UserSession]:
+def _touch_session(db: Session, sid: uuid.UUID, now: datetime) -> bool:
+    """Persist the sliding last_seen_at; False if the session was revoked meanwhile."""
+    res = db.execute(
+        update(UserSession)
+        .where(UserSession.id == sid, UserSession.revoked_at.is_(None))
+        .values(last_seen_at=now)
+    )
+    db.commit()
+    return res.rowcount > 0
+
+def _ensure_user_allowed(is_active, is_blocked) -> None:
+    if not is_active or is_blocked:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User inactive or blocked")
+
+def _idle_minutes(now: datetime, last: datetime) -> float:
+    return (now - last).total_seconds() / 60.0
+
+class Principal:
+    """
+    The authenticated caller, resolved once per request by get_principal().
+    Guards and routes read role, verification and artisan approval from here
+    instead of querying them again.
+
+    With stateless tokens (`claims` set) nothing is loaded up front: the
+    flags come from the token, and the user/session rows are only fetched if
+    something reads .user / .session. A claim only ever grants; when it says
+    "not verified" / "not approved" the row is consulted, so a user who just
+    verified does not have to wait for a new token.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        session_id: uuid.UUID,
+        *,
+        user: Optional[User] = None,
+        session: Optional[UserSession] = None,
+        claims: Optional[dict] = None,
+    ):
+        self._db = db
+        self.user_id = user_id
+        self.session_id = session_id
+        self._user = user
+        self._session = session
+        self.claims = claims
+
+    @property
+    def user(self) -> User:
+        if self._user is None:
+            self._user = self._db.get(User, self.user_id, options=[joinedload(User.artisan_profile)])
+            if self._user is None:
+                _unauth("User not found")
+        return self._user
+
+    @property
+    def session(self) -> UserSession:
+        if self._session is None:
+            self._session = self._db.get(UserSession, self.session_id)
+            if self._session is None:
+                _unauth("Session not found")
+        return self._session
+
+    def _granted(self, claim: str) -> bool:
+        return bool(self.claims and self.claims.get(claim))
+
+    @property
+    def role(self) -> UserRole:
+        if self.claims and self.claims.get("role"):
+            return UserRole(self.claims["role"])
+        return self.user.role
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == UserRole.admin
+
+    @property
+    def is_artisan(self) -> bool:
+        return self.role == UserRole.artisan
+
+    @property
+    def email_verified(self) -> bool:
+        return self._granted("email_verified") or bool(self.user.email_verified)
+
+    @property
+    def phone_verified(self) -> bool:
+        return self._granted("phone_verified") or bool(self.user.phone_verified)
+
+    @property
+    def artisan_profile(self) -> Optional[ArtisanProfile]:
+        # eager-loaded on the DB path; on the cache path the first access loads it once per request
+        return self.user.artisan_profile if self.is_artisan else None
+
+    @property
+    def artisan_approved(self) -> bool:
+        if self._granted("artisan_approved"):
+            return True
+        ap = self.artisan_profile
+        return ap is not None and _is_status_approved(ap.verification_status)
+
+def _load_principal(db: Session, user_id: uuid.UUID, sid: uuid.UUID) -> tuple[Optional[User], Optional[UserSession]]:
+    """User, its session `sid` and its artisan profile in one query."""
+    row = (
+        db.query(User, UserSession)
+        .outerjoin(UserSession, and_(UserSession.id == sid, UserSession.user_id == User.id))
+        .outerjoin(User.artisan_profile)
+        .options(contains_eager(User.artisan_profile))
+        .filter(User.id == user_id)
+        .populate_existing()
+        .first()
+    )
+    return (row[0], row[1]) if row else (None, None)
+
+def resolve_principal(token: str, db: Session) -> Principal:
+    """Authenticate a bearer token; also for callers outside the dependency graph (WebSockets)."""
     try:
         payload = decode_access_token(token)
     except ValueError:
@@ -33,49 +148,103 @@ def get_current_user_with_session(
     sid = payload.get("sid")
     if not user_id or not sid:
         _unauth("Invalid token payload")
+    try:
+        user_id = uuid.UUID(str(user_id))
+        sid = uuid.UUID(str(sid))
+    except ValueError:
+        _unauth("Invalid token payload")
 
-    user = db.get(User, user_id)
+    now = datetime.now(timezone.utc)
+    touch_every = timedelta(seconds=SESSION_TOUCH_INTERVAL_SECONDS)
+
+    # stateless path: signature + expiry + revocation set, no DB and no cache;
+    # tokens issued before claims were added, or a stale set, take the paths below
+    if AUTH_STATELESS_TOKENS and "email_verified" in payload and revocations.is_fresh():
+        if revocations.is_revoked(sid):
+            _unauth("Session revoked. Please login again.")
+        revocations.touch(sid, now)
+        return Principal(db, user_id, sid, claims=payload)
+
+    # fast path: verified (user, session) from cache, no DB reads
+    cached_user, cached_sess = session_cache.lookup(sid)
+    if cached_sess is not None and cached_sess.get("revoked"):
+        _unauth("Session revoked. Please login again.")
+    if cached_user is not None and cached_sess["user_id"] == str(user_id):
+        _ensure_user_allowed(cached_user.get("is_active"), cached_user.get("is_blocked"))
+        last = cached_sess["last_seen_at"]
+        # an idle-looking entry may just be stale (another worker saw activity): let the DB decide
+        if _idle_minutes(now, last) <= INACTIVITY_TIMEOUT_MINUTES:
+            touched = True
+            if now - last >= touch_every:
+                touched = _touch_session(db, sid, now)
+                if touched:
+                    session_cache.note_touch(sid, cached_sess, now)
+                    last = now
+            if touched:
+                user = session_cache.attach_user(db, cached_user)
+                sess = session_cache.attach_session(db, sid, user.id, cached_sess, last)
+                return Principal(db, user.id, sid, user=user, session=sess)
+            session_cache.invalidate_session(sid)
+
+    # slow path: verify against the DB and (re)populate the cache
+    user, sess = _load_principal(db, user_id, sid)
     if not user:
         _unauth("User not found")
-    if not user.is_active or getattr(user, "is_blocked", False):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User inactive or blocked")
-
-    sess = db.get(UserSession, uuid.UUID(str(sid)))
-    if not sess or sess.user_id != user.id:
+    _ensure_user_allowed(user.is_active, getattr(user, "is_blocked", False))
+    if not sess:
         _unauth("Session not found")
 
     # revoked?
     if sess.revoked_at is not None:
+        session_cache.mark_revoked(sid)
         _unauth("Session revoked. Please login again.")
 
     # inactivity check (sliding)
-    now = datetime.now(timezone.utc)
     last = sess.last_seen_at or sess.created_at
-    idle_minutes = (now - last).total_seconds() / 60.0
-    if idle_minutes > INACTIVITY_TIMEOUT_MINUTES:
+    if _idle_minutes(now, last) > INACTIVITY_TIMEOUT_MINUTES:
         sess.revoked_at = now
         db.add(sess); db.commit()
         _unauth("Session expired due to inactivity. Please login again.")
 
-    # sliding update
-    sess.last_seen_at = now
-    db.add(sess); db.commit()
+    # sliding update, coalesced to one write per interval
+    if now - last >= touch_every:
+        session_cache.store(user, sess, last_seen_at=now)
+        if not _touch_session(db, sid, now):
+            session_cache.mark_revoked(sid)
+            _unauth("Session revoked. Please login again.")
+    else:
+        session_cache.store(user, sess)
 
-    return user, sess
+    return Principal(db, user.id, sid, user=user, session=sess)
 
-# Dependency to get the current user
-def get_current_user(
+# Dependency to get the request's principal; every auth guard builds on it
+def get_principal(
+    request: Request,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
-) -> User:
-    user, _ = get_current_user_with_session(token, db)
-    return user
+) -> Principal:
+    # FastAPI already shares one result per request between Depends(get_principal);
+    # request.state also covers code that resolves it outside the dependency graph
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        principal = resolve_principal(token, db)
+        request.state.principal = principal
+    return principal
+
+def get_current_user_with_session(
+    principal: Principal = Depends(get_principal),
+) -> tuple[User, UserSession]:
+    return principal.user, principal.session
+
+# Dependency to get the current user
+def get_current_user(principal: Principal = Depends(get_principal)) -> User:
+    return principal.user
 
 # Dependency to get the current session
-def require_admin(current: User = Depends(get_current_user)) -> User:
-    if current.role != UserRole.admin:
+def require_admin(principal: Principal = Depends(get_principal)) -> User:
+    if not principal.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
-    return current
+    return principal.user
 
 # Simple role checker (case insensitive)
 def require_role(user, role_name: str):
@@ -84,15 +253,13 @@ def require_role(user, role_name: str):
         raise HTTPException(status_code=403, detail=f"{role_name.capitalize()} only")
 
 # Contact verification checker
-def require_verified_contact(current: User = Depends(get_current_user)) -> User:
+def require_verified_contact(principal: Principal = Depends(get_principal)) -> User:
     """
     Allow only users with a verified contact (email or phone).
     """
-    email_ok = bool(getattr(current, "email_verified", False))
-    phone_ok = bool(getattr(current, "phone_verified", False))
-    if not (email_ok or phone_ok):
+    if not (principal.email_verified or principal.phone_verified):
         raise HTTPException(status_code=403, detail="Verify your email or phone to continue")
-    return current
+    return principal.user
 
 
 # Robust approval checker (works with Enum or text)
@@ -111,18 +278,14 @@ def _is_status_approved(status_obj) -> bool:
     return token.strip().lower() in {"approved", "verified"}  # add more if needed
 
 # Artisan approval checker
-def require_artisan_approved(
-    current: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> User:
+def require_artisan_approved(principal: Principal = Depends(get_principal)) -> User:
     # Must be an artisan
-    if current.role != UserRole.artisan:
+    if not principal.is_artisan:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only artisans allowed")
 
-    ap = db.query(ArtisanProfile).filter(ArtisanProfile.user_id == current.id).first()
-    if not ap or not _is_status_approved(ap.verification_status):
+    if not principal.artisan_approved:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Your artisan account is pending admin approval"
         )
-    return current
+    return principal.user
@@ -28,6 +28,29 @@ else:
 IS_PRODUCTION = ENV == "production"
 
 
+# Logging (app/observability/logs.py, request middleware in app/observability/middleware.py)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+# "json" = one JSON object per line (for log shippers); "text" = human-readable
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json" if IS_PRODUCTION else "text").strip().lower()
+# share of successful (<400) fast requests that get an access-log line; errors and slow requests always do
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "1.0"))
+LOG_SLOW_REQUEST_MS = int(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))
+
+# SQL instrumentation (app/observability/sql.py): per-request query count/time,
+# Server-Timing header and N+1 warnings. On by default outside production.
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "false" if IS_PRODUCTION else "true").strip().lower() in {"1", "true", "yes"}
+SQL_WARN_QUERIES = int(os.getenv("SQL_WARN_QUERIES", "25"))      # queries per request
+SQL_WARN_DB_MS = int(os.getenv("SQL_WARN_DB_MS", "250"))         # total DB time per request
+SQL_WARN_REPEATS = int(os.getenv("SQL_WARN_REPEATS", "5"))       # same statement shape per request
+
+# Metrics (GET /metrics, app/observability/metrics.py)
+# shared directory for multi-worker aggregation; empty = per-process metrics only
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "").strip()
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+# when set, /metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "").strip()
+
+
 # Database
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
@@ -35,6 +58,13 @@ DATABASE_URL = os.getenv(
 )
 
 
+# Async engine URL (asyncpg). Derived from DATABASE_URL when unset, see app/db/database.py
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "").strip()
+
+# Optional read replica for reporting queries (admin stats); falls back to DATABASE_URL
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "").strip()
+
+
 # Crypto / JWT
 SECRET_KEY = os.getenv("SECRET_KEY", "change-me")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
@@ -43,6 +73,26 @@ REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
 INACTIVITY_TIMEOUT_MINUTES = int(os.getenv("INACTIVITY_TIMEOUT_MINUTES", "30"))
 
+# Session-validation cache (see app/services/session_cache.py)
+# TTL bounds how long another worker may keep serving a session it has not seen revoked
+# when no shared backend is configured.
+SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "30"))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000"))
+# Write sessions.last_seen_at at most once per interval per session
+SESSION_TOUCH_INTERVAL_SECONDS = int(os.getenv("SESSION_TOUCH_INTERVAL_SECONDS", "60"))
+
+# Stateless access tokens (see app/security/revocation.py): trust the token's claims for
+# its lifetime and check revocation against an in-memory set synced from `sessions`.
+AUTH_STATELESS_TOKENS = os.getenv("AUTH_STATELESS_TOKENS", "false").strip().lower() in {"1", "true", "yes"}
+AUTH_REVOCATION_POLL_SECONDS = float(os.getenv("AUTH_REVOCATION_POLL_SECONDS", "5"))
+# Fall back to DB validation when the set has not synced for this long
+AUTH_REVOCATION_MAX_STALENESS_SECONDS = float(os.getenv("AUTH_REVOCATION_MAX_STALENESS_SECONDS", "30"))
+
+# Admin dashboard stats snapshot (see app/services/admin_stats_service.py)
+# Max age before a scheduled recompute, and min gap between recomputes triggered by writes.
+ADMIN_STATS_MAX_AGE_SECONDS = int(os.getenv("ADMIN_STATS_MAX_AGE_SECONDS", "300"))
+ADMIN_STATS_MIN_REFRESH_SECONDS = int(os.getenv("ADMIN_STATS_MIN_REFRESH_SECONDS", "15"))
+
 # Dedicated refresh secret (ok to mirror SECRET_KEY in dev, use a distinct one in prod)
 REFRESH_SECRET = os.getenv("REFRESH_SECRET", SECRET_KEY)
 
@@ -50,24 +100,94 @@ REFRESH_SECRET = os.getenv("REFRESH_SECRET", SECRET_KEY)
 JWT_ISSUER = os.getenv("JWT_ISSUER", "fixion-api")
 JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "fixion-app")
 
-# Optional tuning knobs your code may use
+# Uploads (app/services/upload_service.py): streamed to disk chunk by chunk
+UPLOAD_DOCUMENT_MAX_MB = int(os.getenv("UPLOAD_DOCUMENT_MAX_MB", "10"))
+UPLOAD_PHOTO_MAX_MB = int(os.getenv("UPLOAD_PHOTO_MAX_MB", "10"))
+UPLOAD_CHUNK_KB = int(os.getenv("UPLOAD_CHUNK_KB", "64"))
+
+# Artisan service areas (/search/artisans/nearby)
+ARTISAN_MAX_SERVICE_RADIUS_KM = float(os.getenv("ARTISAN_MAX_SERVICE_RADIUS_KM", "100"))
+
+# Artisan ratings (app/services/rating_service.py): score = Bayesian average, i.e. the mean
+# of the artisan's reviews plus RATING_PRIOR_WEIGHT phantom reviews of RATING_PRIOR_MEAN stars.
+# After changing either, run scripts/rebuild_artisan_ratings.py --fix to rescore everyone.
+RATING_PRIOR_MEAN = float(os.getenv("RATING_PRIOR_MEAN", "4.0"))
+RATING_PRIOR_WEIGHT = float(os.getenv("RATING_PRIOR_WEIGHT", "5"))
+
+# Job status push (app/services/job_events.py): Postgres LISTEN/NOTIFY -> SSE/WebSocket
+JOB_EVENTS_CHANNEL = os.getenv("JOB_EVENTS_CHANNEL", "job_events")
+JOB_EVENTS_QUEUE_SIZE = int(os.getenv("JOB_EVENTS_QUEUE_SIZE", "8"))              # per subscriber
+JOB_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("JOB_EVENTS_HEARTBEAT_SECONDS", "15"))
+JOB_EVENTS_MAX_SUBSCRIBERS = int(os.getenv("JOB_EVENTS_MAX_SUBSCRIBERS", "20000"))  # per worker
+JOB_EVENTS_RETRY_MS = int(os.getenv("JOB_EVENTS_RETRY_MS", "5000"))                # SSE client reconnect delay
+JOB_EVENTS_WS_AUTH_SECONDS = float(os.getenv("JOB_EVENTS_WS_AUTH_SECONDS", "10"))  # wait for the token message
+
+# Read-mostly response cache (app/services/read_cache.py): categories, announcements
+READ_CACHE_ENABLED = os.getenv("READ_CACHE_ENABLED", "true").strip().lower() in {"1", "true", "yes"}
+READ_CACHE_CHANNEL = os.getenv("READ_CACHE_CHANNEL", "read_cache")       # NOTIFY channel for invalidations
+READ_CACHE_TTL_SECONDS = float(os.getenv("READ_CACHE_TTL_SECONDS", "300"))  # bounds staleness if one is missed
+READ_CACHE_MAX_VARIANTS = int(os.getenv("READ_CACHE_MAX_VARIANTS", "64"))   # cached query-string variants per dataset
+
+# Password hashing (app/security/passwords.py). Hashes with a different cost
+# are upgraded transparently on the next successful login.
 BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt runs in a dedicated thread pool (it releases the GIL) instead of on the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# queued + running hash/verify jobs before new ones are refused with 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
 
 
 # Payments / Webhooks
 PAYSTACK_SECRET = os.getenv("PAYSTACK_SECRET", "").strip()
+PAYSTACK_BASE_URL = os.getenv("PAYSTACK_BASE_URL", "https://api.paystack.co").strip().rstrip("/")
+# Paystack client (see app/services/paystack_client.py)
+PAYSTACK_MAX_CONNECTIONS = int(os.getenv("PAYSTACK_MAX_CONNECTIONS", "20"))
+PAYSTACK_MAX_RETRIES = int(os.getenv("PAYSTACK_MAX_RETRIES", "2"))            # GETs; POSTs only on connect errors
+PAYSTACK_BREAKER_FAILURES = int(os.getenv("PAYSTACK_BREAKER_FAILURES", "5"))  # consecutive failures to open
+PAYSTACK_BREAKER_RESET_SECONDS = int(os.getenv("PAYSTACK_BREAKER_RESET_SECONDS", "30"))
+# Bank directory cache (GET /bank): refreshed in the background every TTL, served stale on PSP errors
+PAYSTACK_BANKS_TTL_SECONDS = int(os.getenv("PAYSTACK_BANKS_TTL_SECONDS", "21600"))
+PAYSTACK_BANKS_MAX_STALE_SECONDS = int(os.getenv("PAYSTACK_BANKS_MAX_STALE_SECONDS", "604800"))
 PAYSTACK_WEBHOOK_ACTIVE = os.getenv("PAYSTACK_WEBHOOK_ACTIVE", "").strip().lower() in {"1", "true", "yes"}
+# Webhook inbox: events are stored on receipt and applied by workers
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))                     # worker threads per process
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))           # then the event is dead-lettered
+WEBHOOK_BACKOFF_BASE_SECONDS = int(os.getenv("WEBHOOK_BACKOFF_BASE_SECONDS", "5"))
+WEBHOOK_BACKOFF_MAX_SECONDS = int(os.getenv("WEBHOOK_BACKOFF_MAX_SECONDS", "3600"))
+# Run the workers inside the API process; production may run scripts/run_webhook_worker.py instead
+WEBHOOK_WORKER_IN_PROCESS = os.getenv(
+    "WEBHOOK_WORKER_IN_PROCESS", "false" if IS_PRODUCTION else "true"
+).strip().lower() in {"1", "true", "yes"}
 
 
 # Field-level encryption (PII at rest)
 # Generate with:
 #   python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
 FERNET_KEY = os.getenv("FERNET_KEY", "").strip()
+# Decrypted-value LRU (keyed by ciphertext) used by list endpoints; 0 disables it
+PII_CACHE_SIZE = int(os.getenv("PII_CACHE_SIZE", "10000"))
+# HMAC key for blind indexes (users.phone_bidx / nin_bidx); derived from FERNET_KEY when unset.
+# Changing it requires re-running the blind-index backfill (scripts/backfill_blind_indexes.py).
+BLIND_INDEX_KEY = os.getenv("BLIND_INDEX_KEY", "").strip()
+
+
+# Rate limiting (app/security/rate_limit.py, GCRA)
+# "memory" = per-process sharded store; "redis" = shared across workers/replicas
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower()
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://127.0.0.1:6379/0")
+RATE_LIMIT_REDIS_TIMEOUT_SECONDS = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT_SECONDS", "0.25"))
+RATE_LIMIT_REDIS_POOL_SIZE = int(os.getenv("RATE_LIMIT_REDIS_POOL_SIZE", "16"))
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # memory backend, all shards
 
-
-# Rate limiting (in-app) – used by /auth/login
 LOGIN_MAX_ATTEMPTS = int(os.getenv("LOGIN_MAX_ATTEMPTS", "5"))
 LOGIN_WINDOW_SECONDS = int(os.getenv("LOGIN_WINDOW_SECONDS", "900"))  # 15 minutes
+FORGOT_PASSWORD_MAX_ATTEMPTS = int(os.getenv("FORGOT_PASSWORD_MAX_ATTEMPTS", "5"))
+FORGOT_PASSWORD_WINDOW_SECONDS = int(os.getenv("FORGOT_PASSWORD_WINDOW_SECONDS", "3600"))
+VERIFY_PHONE_MAX_ATTEMPTS = int(os.getenv("VERIFY_PHONE_MAX_ATTEMPTS", "3"))
+VERIFY_PHONE_WINDOW_SECONDS = int(os.getenv("VERIFY_PHONE_WINDOW_SECONDS", "900"))
+CHECKOUT_MAX_ATTEMPTS = int(os.getenv("CHECKOUT_MAX_ATTEMPTS", "20"))
+CHECKOUT_WINDOW_SECONDS = int(os.getenv("CHECKOUT_WINDOW_SECONDS", "60"))
 
 
 # CORS
@@ -100,6 +220,19 @@ SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")  # your Gmail address
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")  # 16-char App Password
 SMTP_FROM_EMAIL = os.getenv("SMTP_FROM_EMAIL", SMTP_USERNAME)
 SMTP_FROM_NAME = os.getenv("SMTP_FROM_NAME", "fixion-backend")
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))                    # open connections kept per process
+SMTP_MAX_IDLE_SECONDS = int(os.getenv("SMTP_MAX_IDLE_SECONDS", "60"))      # close pooled connections idle this long
+SMTP_MAX_MESSAGES_PER_CONN = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONN", "100"))
+
+# Outbound message queue (email/SMS are enqueued by requests and sent by a worker)
+OUTBOUND_MAX_ATTEMPTS = int(os.getenv("OUTBOUND_MAX_ATTEMPTS", "6"))       # then the message is dead-lettered
+OUTBOUND_BACKOFF_BASE_SECONDS = int(os.getenv("OUTBOUND_BACKOFF_BASE_SECONDS", "10"))
+OUTBOUND_BACKOFF_MAX_SECONDS = int(os.getenv("OUTBOUND_BACKOFF_MAX_SECONDS", "1800"))
+OUTBOUND_LEASE_SECONDS = int(os.getenv("OUTBOUND_LEASE_SECONDS", "300"))  # a claimed message is retried after this
+# Run the worker inside the API process (dev convenience); production runs scripts/run_outbound_worker.py
+OUTBOUND_WORKER_IN_PROCESS = os.getenv(
+    "OUTBOUND_WORKER_IN_PROCESS", "false" if IS_PRODUCTION else "true"
+).strip().lower() in {"1", "true", "yes"}
 
 
 # SMS / Twilio Verify
@@ -1,8 +1,10 @@
 # app/db/database.py
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from app.config import DATABASE_URL, IS_PRODUCTION
+from app.config import DATABASE_URL, DATABASE_READ_URL, ASYNC_DATABASE_URL, IS_PRODUCTION
 
 connect_args = {}
 # psycopg2 honors 'sslmode' in the URL OR connect_args; this is a safe belt-and-braces.
@@ -20,6 +22,59 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# Read-only reporting sessions go to the replica when one is configured
+if DATABASE_READ_URL:
+    read_engine = create_engine(
+        DATABASE_READ_URL,
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=int(os.getenv("DB_READ_POOL_SIZE", "2")),
+        max_overflow=int(os.getenv("DB_READ_MAX_OVERFLOW", "2")),
+        connect_args=connect_args,
+        future=True,
+    )
+    ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False, future=True)
+else:
+    read_engine = engine
+    ReadSessionLocal = SessionLocal
+
+
+# Async engine (asyncpg) for `async def` routes, so DB I/O does not block the event loop.
+# Shares models, mappers and Session event hooks with the sync engine.
+def _async_url_and_args(sync_url: str):
+    url = make_url(ASYNC_DATABASE_URL or sync_url)
+    args = {}
+    if url.drivername.startswith("postgresql"):
+        url = url.set(drivername="postgresql+asyncpg")
+        # asyncpg takes `ssl`, not libpq's `sslmode`
+        sslmode = url.query.get("sslmode")
+        if sslmode:
+            url = url.difference_update_query(["sslmode"])
+            if sslmode != "disable":
+                args["ssl"] = "require"
+    if IS_PRODUCTION and url.drivername.endswith("asyncpg"):
+        args.setdefault("ssl", "require")
+    return url, args
+
+
+_async_url, _async_connect_args = _async_url_and_args(DATABASE_URL)
+async_engine = create_async_engine(
+    _async_url,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=int(os.getenv("DB_ASYNC_POOL_SIZE", os.getenv("DB_POOL_SIZE", "5"))),
+    max_overflow=int(os.getenv("DB_ASYNC_MAX_OVERFLOW", os.getenv("DB_MAX_OVERFLOW", "10"))),
+    connect_args=_async_connect_args,
+)
+# expire_on_commit=False: attribute access after commit must not trigger implicit (sync) IO
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def asyncpg_connect_params() -> tuple[str, dict]:
+    """DSN + kwargs for a raw asyncpg.connect(): long-lived connections kept outside the pool (LISTEN)."""
+    return _async_url.set(drivername="postgresql").render_as_string(hide_password=False), dict(_async_connect_args)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -29,3 +84,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,132 @@
+# app/http_cache.py
+"""
+Conditional GET (ETag / Last-Modified) for single-resource endpoints.
+
+Validators are computed from what the route has already loaded (the row's id
+and `updated_at`, or any other version value), never from the rendered body,
+so a request whose If-None-Match / If-Modified-Since is still current stops
+with a body-less 304 before serialization, phone decryption and so on:
+
+    # as a dependency wrapping the route's loader/guard
+    def get_thing(thing: Thing = Depends(conditional(require_thing_access, row_validators))): ...
+
+    # or called inline, after the route's own checks
+    check(request, response, row_validators(thing, cache_control=IMMUTABLE))
+
+On a 200 the ETag, Last-Modified and Cache-Control headers are set on the
+injected Response, so the route returns its model as usual. NotModified is
+turned into the 304 by the handler registered in app/main.py.
+
+ETags are strong (they change with every committed update of the rows they
+cover), which relies on `updated_at` moving on every write; bulk SQL that
+changes a covered column must set updated_at too. Bump REPRESENTATION when
+the response shape of a covered route changes, so clients refetch.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+from fastapi import Depends, Request, Response
+
+REPRESENTATION = "1"
+
+# Cache-Control policies
+PRIVATE_REVALIDATE = "private, no-cache"          # per-user data: store, but revalidate every use
+PUBLIC_REVALIDATE = "public, no-cache"            # same for everyone (public profiles)
+IMMUTABLE = "private, max-age=31536000, immutable"  # never changes again (final receipts)
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    cache_control: str = PRIVATE_REVALIDATE
+
+
+class NotModified(Exception):
+    def __init__(self, headers: dict[str, str]):
+        self.headers = headers
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over the version parts (ids, timestamps, counters)."""
+    raw = "|".join([REPRESENTATION, *(p.isoformat() if isinstance(p, datetime) else str(p) for p in parts)])
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def row_validators(*rows: Any, cache_control: str = PRIVATE_REVALIDATE) -> Validators:
+    """ETag from (table, id, updated_at) of each row; Last-Modified is the newest updated_at."""
+    parts: list = []
+    stamps = []
+    for row in rows:
+        if row is None:
+            parts.append("-")
+            continue
+        parts += [type(row).__tablename__, row.id, row.updated_at]
+        if row.updated_at is not None:
+            stamps.append(row.updated_at)
+    return Validators(etag=make_etag(*parts), last_modified=max(stamps, default=None), cache_control=cache_control)
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # naive values come from `timestamp without time zone` columns; treated as UTC, which only has to be consistent
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    return any(t.strip() == "*" or t.strip().removeprefix("W/") == etag for t in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # HTTP dates have whole-second resolution
+    return _as_utc(last_modified).replace(microsecond=0) <= since
+
+
+def check(request: Request, response: Response, v: Validators) -> None:
+    """Set validator and Cache-Control headers on `response`; raise NotModified if the client's copy is current."""
+    headers = {"Cache-Control": v.cache_control}
+    if v.etag:
+        headers["ETag"] = v.etag
+    if v.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(v.last_modified), usegmt=True)
+
+    if request.method in ("GET", "HEAD"):
+        inm = request.headers.get("if-none-match")
+        ims = request.headers.get("if-modified-since")
+        # If-Modified-Since is only consulted when If-None-Match is absent (RFC 9110 13.2.2)
+        if inm is not None:
+            fresh = bool(v.etag) and _etag_matches(inm, v.etag)
+        else:
+            fresh = ims is not None and v.last_modified is not None and _not_modified_since(ims, v.last_modified)
+        if fresh:
+            raise NotModified(headers)
+
+    response.headers.update(headers)
+
+
+def conditional(source: Callable[..., Any], validators: Callable[[Any], Validators]):
+    """
+    Dependency wrapping `source` (a loader/guard dependency): resolves it, evaluates
+    `validators(obj)` against the request, and returns obj when a body is needed.
+    """
+    def dependency(request: Request, response: Response, obj: Any = Depends(source)):
+        check(request, response, validators(obj))
+        return obj
+
+    return dependency
+
+
+def not_modified_response(exc: NotModified) -> Response:
+    return Response(status_code=304, headers=exc.headers)
@@ -1,8 +1,18 @@
 # app/main.py
-from app.utils import get_password_hash, encrypt_str
+from app.utils import get_password_hash
+from app.security.pii import set_phone, set_nin
 
 import os
-from app.config import IS_PRODUCTION
+from app.config import (
+    IS_PRODUCTION,
+    PAYSTACK_SECRET,
+    OUTBOUND_WORKER_IN_PROCESS,
+    WEBHOOK_WORKER_IN_PROCESS,
+    WEBHOOK_WORKERS,
+    SQL_INSTRUMENTATION,
+    AUTH_STATELESS_TOKENS,
+    READ_CACHE_ENABLED,
+)
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,11 +22,10 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 import logging
 
-import logging, time, uuid
-from starlette.middleware.base import BaseHTTPMiddleware
+import asyncio
 
 
-from app.db.database import SessionLocal
+from app.db.database import SessionLocal, engine, read_engine, async_engine
 from app.models import *  # noqa
 from app.models.user import User
 from app.utils import get_password_hash  
@@ -36,6 +45,14 @@ from app.routers.payouts import router as payouts_router
 from app.routers.users_privacy import router as users_privacy_router
 from app.routers.announcements import router as announcements_router
 from app.routers.disputes import router as disputes_router
+from app.services import bank_directory, job_events, outbound_queue, paystack_client, rating_service, webhook_inbox
+from app.services.email_service import smtp_pool
+from app.security import passwords, rate_limit, revocation
+from app.observability.logs import setup_logging
+from app.observability.middleware import RequestLogMiddleware
+from app.observability import metrics
+from app.observability.sql import QueryStatsMiddleware
+from app.http_cache import NotModified, not_modified_response
 
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
@@ -102,34 +119,29 @@ app.add_middleware(
     allow_credentials=False, # typically not needed for APIs
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["Authorization", "Content-Type", "Idempotency-Key", "X-Requested-With"],
-    expose_headers=["X-Request-ID"],
+    expose_headers=["X-Request-ID", "X-Next-Cursor", "ETag"],
     max_age=600
 )
 
-# minimal structured request logging with request-id
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-)
+# structured logs (JSON in production) via a queue handler; request id on every record
+setup_logging()
+
+# artisan rating aggregates follow every review write, whichever router made it
+rating_service.install()
 
-class RequestLogMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        start = time.time()
-        req_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-        request.state.request_id = req_id
-        try:
-            response = await call_next(request)
-        except Exception:
-            dur_ms = int((time.time() - start) * 1000)
-            logging.exception(f"req_id={req_id} path={request.url.path} method={request.method} dur_ms={dur_ms}")
-            raise
-        dur_ms = int((time.time() - start) * 1000)
-        logging.info(f"req_id={req_id} path={request.url.path} method={request.method} status={response.status_code} dur_ms={dur_ms}")
-        response.headers["X-Request-ID"] = req_id
-        return response
+# per-request SQL count/time, Server-Timing header, N+1 warnings (dev/staging by default)
+if SQL_INSTRUMENTATION:
+    app.add_middleware(QueryStatsMiddleware)
 
+# pure-ASGI request id + sampled access log + request metrics (see app/observability/middleware.py)
 app.add_middleware(RequestLogMiddleware)
 
+# DB pool gauges and checkout wait histogram for /metrics
+metrics.instrument_pool(engine, "primary")
+if read_engine is not engine:
+    metrics.instrument_pool(read_engine, "replica")
+metrics.instrument_pool(async_engine.sync_engine, "async")
+
 # Routers
 app.include_router(auth_router)
 app.include_router(users_router)
@@ -174,9 +186,9 @@ def seed_admin_user():
         new_admin = User(
             email=admin_email,
             full_name="Fixion Admin",
-            phone_number=encrypt_str("08000000000"),
             role="admin",
         )
+        set_phone(new_admin, "08000000000")
 
         if hasattr(User, "password_hash"):
             new_admin.password_hash = get_password_hash("adminpass")
@@ -190,7 +202,7 @@ def seed_admin_user():
                 setattr(new_admin, field, True)
 
         if hasattr(User, "nin"):
-            new_admin.nin = encrypt_str("00000000000")
+            set_nin(new_admin, "00000000000")
 
         db.add(new_admin)
         db.commit()
@@ -201,17 +213,91 @@ def seed_admin_user():
     finally:
         db.close()
 
+# **Startup Event: keep the Paystack bank directory warm**
+_bank_refresh_task = None
+
+@app.on_event("startup")
+async def start_bank_directory_refresh():
+    global _bank_refresh_task
+    if PAYSTACK_SECRET:
+        _bank_refresh_task = asyncio.create_task(bank_directory.run_refresh_loop())
+
+# **Startup Event: outbound email/SMS worker (dev; production runs scripts/run_outbound_worker.py)**
+_outbound_stop = None
+
+@app.on_event("startup")
+def start_outbound_worker():
+    global _outbound_stop
+    if OUTBOUND_WORKER_IN_PROCESS:
+        _outbound_stop = outbound_queue.start_worker_thread(SessionLocal, concurrency=2)
+
+# **Startup Event: webhook inbox workers**
+_webhook_stop = None
+
+@app.on_event("startup")
+def start_webhook_workers():
+    global _webhook_stop
+    if WEBHOOK_WORKER_IN_PROCESS:
+        _webhook_stop = webhook_inbox.start_worker_threads(SessionLocal, WEBHOOK_WORKERS)
+
+# **Startup Event: metrics snapshot writer (multi-worker aggregation)**
+_metrics_stop = None
+
+@app.on_event("startup")
+def start_metrics_flusher():
+    global _metrics_stop
+    _metrics_stop = metrics.start_flusher()
+
+# **Startup Event: revoked-session sync for stateless access tokens**
+_revocation_stop = None
+
+@app.on_event("startup")
+def start_revocation_sync():
+    global _revocation_stop
+    if AUTH_STATELESS_TOKENS:
+        _revocation_stop = revocation.start_sync_thread(SessionLocal)
+
+# **Startup Event: cross-worker invalidation of the read-mostly response cache**
+@app.on_event("startup")
+async def start_read_cache_listener():
+    # read_cache listens on the job events connection; open it now rather than with the first stream
+    if READ_CACHE_ENABLED:
+        job_events.hub.start()
+
+# **Shutdown Event: stop background work, close pooled clients (Paystack, rate limiter)**
+@app.on_event("shutdown")
+async def close_paystack_client():
+    if _bank_refresh_task is not None:
+        _bank_refresh_task.cancel()
+    if _outbound_stop is not None:
+        _outbound_stop.set()
+    if _webhook_stop is not None:
+        _webhook_stop.set()
+    if _metrics_stop is not None:
+        _metrics_stop.set()
+    if _revocation_stop is not None:
+        _revocation_stop.set()
+    smtp_pool.close()
+    await paystack_client.aclose()
+    await rate_limit.limiter.aclose()
+    await job_events.hub.aclose()
+    passwords.pool.shutdown()
+
 # **Exception handlers for consistent JSON error responses**
-def _err(payload: dict, request: Request, status: int):
+def _err(payload: dict, request: Request, status: int, headers: dict | None = None):
     # Return consistent shape and echo back the request id set by our middleware
     rid = getattr(request.state, "request_id", None)
     out = {"error": payload, "request_id": rid}
-    return JSONResponse(out, status_code=status)
+    return JSONResponse(out, status_code=status, headers=headers)
 
 @app.exception_handler(HTTPException)
 async def http_exc_handler(request: Request, exc: HTTPException):
     logging.warning(f"HTTPException {exc.status_code} path={request.url.path}")
-    return _err({"code": exc.status_code, "message": exc.detail}, request, exc.status_code)
+    return _err({"code": exc.status_code, "message": exc.detail}, request, exc.status_code, exc.headers)
+
+@app.exception_handler(NotModified)
+async def not_modified_handler(request: Request, exc: NotModified):
+    return not_modified_response(exc)
 
 @app.exception_handler(RequestValidationError)
 async def validation_exc_handler(request: Request, exc: RequestValidationError):
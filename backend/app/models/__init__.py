@@ -13,6 +13,8 @@ from app.models.token import RefreshToken, EmailPhoneToken
 from app.models.artisan_document import ArtisanDocument
 from app.models.payouts import PayoutRecipient, Payout
 from app.models.session import Session
+from app.models.outbound_message import OutboundMessage
+from app.models.webhook_inbox import WebhookInboxEvent
 
 
 __all__ = [
@@ -27,4 +29,6 @@ __all__ = [
     "ArtisanDocument",
     "PayoutRecipient", "Payout",
     "Session",
+    "OutboundMessage",
+    "WebhookInboxEvent",
 ]
\ No newline at end of file
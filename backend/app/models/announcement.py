@@ -1,6 +1,6 @@
 # app/models/announcement.py
 import uuid
-from sqlalchemy import String, Boolean, ForeignKey
+from sqlalchemy import String, Boolean, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.database import Base
@@ -18,3 +18,8 @@ class Announcement(UUIDMixin, TimeStampMixin, Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
 
     created_by_admin: Mapped["User"] = relationship("User")
+
+    __table_args__ = (
+        # keyset pagination (app/pagination.py)
+        Index("ix_announcements_active_created_id", "is_active", "created_at", "id"),
+    )
@@ -4,10 +4,11 @@ from __future__ import annotations
 import uuid
 from typing import Optional
 
-from sqlalchemy import String, Integer, Enum, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy import String, Integer, Float, Enum, ForeignKey, Text, Index, func, literal_column, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PGUUID, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.config import RATING_PRIOR_MEAN
 from app.db.database import Base
 from app.models.base import UUIDMixin, TimeStampMixin
 from app.models.enums import VerificationStatus
@@ -27,6 +28,12 @@ class ArtisanProfile(UUIDMixin, TimeStampMixin, Base):
     work_hours: Mapped[Optional[str]] = mapped_column(String(120))
     service_location: Mapped[Optional[str]] = mapped_column(String(120))
     base_price_kobo: Mapped[Optional[int]] = mapped_column(Integer, index=True, default=None)
+
+    # Service area: a circle of service_radius_km around (latitude, longitude), WGS84 degrees.
+    # Indexed by ix_artisan_profiles_coverage below; see artisan_search_service.nearby_artisans.
+    latitude: Mapped[Optional[float]] = mapped_column(Float)
+    longitude: Mapped[Optional[float]] = mapped_column(Float)
+    service_radius_km: Mapped[Optional[float]] = mapped_column(Float)
     
     bank_name: Mapped[Optional[str]] = mapped_column(String(80))
     account_number: Mapped[Optional[str]] = mapped_column(String(20))
@@ -41,6 +48,23 @@ class ArtisanProfile(UUIDMixin, TimeStampMixin, Base):
         PGUUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL")
     )
 
+    # Search document (name, category, location, description), maintained by
+    # app/services/artisan_search_service.py on every relevant write. Never set directly.
+    search_document: Mapped[Optional[str]] = mapped_column(Text, deferred=True)
+    search_vector = mapped_column(TSVECTOR, deferred=True)
+
+    # Rating aggregates over this artisan's reviews, maintained by app/services/rating_service.py
+    # in the same transaction as every review write. Never set directly.
+    rating_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default=text("0"))
+    rating_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default=text("0"))
+    rating_histogram: Mapped[list[int]] = mapped_column(  # reviews with 1..5 stars
+        ARRAY(Integer), nullable=False,
+        default=lambda: [0] * 5, server_default=text("'{0,0,0,0,0}'"),
+    )
+    rating_score: Mapped[float] = mapped_column(  # Bayesian average; an artisan without reviews has the prior
+        Float, nullable=False, default=RATING_PRIOR_MEAN, server_default=text(repr(RATING_PRIOR_MEAN)),
+    )
+
     # explicit targets
     user: Mapped["User"] = relationship(
         "User",
@@ -51,3 +75,43 @@ class ArtisanProfile(UUIDMixin, TimeStampMixin, Base):
         "User",
         foreign_keys=[verified_by_admin_id],
     )
+
+    __table_args__ = (
+        Index("ix_artisan_profiles_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_artisan_profiles_search_document_trgm", "search_document",
+            postgresql_using="gin", postgresql_ops={"search_document": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_artisan_profiles_service_location_trgm", "service_location",
+            postgresql_using="gin", postgresql_ops={"service_location": "gin_trgm_ops"},
+        ),
+        Index("ix_artisan_profiles_status_created", "verification_status", "created_at", "id"),
+        Index("ix_artisan_profiles_status_rating", "verification_status", "rating_score", "id"),
+    )
+
+
+KM_PER_DEGREE = 111.32
+
+
+def coverage_box(lat, lon, radius_km):
+    """
+    Bounding box (x = longitude, y = latitude) of the circle `radius_km` around (lat, lon).
+
+    Built from core functions only, so it can back an expression index; queries must use
+    this same expression (constants are literals, not bound parameters) for the planner
+    to match the index. Does not wrap at the antimeridian.
+    """
+    km = literal_column(str(KM_PER_DEGREE), Float)
+    dlat = radius_km / km
+    dlon = radius_km / (km * func.greatest(func.cos(func.radians(lat)), literal_column("0.01", Float)))
+    return func.box(func.point(lon - dlon, lat - dlat), func.point(lon + dlon, lat + dlat))
+
+
+# GiST over each profile's coverage box: "which service areas contain this point" is a
+# box @> box lookup that reads only the candidates around the point.
+Index(
+    "ix_artisan_profiles_coverage",
+    coverage_box(ArtisanProfile.latitude, ArtisanProfile.longitude, ArtisanProfile.service_radius_km),
+    postgresql_using="gist",
+)
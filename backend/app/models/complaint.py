@@ -2,7 +2,7 @@
 from __future__ import annotations
 import uuid
 from typing import Optional
-from sqlalchemy import Text, Enum, ForeignKey, String
+from sqlalchemy import Text, Enum, ForeignKey, String, Index
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.database import Base
@@ -27,6 +27,11 @@ class Complaint(UUIDMixin, TimeStampMixin, Base):
     raised_by: Mapped["User"] = relationship("User", foreign_keys=[raised_by_id])
     resolved_by_admin: Mapped[Optional["User"]] = relationship("User", foreign_keys=[resolved_by_admin_id])
 
+    __table_args__ = (
+        # keyset pagination (app/pagination.py)
+        Index("ix_complaints_created_id", "created_at", "id"),
+    )
+
 class Dispute(UUIDMixin, TimeStampMixin, Base):
     __tablename__ = "disputes"
 
@@ -46,3 +51,8 @@ class Dispute(UUIDMixin, TimeStampMixin, Base):
     job: Mapped["Job"] = relationship("Job")
     opened_by: Mapped["User"] = relationship("User", foreign_keys=[opened_by_id])
     resolved_by_admin: Mapped[Optional["User"]] = relationship("User", foreign_keys=[resolved_by_admin_id])
+
+    __table_args__ = (
+        # keyset pagination (app/pagination.py)
+        Index("ix_disputes_created_id", "created_at", "id"),
+    )
@@ -42,6 +42,10 @@ class Job(UUIDMixin, TimeStampMixin, Base):
     __table_args__ = (
         Index("ix_jobs_customer_status", "customer_id", "status"),
         Index("ix_jobs_artisan_status", "artisan_id", "status"),
+        # keyset pagination (app/pagination.py)
+        Index("ix_jobs_created_id", "created_at", "id"),
+        Index("ix_jobs_customer_created_id", "customer_id", "created_at", "id"),
+        Index("ix_jobs_artisan_status_created_id", "artisan_id", "status", "created_at", "id"),
     )
 
 class JobPhoto(UUIDMixin, TimeStampMixin, Base):
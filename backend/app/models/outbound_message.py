@@ -0,0 +1,36 @@
+# app/models/outbound_message.py
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, Integer, Text, DateTime, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.database import Base
+from app.models.base import UUIDMixin, TimeStampMixin
+
+# status values
+OUTBOUND_PENDING = "pending"   # waiting for next_attempt_at
+OUTBOUND_SENDING = "sending"   # claimed by a worker until locked_until
+OUTBOUND_SENT = "sent"
+OUTBOUND_DEAD = "dead"         # gave up (permanent error or attempts exhausted)
+
+class OutboundMessage(UUIDMixin, TimeStampMixin, Base):
+    """One email or SMS waiting to be (or already) delivered by the outbound worker."""
+    __tablename__ = "outbound_messages"
+
+    channel: Mapped[str] = mapped_column(String(16))               # email | sms
+    kind: Mapped[str] = mapped_column(String(64))                  # e.g. email_verify, password_reset, phone_verify
+    recipient: Mapped[str] = mapped_column(Text)                   # Fernet-encrypted address/phone
+    payload: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # Fernet-encrypted JSON (subject/html/text)
+    status: Mapped[str] = mapped_column(String(16), default=OUTBOUND_PENDING, server_default=OUTBOUND_PENDING)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    max_attempts: Mapped[int] = mapped_column(Integer)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # worker claim: status = 'pending' AND next_attempt_at <= now() ORDER BY next_attempt_at
+        Index("ix_outbound_messages_status_next", "status", "next_attempt_at"),
+        Index("ix_outbound_messages_status_created", "status", "created_at"),
+    )
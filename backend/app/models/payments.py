@@ -67,6 +67,22 @@ class WalletLedger(LocalUUIDMixin, LocalTimeStampMixin, Base):
 # helpful index for balance queries
 Index("ix_wallet_ledger_user_created", WalletLedger.user_id, WalletLedger.created_at.desc())
 
+# -------------------------------- WalletBalance --------------------------------
+
+class WalletBalance(LocalTimeStampMixin, Base):
+    """
+    Materialized per-(user, currency) balance, kept in step with WalletLedger.
+    Updated in the same transaction as every ledger insert (see
+    app/services/wallet_balance_service.py); the ledger stays the source of truth.
+    """
+    __tablename__ = "wallet_balances"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        PGUUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    currency: Mapped[str] = mapped_column(String(3), primary_key=True, default="NGN")
+    balance: Mapped[Decimal] = mapped_column(Numeric(18, 2), nullable=False, default=Decimal("0.00"))
+
 # ----------------------------------- Payment -----------------------------------
 
 # app/models/payments.py (corrected snippet)
@@ -106,4 +122,7 @@ class Payment(LocalUUIDMixin, LocalTimeStampMixin, Base):
 
     __table_args__ = (
         UniqueConstraint("reference", name="uq_payments_reference"),
+        # keyset pagination (app/pagination.py)
+        Index("ix_payments_created_id", "created_at", "id"),
+        Index("ix_payments_customer_created_id", "customer_id", "created_at", "id"),
     )
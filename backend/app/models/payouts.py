@@ -43,4 +43,6 @@ class Payout(Base):
         UniqueConstraint("reference", name="uq_payout_reference"),
         Index("ix_payout_status", "status"),
         Index("ix_payout_created", "created_at"),
+        # keyset pagination (app/pagination.py)
+        Index("ix_payout_user_created_id", "user_id", "created_at", "id"),
     )
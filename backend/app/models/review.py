@@ -1,6 +1,6 @@
 # app/models/review.py
 import uuid
-from sqlalchemy import ForeignKey, Integer, Text, UniqueConstraint
+from sqlalchemy import ForeignKey, Index, Integer, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.database import Base
@@ -30,4 +30,6 @@ class Review(UUIDMixin, TimeStampMixin, Base):
 
     __table_args__ = (
         UniqueConstraint("job_id", "customer_id", name="uq_review_one_per_job_by_customer"),
+        # keyset pagination (app/pagination.py)
+        Index("ix_reviews_created_id", "created_at", "id"),
     )
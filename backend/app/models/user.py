@@ -7,7 +7,7 @@ from typing import Optional, TYPE_CHECKING
 if TYPE_CHECKING:
     from app.models.artisan_document import ArtisanDocument
 
-from sqlalchemy import String, Boolean, Enum, Text
+from sqlalchemy import String, Boolean, Enum, Text, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -23,6 +23,8 @@ class User(UUIDMixin, TimeStampMixin, Base):
     email: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
     
     phone_number: Mapped[Optional[str]] = mapped_column(Text, unique=True, index=True)
+    # HMAC blind index of the normalised phone (app/security/pii.py); exact-match lookups and uniqueness
+    phone_bidx: Mapped[Optional[str]] = mapped_column(String(64), unique=True, index=True)
     
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
 
@@ -33,6 +35,7 @@ class User(UUIDMixin, TimeStampMixin, Base):
     )
 
     nin: Mapped[Optional[str]] = mapped_column(Text)
+    nin_bidx: Mapped[Optional[str]] = mapped_column(String(64), index=True)
     
     location: Mapped[Optional[str]] = mapped_column(String(255))
     service_preferences: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
@@ -55,3 +58,8 @@ class User(UUIDMixin, TimeStampMixin, Base):
     documents: Mapped[list["ArtisanDocument"]] = relationship(
         "ArtisanDocument", back_populates="user", cascade="all, delete-orphan"
     )
+
+    __table_args__ = (
+        # keyset pagination (app/pagination.py)
+        Index("ix_users_created_id", "created_at", "id"),
+    )
@@ -0,0 +1,39 @@
+# app/models/webhook_inbox.py
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, String, Integer, Text, DateTime, Identity, Index, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.database import Base
+from app.models.base import UUIDMixin, TimeStampMixin
+
+# status values
+WEBHOOK_PENDING = "pending"   # waiting for a worker (or for next_attempt_at after a failure)
+WEBHOOK_DONE = "done"
+WEBHOOK_DEAD = "dead"         # attempts exhausted; replay with scripts/run_webhook_worker.py
+
+class WebhookInboxEvent(UUIDMixin, TimeStampMixin, Base):
+    """A verified provider webhook, stored on receipt and applied by the webhook workers."""
+    __tablename__ = "webhook_inbox"
+
+    seq: Mapped[int] = mapped_column(BigInteger, Identity(), unique=True)  # arrival order
+    provider: Mapped[str] = mapped_column(String(32))
+    dedupe_key: Mapped[str] = mapped_column(String(160))        # "<event>:<data.id|reference>" or body hash
+    event: Mapped[str] = mapped_column(String(64))
+    reference: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # events per reference apply in order
+    payload: Mapped[dict] = mapped_column(JSONB)
+    status: Mapped[str] = mapped_column(String(16), default=WEBHOOK_PENDING, server_default=WEBHOOK_PENDING)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    result: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("provider", "dedupe_key", name="uq_webhook_inbox_provider_dedupe"),
+        # worker claim: status = 'pending' AND next_attempt_at <= now() ORDER BY seq
+        Index("ix_webhook_inbox_status_next", "status", "next_attempt_at"),
+        # per-reference ordering check (earlier unfinished event for the same reference?)
+        Index("ix_webhook_inbox_reference_seq", "reference", "seq"),
+    )
@@ -0,0 +1,127 @@
+# app/observability/logs.py
+"""
+Process-wide logging setup.
+
+- the request id of the current request lives in a contextvar (request_id_var,
+  set by the request middleware) and is stamped on every record logged while
+  the request runs, including from services and threadpool routes
+  (Starlette copies the context into the threadpool)
+- handlers never block the caller: the root logger only has a QueueHandler;
+  a QueueListener thread formats and writes to stdout
+- LOG_FORMAT=json writes one JSON object per line; fields passed via
+  extra={...} become top-level keys
+
+setup_logging() is idempotent; main.py calls it at import time.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import LOG_LEVEL, LOG_FORMAT
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# attributes every LogRecord has; anything else came in via extra=
+_STANDARD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        rid = getattr(record, "request_id", None)
+        if rid:
+            out["request_id"] = rid
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                out[key] = value
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        elif record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s | %(levelname)s | %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = " ".join(
+            f"{k}={v}" for k, v in record.__dict__.items() if k not in _STANDARD_ATTRS and not k.startswith("_")
+        )
+        rid = getattr(record, "request_id", None)
+        if rid and "req_id=" not in line:
+            extras = f"req_id={rid} {extras}".rstrip()
+        return f"{line} {extras}" if extras else line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Keeps the record structured for the listener: only the message is
+    rendered (args may not be safe to format later) and the traceback is
+    turned into text; the stock prepare() would format the whole line here.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None) -> None:
+    global _listener
+    if _listener is not None:
+        return
+    out = logging.StreamHandler(stream or sys.stdout)
+    out.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _QueueHandler(q)
+    handler.addFilter(RequestIdFilter())  # runs in the logging thread, where the contextvar is set
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(q, out, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,334 @@
+# app/observability/metrics.py
+"""
+In-process metrics with Prometheus text exposition (served at GET /metrics).
+
+Families: Counter, Gauge and Histogram, each with fixed label names. Hot-path
+cost is one lock, a dict lookup and an add (histograms: plus a bisect), so
+recording on every request is negligible. Values that already live elsewhere
+(DB pool state, the bcrypt pool, the Paystack breaker) are read at scrape time
+by collectors registered with register_collector().
+
+Multiple workers (uvicorn --workers N, gunicorn): set METRICS_MULTIPROC_DIR to
+a directory shared by the workers (empty it on deploy). Each worker writes its
+samples to <dir>/<pid>.json every METRICS_FLUSH_SECONDS and on every scrape;
+the worker that serves /metrics merges all files. Counters and histograms are
+summed over every file (dead workers keep their counts, so totals stay
+monotonic); gauges only over live workers, summed or max'ed per family.
+Without the directory /metrics reports the serving process only.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Iterable, Optional, Sequence
+
+from app.config import METRICS_MULTIPROC_DIR, METRICS_FLUSH_SECONDS
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+# sample: (metric name, ((label, value), ...), value)
+Sample = tuple
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), *, mode: str = "sum"):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.mode = mode  # gauges in multiprocess mode: "sum" or "max"
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _labels(self, key: tuple, extra: tuple = ()) -> tuple:
+        return tuple(zip(self.labelnames, key)) + extra
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> list[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(k), v) for k, v in self._values.items()]
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def samples(self) -> list[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(k), v) for k, v in self._values.items()]
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple, list] = {}  # key -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            v = self._values.get(key)
+            if v is None:
+                v = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            v[i] += 1
+            v[-1] += value
+
+    def samples(self) -> list[Sample]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        out = []
+        for key, v in items:
+            cumulative = 0
+            for le, n in zip(self.buckets + (math.inf,), v[:-1]):
+                cumulative += n
+                out.append((f"{self.name}_bucket", self._labels(key, (("le", _fmt(le)),)), cumulative))
+            out.append((f"{self.name}_count", self._labels(key), cumulative))
+            out.append((f"{self.name}_sum", self._labels(key), v[-1]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._families: dict[str, _Family] = {}
+        self._collectors: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, family: _Family) -> _Family:
+        with self._lock:
+            self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (), *, mode: str = "sum") -> Gauge:
+        return self.register(Gauge(name, help, labelnames, mode=mode))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def register_collector(self, fn: Callable[[], None]) -> None:
+        """fn() runs before every scrape/flush and typically sets gauges."""
+        self._collectors.append(fn)
+
+    def collect(self) -> dict[str, dict]:
+        for fn in self._collectors:
+            try:
+                fn()
+            except Exception:
+                log.exception("metrics collector %s failed", getattr(fn, "__name__", fn))
+        with self._lock:
+            families = list(self._families.values())
+        return {
+            f.name: {"kind": f.kind, "help": f.help, "mode": f.mode, "samples": f.samples()}
+            for f in families
+        }
+
+
+registry = Registry()
+
+
+# exposition
+
+def _fmt(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(families: dict[str, dict]) -> str:
+    lines = []
+    for name in sorted(families):
+        fam = families[name]
+        lines.append(f"# HELP {name} {fam['help']}")
+        lines.append(f"# TYPE {name} {fam['kind']}")
+        for sample_name, labels, value in fam["samples"]:
+            if labels:
+                inner = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+                lines.append(f"{sample_name}{{{inner}}} {_fmt(value)}")
+            else:
+                lines.append(f"{sample_name} {_fmt(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# multiprocess
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def flush(directory: str = METRICS_MULTIPROC_DIR) -> None:
+    """Write this process's samples to <directory>/<pid>.json (atomic rename)."""
+    if not directory:
+        return
+    data = registry.collect()
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, os.path.join(directory, f"{os.getpid()}.json"))
+
+
+def _merge(per_process: Iterable[tuple[int, dict]]) -> dict[str, dict]:
+    merged: dict[str, dict] = {}
+    for pid, families in per_process:
+        alive = _pid_alive(pid)
+        for name, fam in families.items():
+            if fam["kind"] == "gauge" and not alive:
+                continue
+            m = merged.setdefault(name, {**fam, "samples": {}})
+            combine = max if fam["kind"] == "gauge" and fam.get("mode") == "max" else (lambda a, b: a + b)
+            for sample_name, labels, value in fam["samples"]:
+                key = (sample_name, tuple(tuple(p) for p in labels))
+                m["samples"][key] = combine(m["samples"][key], value) if key in m["samples"] else value
+    for fam in merged.values():
+        fam["samples"] = [(n, labels, v) for (n, labels), v in fam["samples"].items()]
+    return merged
+
+
+def collect_all(directory: str = METRICS_MULTIPROC_DIR) -> dict[str, dict]:
+    if not directory:
+        return registry.collect()
+    flush(directory)
+    per_process = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".json") or entry.name.startswith("."):
+            continue
+        try:
+            with open(entry.path) as f:
+                per_process.append((int(entry.name[:-5]), json.load(f)))
+        except (ValueError, OSError):
+            continue  # half-written or foreign file
+    return _merge(per_process)
+
+
+def exposition() -> str:
+    return render(collect_all())
+
+
+_flusher: Optional[threading.Event] = None
+
+
+def start_flusher(directory: str = METRICS_MULTIPROC_DIR, interval: float = METRICS_FLUSH_SECONDS) -> Optional[threading.Event]:
+    """Background thread that keeps <dir>/<pid>.json fresh; no-op without a directory."""
+    global _flusher
+    if not directory or _flusher is not None:
+        return _flusher
+    os.makedirs(directory, exist_ok=True)
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            try:
+                flush(directory)
+            except Exception:
+                log.exception("metrics flush failed")
+        flush(directory)
+
+    threading.Thread(target=loop, name="metrics-flush", daemon=True).start()
+    _flusher = stop
+    return stop
+
+
+# shared families
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route template, method and status.", ("method", "route", "status"),
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route"),
+)
+DB_POOL_CHECKOUT = registry.histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled DB connection.", ("pool",),
+)
+DB_POOL = registry.gauge(
+    "db_pool_connections", "DB pool connections by state (checked_out, checked_in, overflow, size).", ("pool", "state"),
+)
+EXTERNAL_CALLS = registry.histogram(
+    "external_call_duration_seconds", "Latency of calls to external services.", ("service", "operation", "outcome"),
+)
+RATE_LIMIT_REJECTIONS = registry.counter(
+    "rate_limit_rejections_total", "Requests refused by the rate limiter.", ("scope",),
+)
+WEBHOOK_EVENTS = registry.counter(
+    "webhook_events_total", "Webhook inbox events handled by workers.", ("provider", "outcome"),
+)
+WEBHOOK_LAG = registry.histogram(
+    "webhook_processing_lag_seconds", "Time from webhook receipt to successful processing.", ("provider",),
+    buckets=SLOW_BUCKETS,
+)
+
+
+def observe_external(service: str, operation: str, started: float, outcome: str = "ok") -> None:
+    """Record one external call; `started` is a time.perf_counter() value."""
+    EXTERNAL_CALLS.observe(time.perf_counter() - started, service=service, operation=operation, outcome=outcome)
+
+
+def instrument_pool(engine, name: str) -> None:
+    """Time connection checkouts and report pool occupancy for a (sync) SQLAlchemy engine."""
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return connect(*args, **kwargs)
+        finally:
+            DB_POOL_CHECKOUT.observe(time.perf_counter() - t0, pool=name)
+
+    pool.connect = timed_connect
+
+    def collect_pool():
+        for state, fn in (("checked_out", "checkedout"), ("checked_in", "checkedin"),
+                          ("overflow", "overflow"), ("size", "size")):
+            if hasattr(pool, fn):
+                # QueuePool.overflow() is negative until the pool is full
+                DB_POOL.set(max(0, getattr(pool, fn)()), pool=name, state=state)
+
+    registry.register_collector(collect_pool)
@@ -0,0 +1,113 @@
+# app/observability/middleware.py
+"""
+Request middleware as plain ASGI (no BaseHTTPMiddleware).
+
+BaseHTTPMiddleware runs the app in an extra task and re-wraps the response
+body in a memory stream; that costs throughput on every request and buffers
+or breaks streaming responses. This middleware only wraps `send`:
+
+- request id: X-Request-ID from the client (if sane) or a new uuid4; stored
+  in request_id_var (picked up by every log record) and request.state,
+  echoed back as X-Request-ID
+- one structured access-log record per request (method, path, status,
+  duration_ms, client); successful fast requests are sampled at
+  LOG_SUCCESS_SAMPLE_RATE, errors (>= 400), exceptions and requests slower
+  than LOG_SLOW_REQUEST_MS are always logged
+- request count/latency metrics for every request, labelled with the route
+  template (/jobs/{job_id}), never the raw path, to keep cardinality bounded
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import re
+import time
+import uuid
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import LOG_SUCCESS_SAMPLE_RATE, LOG_SLOW_REQUEST_MS
+from app.observability.logs import request_id_var
+from app.observability.metrics import HTTP_REQUESTS, HTTP_LATENCY
+
+access_log = logging.getLogger("app.access")
+
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def _incoming_request_id(scope: Scope) -> str | None:
+    for name, value in scope.get("headers") or ():
+        if name == b"x-request-id":
+            rid = value.decode("latin-1")
+            return rid if _VALID_REQUEST_ID.match(rid) else None
+    return None
+
+
+class RequestLogMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        sample_rate: float = LOG_SUCCESS_SAMPLE_RATE,
+        slow_ms: int = LOG_SLOW_REQUEST_MS,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rid = _incoming_request_id(scope) or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = rid
+        token = request_id_var.set(rid)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Request-ID", rid)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except Exception:
+            self._log(scope, status_code, start, failed=True)
+            raise
+        else:
+            self._log(scope, status_code, start)
+        finally:
+            request_id_var.reset(token)
+
+    def _log(self, scope: Scope, status_code: int, start: float, failed: bool = False) -> None:
+        elapsed = time.perf_counter() - start
+        route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+        HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status_code)
+        HTTP_LATENCY.observe(elapsed, method=scope["method"], route=route)
+
+        dur_ms = round(elapsed * 1000, 1)
+        if not failed and status_code < 400 and dur_ms < self.slow_ms:
+            if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+                return
+        client = scope.get("client")
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": dur_ms,
+            "client": client[0] if client else None,
+        }
+        if failed:
+            access_log.error("request failed", exc_info=True, extra=fields)
+        elif status_code >= 500:
+            access_log.error("request", extra=fields)
+        elif status_code >= 400 or dur_ms >= self.slow_ms:
+            access_log.warning("request", extra=fields)
+        else:
+            access_log.info("request", extra=fields)
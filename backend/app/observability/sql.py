@@ -0,0 +1,218 @@
+# app/observability/sql.py
+"""
+Per-request SQL instrumentation (development/staging; SQL_INSTRUMENTATION).
+
+Engine-level cursor events time every statement on every engine (sync,
+replica and the asyncpg engine's sync core) and add it to the QueryStats of
+the current request, found through a contextvar. Starlette copies the
+context into the threadpool, so sync routes and dependencies are counted
+too. Per request we keep:
+
+- number of queries and total DB time
+- statement "shapes" (the parametrised SQL, IN-lists collapsed) with a
+  count each, so the same SELECT issued in a loop shows up as one shape
+  with a high count: the N+1 signature
+
+QueryStatsMiddleware (pure ASGI) installs the stats, adds
+`Server-Timing: db;dur=<ms>;desc="<n> queries"` to the response, records
+db_queries_per_request, and logs a warning when a request crosses
+SQL_WARN_QUERIES / SQL_WARN_DB_MS or repeats one shape SQL_WARN_REPEATS times.
+
+query_budget() applies the same counting around a block and raises when a
+budget is exceeded; requests made inside it (the middleware's per-request
+stats are added to the enclosing scope) count too. Tests use it through the
+`query_budget` fixture in tests/conftest.py:
+
+    with query_budget(max_queries=3, max_repeats=1):
+        client.get("/jobs/status/...")
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import SQL_WARN_QUERIES, SQL_WARN_DB_MS, SQL_WARN_REPEATS
+from app.observability.metrics import registry
+
+log = logging.getLogger(__name__)
+
+DB_QUERIES = registry.histogram(
+    "db_queries_per_request", "SQL statements issued per HTTP request.", ("route",),
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+
+_IN_LIST = re.compile(r"\(\s*(?:%\(\w+\)s|\$\d+|\?)(?:\s*,\s*(?:%\(\w+\)s|\$\d+|\?))+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Parametrised SQL with whitespace normalised and IN-lists collapsed to (?)."""
+    return _IN_LIST.sub("(?)", _SPACE.sub(" ", statement).strip())
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "shapes", "slowest", "slowest_seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter[str] = Counter()
+        self.slowest: Optional[str] = None
+        self.slowest_seconds = 0.0
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+        if seconds > self.slowest_seconds:
+            self.slowest, self.slowest_seconds = statement, seconds
+
+    def merge(self, other: "QueryStats") -> None:
+        self.count += other.count
+        self.seconds += other.seconds
+        self.shapes.update(other.shapes)
+        if other.slowest_seconds > self.slowest_seconds:
+            self.slowest, self.slowest_seconds = other.slowest, other.slowest_seconds
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(s, n) for s, n in self.shapes.most_common() if n >= threshold]
+
+    @property
+    def db_ms(self) -> float:
+        return self.seconds * 1000
+
+
+_current: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar("sql_query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+# engine hooks
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("_qstats_start", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("_qstats_start")
+    if starts:
+        stats.record(statement, time.perf_counter() - starts.pop())
+
+
+_installed = False
+
+
+def install() -> None:
+    """Attach the cursor hooks to every Engine (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before)
+    event.listen(Engine, "after_cursor_execute", _after)
+    _installed = True
+
+
+# budgets
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: Optional[int] = None, max_repeats: Optional[int] = None):
+    """Count queries issued inside the block; raise QueryBudgetExceeded if over budget."""
+    install()
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    problems = []
+    if max_queries is not None and stats.count > max_queries:
+        problems.append(f"{stats.count} queries (budget {max_queries})")
+    if max_repeats is not None:
+        for shape, n in stats.repeated(max_repeats + 1):
+            problems.append(f"{n}x {shape[:200]}")
+    if problems:
+        raise QueryBudgetExceeded("; ".join(problems))
+
+
+# middleware
+
+class QueryStatsMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        warn_queries: int = SQL_WARN_QUERIES,
+        warn_db_ms: int = SQL_WARN_DB_MS,
+        warn_repeats: int = SQL_WARN_REPEATS,
+    ):
+        install()
+        self.app = app
+        self.warn_queries = warn_queries
+        self.warn_db_ms = warn_db_ms
+        self.warn_repeats = warn_repeats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - start) * 1000
+                MutableHeaders(scope=message).append(
+                    "Server-Timing",
+                    f'db;dur={stats.db_ms:.1f};desc="{stats.count} queries", app;dur={app_ms:.1f}',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._report(scope, stats)
+            outer = _current.get()
+            if outer is not None:
+                outer.merge(stats)  # inside query_budget()
+
+    def _report(self, scope: Scope, stats: QueryStats) -> None:
+        route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+        DB_QUERIES.observe(stats.count, route=route)
+        repeated = stats.repeated(self.warn_repeats)
+        if stats.count < self.warn_queries and stats.db_ms < self.warn_db_ms and not repeated:
+            return
+        log.warning(
+            "query budget exceeded on %s %s: %d queries, %.1f ms in DB",
+            scope["method"], route, stats.count, stats.db_ms,
+            extra={
+                "route": route,
+                "queries": stats.count,
+                "db_ms": round(stats.db_ms, 1),
+                "repeated": [{"count": n, "sql": s[:300]} for s, n in repeated[:5]],
+                "slowest_ms": round(stats.slowest_seconds * 1000, 1),
+            },
+        )
@@ -0,0 +1,183 @@
+# app/pagination.py
+"""
+Opaque, signed keyset cursors and (created_at, id) keyset pagination.
+
+A cursor is the sort key of the last row of a page, serialized to JSON,
+base64url-encoded and HMAC-signed with SECRET_KEY so clients cannot forge
+or tamper with it. Callers decide what goes into the key (e.g. (rank, id)
+for search, (created_at, id) for time-ordered lists).
+
+List endpoints use keyset_paginate(): the next page is fetched with
+`WHERE (created_at, id) < (:last_created_at, :last_id)`, so page 500 costs
+the same as page 1 (given an index ending in (created_at, id)). The total is
+optional: "exact" runs COUNT(*), "estimate" asks the planner, "none" skips it.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Literal, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.orm import Query
+
+from app.config import SECRET_KEY
+
+_SIG_BYTES = 12
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _b64e(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64d(s: str) -> bytes:
+    return base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
+
+
+def _sign(body: bytes, scope: str) -> bytes:
+    return hmac.new(SECRET_KEY.encode(), scope.encode() + b"|" + body, hashlib.sha256).digest()[:_SIG_BYTES]
+
+
+def encode_cursor(values: list[Any], scope: str) -> str:
+    """Serialize the sort key of the last row. `scope` binds the cursor to one endpoint/ordering."""
+    body = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return _b64e(body) + "." + _b64e(_sign(body, scope))
+
+
+def decode_cursor(cursor: Optional[str], scope: str) -> Optional[list[Any]]:
+    """Return the decoded sort key, None for no cursor; 400 on a malformed or forged cursor."""
+    if not cursor:
+        return None
+    try:
+        body_s, sig_s = cursor.split(".", 1)
+        body = _b64d(body_s)
+        if not hmac.compare_digest(_b64d(sig_s), _sign(body, scope)):
+            raise ValueError("bad signature")
+        values = json.loads(body)
+        if not isinstance(values, list):
+            raise ValueError("bad payload")
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# keyset pagination over (created_at, id)
+
+TotalMode = Literal["exact", "estimate", "none"]
+
+# planner estimates below this are cheap enough to replace with an exact count
+ESTIMATE_EXACT_BELOW = 1000
+
+
+@dataclass
+class Page:
+    items: list
+    next_cursor: Optional[str]
+    total: Optional[int]
+    total_estimated: bool = False
+
+
+def _default_key(row) -> tuple:
+    return row.created_at, row.id
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <stmt>, compiled with the statement's bound parameters."""
+    inherit_cache = False
+
+    def __init__(self, stmt):
+        self.stmt = stmt
+
+
+@compiles(_Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
+def estimate_count(query: Query) -> tuple[int, bool]:
+    """
+    Row count from the planner's estimate (constant cost). Returns (count, estimated).
+    Small estimates, and queries that cannot be explained, fall back to an exact count.
+    """
+    stmt = query.order_by(None).statement
+    try:
+        conn = query.session.connection()
+        # savepoint: a failed EXPLAIN must not abort the request's transaction
+        with query.session.begin_nested():
+            plan = conn.execute(_Explain(stmt)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        rows = int(plan[0]["Plan"]["Plan Rows"])
+    except (SQLAlchemyError, KeyError, IndexError, TypeError, ValueError):
+        return query.order_by(None).count(), False
+    if rows < ESTIMATE_EXACT_BELOW:
+        return query.order_by(None).count(), False
+    return rows, True
+
+
+def keyset_paginate(
+    query: Query,
+    *,
+    created_col,
+    id_col,
+    scope: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    total: Optional[TotalMode] = None,
+    ascending: bool = False,
+    key: Callable[[Any], tuple] = _default_key,
+) -> Page:
+    """
+    Page `query` by (created_col, id_col), newest first unless `ascending`.
+
+    - cursor: value of a previous Page.next_cursor; when given, `offset` is ignored
+    - offset: legacy offset paging for the first request of old clients
+    - total:  "exact" | "estimate" | "none"; defaults to "exact" on the first page and
+              "none" once a cursor is supplied (clients keep the first page's total)
+    - key:    extracts (created_at, id) from a result row (entities and labelled rows
+              expose .created_at / .id, which is the default)
+
+    Any existing ORDER BY on `query` is replaced.
+    """
+    after = decode_cursor(cursor, scope)
+    mode = total or ("none" if after else "exact")
+
+    count: Optional[int] = None
+    estimated = False
+    if mode == "exact":
+        count = query.order_by(None).count()
+    elif mode == "estimate":
+        count, estimated = estimate_count(query)
+
+    order = (created_col.asc(), id_col.asc()) if ascending else (created_col.desc(), id_col.desc())
+    q = query.order_by(None).order_by(*order)
+    if after:
+        try:
+            last = (datetime.fromisoformat(after[0]), uuid.UUID(str(after[1])))
+        except (ValueError, TypeError, IndexError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        boundary = tuple_(created_col, id_col)
+        q = q.filter(boundary > last if ascending else boundary < last)
+    else:
+        q = q.offset(offset)
+
+    # fetch one extra row to know whether another page exists
+    rows = q.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        created_at, row_id = key(rows[-1])
+        next_cursor = encode_cursor([created_at.isoformat(), str(row_id)], scope)
+    return Page(items=rows, next_cursor=next_cursor, total=count, total_estimated=estimated)
@@ -9,12 +9,15 @@ from sqlalchemy.orm import Session, aliased, joinedload
 
 from app.db.database import get_db
 from app.auth_utils import require_admin
-from app.utils import decrypt_str
+from app.security.pii import decrypt_many, normalize_phone, phone_bidx
 from app.models import User, ArtisanProfile, Job, Review, Complaint, Dispute, Announcement
 from app.models.payments import Payment
 from app.models.enums import UserRole, VerificationStatus, JobStatus
 
 from app.models.artisan_document import ArtisanDocument
+from app.pagination import TotalMode, keyset_paginate
+from app.services import admin_stats_service
+from app.services.auth_service import revoke_all_sessions_for_user
 from app.schemas.artisan_document import ArtisanDocumentOut
 from app.schemas.admin_schemas import (
     AdminSummaryOut, AdminBookingListOut, AdminBookingRow,
@@ -30,30 +33,25 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 # ---------- SUMMARY ----------
 
 @router.get("/summary", response_model=AdminSummaryOut)
-def admin_summary(db: Session = Depends(get_db), admin: User = Depends(require_admin)):
-    users_total = db.query(func.count(User.id)).scalar() or 0
-    customers_total = db.query(func.count(User.id)).filter(User.role == UserRole.customer).scalar() or 0
-    artisans_total = db.query(func.count(User.id)).filter(User.role == UserRole.artisan).scalar() or 0
-
-    ap = aliased(ArtisanProfile)
-    artisans_verified = db.query(func.count(ap.user_id)).filter(ap.verification_status == VerificationStatus.verified).scalar() or 0
-    artisans_pending = db.query(func.count(ap.user_id)).filter(ap.verification_status == VerificationStatus.pending).scalar() or 0
-
-    jobs_by_status = {}
-    for s in JobStatus:
-        c = db.query(func.count(Job.id)).filter(Job.status == s).scalar() or 0
-        jobs_by_status[str(s)] = c
-
-    reviews_total = db.query(func.count(Review.id)).scalar() or 0
-
+def admin_summary(
+    admin: User = Depends(require_admin),
+    refresh: bool = Query(False, description="Recompute now instead of serving the cached snapshot"),
+):
+    """
+    Dashboard counters from the stats snapshot (see admin_stats_service).
+    `computed_at` tells how fresh the numbers are.
+    """
+    snap = admin_stats_service.get_snapshot(force=refresh)
+    st = snap.stats
     return AdminSummaryOut(
-        users_total=users_total,
-        customers_total=customers_total,
-        artisans_total=artisans_total,
-        artisans_verified=artisans_verified,
-        artisans_pending=artisans_pending,
-        jobs_by_status=jobs_by_status,
-        reviews_total=reviews_total,
+        users_total=st["users_total"],
+        customers_total=st["customers_total"],
+        artisans_total=st["artisans_total"],
+        artisans_verified=st["artisans_verified"],
+        artisans_pending=st["artisans_pending"],
+        jobs_by_status={str(k): v for k, v in st["jobs_by_status"].items()},
+        reviews_total=st["reviews_total"],
+        computed_at=snap.computed_at,
     )
 
 # ---------- USERS LIST (ADMIN) ----------
@@ -63,13 +61,16 @@ def admin_list_users(
     db: Session = Depends(get_db),
     admin: User = Depends(require_admin),
     role: Optional[UserRole] = Query(None, description="Filter by role: customer | artisan"),
-    q: Optional[str] = Query(None, description="Search name/email/phone (ILIKE)"),
+    q: Optional[str] = Query(None, description="Search name/email (ILIKE) or an exact phone number"),
     is_blocked: Optional[bool] = Query(None, description="Filter by blocked status"),
     verification_status: Optional[VerificationStatus] = Query(
         None, description="Filter artisans by verification status"
     ),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    total: Optional[TotalMode] = Query(None, description="exact | estimate | none"),
+    include_phone: bool = Query(True, description="false skips decrypting phone numbers (returned as null)"),
 ):
     """
     Returns both customers and artisans with optional filters.
@@ -80,21 +81,20 @@ def admin_list_users(
     q_users = (
         db.query(User)
         .options(joinedload(User.artisan_profile))
-        .order_by(User.created_at.desc())
     )
 
     # Role filter (optional)
     if role is not None:
         q_users = q_users.filter(User.role == role)
 
-    # Text search across name/email/phone
+    # Text search across name/email; phones are encrypted, so they match exactly via the blind index
     if q:
         like = f"%{q}%"
-        q_users = q_users.filter(
-            (User.full_name.ilike(like)) |
-            (User.email.ilike(like)) |
-            (User.phone_number.ilike(like))
-        )
+        match = (User.full_name.ilike(like)) | (User.email.ilike(like))
+        q_bidx = phone_bidx(q) if len(normalize_phone(q)) >= 7 else None
+        if q_bidx:
+            match = match | (User.phone_bidx == q_bidx)
+        q_users = q_users.filter(match)
 
     # Blocked filter
     if is_blocked is not None:
@@ -109,11 +109,15 @@ def admin_list_users(
                    .filter(ArtisanProfile.verification_status == verification_status)
         )
 
-    total = q_users.count()
-    rows = q_users.limit(limit).offset(offset).all()
+    page = keyset_paginate(
+        q_users, created_col=User.created_at, id_col=User.id, scope="admin.users",
+        limit=limit, cursor=cursor, offset=offset, total=total,
+    )
+    rows = page.items
 
+    phones = decrypt_many((u.phone_number for u in rows), skip=not include_phone)
     items: list[AdminUserRow] = []
-    for u in rows:
+    for u, phone in zip(rows, phones):
         p = u.artisan_profile
         items.append(
             AdminUserRow(
@@ -121,7 +125,7 @@ def admin_list_users(
                 role=str(u.role),
                 full_name=u.full_name,
                 email=u.email,
-                phone_number=decrypt_str(u.phone_number),
+                phone_number=phone,
                 is_active=bool(getattr(u, "is_active", True)),
                 is_blocked=bool(getattr(u, "is_blocked", False)),
                 created_at=u.created_at,
@@ -131,7 +135,7 @@ def admin_list_users(
             )
         )
 
-    return AdminUserListOut(total=total, items=items)
+    return AdminUserListOut(total=page.total, items=items, next_cursor=page.next_cursor, total_estimated=page.total_estimated)
 
 
 # ---------- BOOKINGS LIST (ADMIN) ----------
@@ -144,7 +148,9 @@ def admin_bookings(
     customer_email: Optional[str] = Query(None),
     artisan_email: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    total: Optional[TotalMode] = Query(None, description="exact | estimate | none"),
 ):
     Customer = aliased(User)
     Artisan = aliased(User)
@@ -163,7 +169,6 @@ def admin_bookings(
         )
         .outerjoin(Customer, Customer.id == Job.customer_id)
         .outerjoin(Artisan, Artisan.id == Job.artisan_id)
-        .order_by(Job.created_at.desc())
     )
 
     if status_eq:
@@ -173,8 +178,11 @@ def admin_bookings(
     if artisan_email:
         q = q.filter(Artisan.email == artisan_email)
 
-    total = q.count()
-    rows = q.limit(limit).offset(offset).all()
+    page = keyset_paginate(
+        q, created_col=Job.created_at, id_col=Job.id, scope="admin.bookings",
+        limit=limit, cursor=cursor, offset=offset, total=total,
+    )
+    rows = page.items
 
     items = [
         AdminBookingRow(
@@ -191,7 +199,7 @@ def admin_bookings(
         for r in rows
     ]
 
-    return AdminBookingListOut(total=total, items=items)
+    return AdminBookingListOut(total=page.total, items=items, next_cursor=page.next_cursor, total_estimated=page.total_estimated)
 
 # ---------- PAYMENTS & DISPUTES (placeholders until full flows) ----------
 
@@ -202,17 +210,24 @@ def admin_payments(
     method: Optional[str] = Query(None),
     status_eq: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    total: Optional[TotalMode] = Query(None, description="exact | estimate | none"),
 ):
-    q = db.query(Payment).order_by(Payment.created_at.desc())
+    q = db.query(Payment)
     if method:
         q = q.filter(Payment.method == method)
     if status_eq:
         q = q.filter(Payment.status == status_eq)
-    total = q.count()
-    rows = q.limit(limit).offset(offset).all()
+    page = keyset_paginate(
+        q, created_col=Payment.created_at, id_col=Payment.id, scope="admin.payments",
+        limit=limit, cursor=cursor, offset=offset, total=total,
+    )
+    rows = page.items
     return {
-        "total": total,
+        "total": page.total,
+        "total_estimated": page.total_estimated,
+        "next_cursor": page.next_cursor,
         "items": [{
             "id": str(p.id),
             "reference": p.reference,
@@ -235,7 +250,9 @@ def admin_disputes(
     status_eq: Optional[str] = Query(None, description="Filter by status: open | resolved"),
     opened_by_email: Optional[str] = Query(None, description="Filter by the email of the user who opened the dispute"),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    total: Optional[TotalMode] = Query(None, description="exact | estimate | none"),
 ):
     """
     List disputes raised by customers or artisans.  Supports optional filtering by
@@ -250,14 +267,17 @@ def admin_disputes(
         db.query(Dispute, OpenedBy.email.label("opened_email"), JobAlias.job_number.label("job_number"))
         .join(OpenedBy, OpenedBy.id == Dispute.opened_by_id)
         .outerjoin(JobAlias, JobAlias.id == Dispute.job_id)
-        .order_by(Dispute.created_at.desc())
     )
     if status_eq:
         q = q.filter(Dispute.status == status_eq)
     if opened_by_email:
         q = q.filter(OpenedBy.email == opened_by_email)
-    total = q.count()
-    rows = q.limit(limit).offset(offset).all()
+    page = keyset_paginate(
+        q, created_col=Dispute.created_at, id_col=Dispute.id, scope="admin.disputes",
+        limit=limit, cursor=cursor, offset=offset, total=total,
+        key=lambda r: (r[0].created_at, r[0].id),
+    )
+    rows = page.items
     items: list[AdminDisputeRow] = []
     for d, email, job_number in rows:
         items.append(
@@ -270,7 +290,7 @@ def admin_disputes(
                 created_at=d.created_at,
             )
         )
-    return AdminDisputeListOut(total=total, items=items)
+    return AdminDisputeListOut(total=page.total, items=items, next_cursor=page.next_cursor, total_estimated=page.total_estimated)
 
 # Resolve a dispute (admin action)
 @router.post("/disputes/{dispute_id}/resolve", response_model=Message)
@@ -308,7 +328,9 @@ def admin_reviews(
     db: Session = Depends(get_db),
     admin: User = Depends(require_admin),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    total: Optional[TotalMode] = Query(None, description="exact | estimate | none"),
 ):
     Customer = aliased(User)
     Artisan = aliased(User)
@@ -325,13 +347,17 @@ def admin_reviews(
         )
         .outerjoin(Customer, Customer.id == Review.customer_id)
         .outerjoin(Artisan, Artisan.id == Review.artisan_id)
-        .order_by(Review.created_at.desc())
     )
-    total = q.count()
-    rows = q.limit(limit).offset(offset).all()
+    page = keyset_paginate(
+        q, created_col=Review.created_at, id_col=Review.id, scope="admin.reviews",
+        limit=limit, cursor=cursor, offset=offset, total=total,
+    )
+    rows = page.items
 
     return {
-        "total": total,
+        "total": page.total,
+        "total_estimated": page.total_estimated,
+        "next_cursor": page.next_cursor,
         "items": [
             {
                 "id": str(r.id),
@@ -356,6 +382,9 @@ def block_user(email: str, payload: AdminBlockUserIn, db: Session = Depends(get_
     u.is_blocked = bool(payload.block)
     db.add(u)
     db.commit()
+    if payload.block:
+        # end live sessions too, or access tokens would outlive the block (stateless mode)
+        revoke_all_sessions_for_user(db, u.id)
     return {"message": ("User blocked" if payload.block else "User unblocked")}
 
 # ---------- ARTISAN VERIFY/REJECT (admin surface) ----------
@@ -416,7 +445,10 @@ def admin_pending_artisans(
     q: Optional[str] = Query(None, description="Filter by name or email"),
     category: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    total: Optional[TotalMode] = Query(None, description="exact | estimate | none"),
+    include_phone: bool = Query(True, description="false skips decrypting phone numbers (returned as null)"),
 ):
     """
     List artisans whose profiles are still pending admin verification.
@@ -428,7 +460,6 @@ def admin_pending_artisans(
         .join(ArtisanProfile, ArtisanProfile.user_id == User.id)
         .filter(User.role == UserRole.artisan)
         .filter(ArtisanProfile.verification_status == VerificationStatus.pending)
-        .order_by(User.created_at.desc())
     )
 
     if q:
@@ -438,24 +469,29 @@ def admin_pending_artisans(
     if category:
         query = query.filter(ArtisanProfile.service_category == category)
 
-    total = query.count()
-    rows = query.limit(limit).offset(offset).all()
+    page = keyset_paginate(
+        query, created_col=User.created_at, id_col=User.id, scope="admin.artisans_pending",
+        limit=limit, cursor=cursor, offset=offset, total=total,
+        key=lambda r: (r[0].created_at, r[0].id),
+    )
+    rows = page.items
 
+    phones = decrypt_many((u.phone_number for u, _ in rows), skip=not include_phone)
     items = [
         AdminArtisanRow(
             user_id=str(u.id),
             full_name=u.full_name,
             email=u.email,
-            phone_number=decrypt_str(u.phone_number),
+            phone_number=phone,
             service_category=p.service_category,
             created_at=u.created_at,
             verification_status=str(p.verification_status),
             rejection_reason=p.rejection_reason,
         )
-        for (u, p) in rows
+        for (u, p), phone in zip(rows, phones)
     ]
 
-    return AdminArtisanListOut(total=total, items=items)
+    return AdminArtisanListOut(total=page.total, items=items, next_cursor=page.next_cursor, total_estimated=page.total_estimated)
 
 # ---------- ARTISAN DOCUMENTS (admin surface) ----------
 @router.get("/artisans/{artisan_user_id}/documents", response_model=list[ArtisanDocumentOut])
@@ -511,7 +547,9 @@ def admin_list_complaints(
     status_eq: Optional[str] = Query(None, description="Filter by complaint status"),
     q: Optional[str] = Query(None, description="Search title/description (ILIKE)"),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    total: Optional[TotalMode] = Query(None, description="exact | estimate | none"),
 ):
     """
     Lists complaints with optional filtering by status and a simple ILIKE search
@@ -551,10 +589,12 @@ def admin_list_complaints(
         # title/description assumed string columns (present in your model)
         q_base = q_base.filter((Complaint.title.ilike(like)) | (Complaint.description.ilike(like)))
 
-    q_base = q_base.order_by(Complaint.created_at.desc())
-
-    total = q_base.count()
-    rows = q_base.limit(limit).offset(offset).all()
+    page = keyset_paginate(
+        q_base, created_col=Complaint.created_at, id_col=Complaint.id, scope="admin.complaints",
+        limit=limit, cursor=cursor, offset=offset, total=total,
+        key=lambda r: (r[0].created_at, r[0].id),
+    )
+    rows = page.items
 
     items: list[AdminComplaintRow] = []
     for c, raised_by_email, job_number in rows:
@@ -569,7 +609,7 @@ def admin_list_complaints(
             )
         )
 
-    return AdminComplaintListOut(total=total, items=items)
+    return AdminComplaintListOut(total=page.total, items=items, next_cursor=page.next_cursor, total_estimated=page.total_estimated)
 
 
 @router.post("/complaints/{complaint_id}/resolve", response_model=Message)
@@ -643,7 +683,9 @@ def admin_announcement(
 def admin_announcements(
     only_active: Optional[bool] = Query(None, description="Filter by active status"),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    total: Optional[TotalMode] = Query(None, description="exact | estimate | none"),
     db: Session = Depends(get_db),
     admin: User = Depends(require_admin),
 ):
@@ -656,12 +698,15 @@ def admin_announcements(
     q = (
         db.query(Announcement, CreatedBy.email.label("created_by_email"))
         .join(CreatedBy, CreatedBy.id == Announcement.created_by_admin_id)
-        .order_by(Announcement.created_at.desc())
     )
     if only_active is not None:
         q = q.filter(Announcement.is_active == only_active)
-    total = q.count()
-    rows = q.limit(limit).offset(offset).all()
+    page = keyset_paginate(
+        q, created_col=Announcement.created_at, id_col=Announcement.id, scope="admin.announcements",
+        limit=limit, cursor=cursor, offset=offset, total=total,
+        key=lambda r: (r[0].created_at, r[0].id),
+    )
+    rows = page.items
     items: list[AdminAnnouncementRow] = []
     for ann, email in rows:
         items.append(
@@ -674,7 +719,7 @@ def admin_announcements(
                 is_active=bool(ann.is_active),
             )
         )
-    return AdminAnnouncementListOut(total=total, items=items)
+    return AdminAnnouncementListOut(total=page.total, items=items, next_cursor=page.next_cursor, total_estimated=page.total_estimated)
 
 # Update or deactivate an existing announcement
 @router.patch("/announcements/{announcement_id}", response_model=Message)
@@ -714,26 +759,14 @@ def admin_update_announcement(
 
 @router.get("/reports/analytics", response_model=dict)
 def admin_analytics(
-    db: Session = Depends(get_db),
     admin: User = Depends(require_admin),
+    refresh: bool = Query(False, description="Recompute now instead of serving the cached snapshot"),
 ):
-    # Users
-    total_users = db.query(func.count(User.id)).scalar() or 0
-    artisans = db.query(func.count(User.id)).filter(User.role == "artisan").scalar() or 0
-    customers = db.query(func.count(User.id)).filter(User.role == "customer").scalar() or 0
-
-    # Jobs
-    jobs_total = db.query(func.count(Job.id)).scalar() or 0
-    jobs_by_status = dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
-
-    # Payments (sum) — harmless even if payments table is empty
-    try:
-        payments_total = db.query(func.coalesce(func.sum(Payment.amount), 0)).scalar() or 0
-    except Exception:
-        payments_total = 0
-
+    snap = admin_stats_service.get_snapshot(force=refresh)
+    st = snap.stats
     return {
-        "users": {"total": total_users, "artisans": artisans, "customers": customers},
-        "jobs": {"total": jobs_total, "by_status": jobs_by_status},
-        "payments": {"total_amount": float(payments_total)},
+        "users": {"total": st["users_total"], "artisans": st["artisans_total"], "customers": st["customers_total"]},
+        "jobs": {"total": st["jobs_total"], "by_status": {k.value: v for k, v in st["jobs_by_status"].items() if v}},
+        "payments": {"total_amount": float(st["payments_total_amount"])},
+        "computed_at": snap.computed_at,
     }
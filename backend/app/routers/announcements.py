@@ -9,42 +9,62 @@ users.
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
 
 from typing import Optional
 
 from app.db.database import get_db
 from app.models.announcement import Announcement
+from app.pagination import TotalMode, keyset_paginate
 from app.schemas.announcement_schemas import AnnouncementOut, AnnouncementListOut
+from app.services import read_cache
 
 router = APIRouter(prefix="/announcements", tags=["Announcements"])
 
 
 @router.get("", response_model=AnnouncementListOut)
 def list_announcements(
+    request: Request,
     db: Session = Depends(get_db),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
     only_active: bool = Query(True, description="Return only active announcements"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    total: Optional[TotalMode] = Query(None, description="exact | estimate | none"),
 ):
     """
     Return a paginated list of announcements. By default only active
-    announcements are returned. Clients can adjust the limit and offset
-    for pagination. Announcements are ordered from newest to oldest.
+    announcements are returned. Pass the returned `next_cursor` back as
+    `cursor` to fetch the next page (`offset` is kept for older clients).
+    Announcements are ordered from newest to oldest.
+
+    Responses are cached in-process until an announcement changes and carry
+    an ETag; send it back in `If-None-Match` to get a 304.
     """
-    q = db.query(Announcement).order_by(Announcement.created_at.desc())
-    if only_active:
-        q = q.filter(Announcement.is_active == True)  # noqa: E712
-    total = q.count()
-    rows = q.offset(offset).limit(limit).all()
-    items = [
-        AnnouncementOut(
-            id=str(a.id),
-            title=a.title,
-            message=a.message,
-            created_at=a.created_at,
+    def load():
+        q = db.query(Announcement)
+        if only_active:
+            q = q.filter(Announcement.is_active == True)  # noqa: E712
+        page = keyset_paginate(
+            q, created_col=Announcement.created_at, id_col=Announcement.id, scope="announcements.list",
+            limit=limit, cursor=cursor, offset=offset, total=total,
+        )
+        items = [
+            AnnouncementOut(
+                id=str(a.id),
+                title=a.title,
+                message=a.message,
+                created_at=a.created_at,
+            )
+            for a in page.items
+        ]
+        return AnnouncementListOut(
+            total=page.total,
+            items=items,
+            next_cursor=page.next_cursor,
+            total_estimated=page.total_estimated,
         )
-        for a in rows
-    ]
-    return AnnouncementListOut(total=total, items=items)
\ No newline at end of file
+
+    key = (limit, offset, only_active, cursor, total)
+    return read_cache.respond(request, read_cache.ANNOUNCEMENTS, key, load)
@@ -5,16 +5,21 @@ from __future__ import annotations
 import uuid
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
 from sqlalchemy import or_, and_
 from sqlalchemy.orm import Session, joinedload
 
+from app.config import ARTISAN_MAX_SERVICE_RADIUS_KM
 from app.db.database import get_db
+from app.http_cache import PUBLIC_REVALIDATE, check, row_validators
 from app.auth_utils import get_current_user, require_artisan_approved, require_verified_contact
 from app.utils import decrypt_str
+from app.security.pii import decrypt_many
 from app.models import User, ArtisanProfile, ServiceCategory
 from app.models.enums import VerificationStatus, UserRole
+from app.services import read_cache
+from app.services.rating_service import rating_summary
 from app.schemas.artisan_schemas import (
     ArtisanMeOut, ArtisanUpdateIn, BankDetailsIn, ArtisanListOut
 )
@@ -26,8 +31,9 @@ def _ensure_artisan(current: User):
     if current.role != UserRole.artisan:
         raise HTTPException(status_code=403, detail="Only artisans can access this endpoint")
 
-def _profile_required(db: Session, user_id: uuid.UUID) -> ArtisanProfile:
-    prof = db.query(ArtisanProfile).filter(ArtisanProfile.user_id == user_id).first()
+def _profile_required(user: User) -> ArtisanProfile:
+    # relationship access: free when the auth principal already loaded it
+    prof = user.artisan_profile
     if not prof:
         raise HTTPException(status_code=404, detail="Artisan profile not found")
     return prof
@@ -60,13 +66,20 @@ def _to_me_out(u: User, p: ArtisanProfile) -> ArtisanMeOut:
         base_price_naira=_kobo_to_naira(getattr(p, "base_price_kobo", None)),  # <-- fixed
         verification_status=str(p.verification_status),
         rejection_reason=p.rejection_reason,
+        rating=rating_summary(p),
     )
 
 # ---------- artisan self ----------
 @router.get("/me", response_model=ArtisanMeOut)
-def artisan_me(db: Session = Depends(get_db), current: User = Depends(require_verified_contact)):
+def artisan_me(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current: User = Depends(require_verified_contact),
+):
     _ensure_artisan(current)
-    prof = _profile_required(db, current.id)
+    prof = _profile_required(current)
+    check(request, response, row_validators(current, prof))
     return _to_me_out(current, prof)
 
 @router.patch("/me", response_model=ArtisanMeOut)
@@ -76,7 +89,7 @@ def update_artisan(
     current: User = Depends(require_verified_contact),
 ):
     _ensure_artisan(current)
-    prof = _profile_required(db, current.id)
+    prof = _profile_required(current)
 
     if payload.service_category is not None:
         prof.service_category = payload.service_category
@@ -105,7 +118,7 @@ def set_bank_details_alias(
     current: User = Depends(require_verified_contact),
 ):
     _ensure_artisan(current)
-    prof = _profile_required(db, current.id)
+    prof = _profile_required(current)
     prof.bank_name = payload.bank_name
     prof.account_number = payload.account_number
     prof.account_name = payload.account_name
@@ -119,9 +132,9 @@ class AvailabilityIn(BaseModel):
     days: List[str] = Field(..., description="e.g. ['mon','tue','wed']")
     start_time: str = Field(..., description="HH:MM 24h")
     end_time: str = Field(..., description="HH:MM 24h")
-    radius_km: Optional[float] = Field(default=10.0)
-    latitude: Optional[float] = None
-    longitude: Optional[float] = None
+    radius_km: Optional[float] = Field(default=10.0, gt=0, le=ARTISAN_MAX_SERVICE_RADIUS_KM)
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
 
 @router.put("/set-availability")
 def set_availability(
@@ -130,7 +143,7 @@ def set_availability(
     current: User = Depends(require_artisan_approved),
 ):
     _ensure_artisan(current)
-    prof = _profile_required(db, current.id)
+    prof = _profile_required(current)
 
     if hasattr(ArtisanProfile, "availability_days"):
         prof.availability_days = payload.days
@@ -138,12 +151,12 @@ def set_availability(
         prof.availability_start = payload.start_time
     if hasattr(ArtisanProfile, "availability_end"):
         prof.availability_end = payload.end_time
-    if hasattr(ArtisanProfile, "service_radius_km"):
-        prof.service_radius_km = payload.radius_km
-    if hasattr(ArtisanProfile, "latitude"):
-        prof.latitude = payload.latitude
-    if hasattr(ArtisanProfile, "longitude"):
-        prof.longitude = payload.longitude
+    # service area for /search/artisans/nearby; without a point the artisan is not listed there
+    if (payload.latitude is None) != (payload.longitude is None):
+        raise HTTPException(status_code=400, detail="latitude and longitude must be given together")
+    prof.latitude = payload.latitude
+    prof.longitude = payload.longitude
+    prof.service_radius_km = payload.radius_km
 
     db.add(prof)
     db.commit()
@@ -160,6 +173,7 @@ def list_artisans(
     max_price: Optional[float] = Query(None, ge=0, description="Max price (naira)"),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    include_phone: bool = Query(True, description="false skips decrypting phone numbers (returned as null)"),
 ):
     query = db.query(User).options(joinedload(User.artisan_profile)).filter(User.role == UserRole.artisan)
 
@@ -187,39 +201,51 @@ def list_artisans(
 
     rows = query.order_by(User.created_at.desc()).limit(limit).offset(offset).all()
 
+    phones = decrypt_many((u.phone_number for u in rows), skip=not include_phone)
     out: List[ArtisanListOut] = []
-    for u in rows:
+    for u, phone in zip(rows, phones):
         p = u.artisan_profile
         out.append(ArtisanListOut(
             user_id=str(u.id),
             full_name=u.full_name,
             email=u.email,
-            phone_number=decrypt_str(u.phone_number),
+            phone_number=phone,
             service_category=p.service_category if p else None,
             service_location=p.service_location if p else None,
             base_price_naira=_kobo_to_naira(getattr(p, "base_price_kobo", None)) if p else None,
             verification_status=str(p.verification_status) if p else str(VerificationStatus.pending),
+            rating=rating_summary(p),
         ))
     return out
 
 @router.get("/categories", response_model=list[str])
-def list_categories(db: Session = Depends(get_db)):
-    rows = (
-        db.query(ServiceCategory)
-        .filter(ServiceCategory.is_active == True)  # noqa
-        .order_by(ServiceCategory.name.asc())
-        .all()
-    )
-    return [r.name for r in rows]
+def list_categories(request: Request, db: Session = Depends(get_db)):
+    # served from the in-process cache (ETag / 304); the query runs only after a category change
+    def load():
+        rows = (
+            db.query(ServiceCategory.name)
+            .filter(ServiceCategory.is_active == True)  # noqa
+            .order_by(ServiceCategory.name.asc())
+            .all()
+        )
+        return [r.name for r in rows]
+
+    return read_cache.respond(request, read_cache.CATEGORIES, (), load)
 
 @router.get("/{artisan_user_id}", response_model=ArtisanMeOut)
-def get_artisan_public(artisan_user_id: str, db: Session = Depends(get_db)):
+def get_artisan_public(artisan_user_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
     try:
         uid = uuid.UUID(artisan_user_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid user id")
-    u = db.query(User).filter(User.id == uid, User.role == UserRole.artisan).first()
+    u = (
+        db.query(User)
+        .options(joinedload(User.artisan_profile))
+        .filter(User.id == uid, User.role == UserRole.artisan)
+        .first()
+    )
     if not u:
         raise HTTPException(status_code=404, detail="Artisan not found")
-    p = _profile_required(db, u.id)
+    p = _profile_required(u)
+    check(request, response, row_validators(u, p, cache_control=PUBLIC_REVALIDATE))
     return _to_me_out(u, p)
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
-from app.config import IS_PRODUCTION
+from app.config import (
+    IS_PRODUCTION,
+    FORGOT_PASSWORD_MAX_ATTEMPTS,
+    FORGOT_PASSWORD_WINDOW_SECONDS,
+    VERIFY_PHONE_MAX_ATTEMPTS,
+    VERIFY_PHONE_WINDOW_SECONDS,
+)
 
 import hashlib
 import secrets
@@ -9,6 +15,7 @@ from typing import Optional
 from pydantic import BaseModel, EmailStr
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
@@ -22,16 +29,17 @@ from app.schemas.auth_schemas import (
 from app.schemas.user_schemas import SignupCustomerIn, SignupArtisanIn
 from app.services.auth_service import (
     _now,
-    authenticate_user,
+    authenticate_user_async,
     issue_token_pair,
     rotate_refresh_token,
     revoke_refresh_token,
     create_customer,
     create_artisan,
 )
-from app.security.rate_limit import login_rate_limit_and_form, clear_login_bucket
-from app.services.email_service import send_email
-from app.utils import get_password_hash, validate_strong_password, encrypt_str
+from app.security.rate_limit import login_rate_limit_and_form, clear_login_bucket, limit_by_ip, limit_by_user
+from app.security.pii import phone_bidx
+from app.services.outbound_queue import enqueue_email
+from app.utils import get_password_hash, validate_strong_password
 from app.auth_utils import get_current_user, get_current_user_with_session
 from app.models import User
 from app.services.verification_service import issue_phone_verification, confirm_phone_verification
@@ -55,9 +63,9 @@ def signup_customer(payload: SignupCustomerIn, db: Session = Depends(get_db)):
             db,
             full_name=full_name,
             email=email,
-            phone=encrypt_str(phone) if phone else None,
+            phone=phone,
             password=payload.password,
-            nin=encrypt_str(nin) if nin else None,
+            nin=nin,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -76,9 +84,9 @@ def signup_artisan(payload: SignupArtisanIn, db: Session = Depends(get_db)):
             db,
             full_name=full_name,
             email=email,
-            phone=encrypt_str(phone) if phone else None,
+            phone=phone,
             password=payload.password,
-            nin=encrypt_str(nin) if nin else None,
+            nin=nin,
             category=payload.service_category,       # schemas cleaned
             description=payload.service_description, # schemas cleaned
             years=payload.years_of_experience,
@@ -95,10 +103,10 @@ async def login(
 ):
     """
     OAuth2PasswordRequestForm expects `username` (treated as email) and `password`.
-    Rate-limited to 5 attempts / 15 minutes per IP+username.
+    Rate-limited per IP+username (LOGIN_MAX_ATTEMPTS per LOGIN_WINDOW_SECONDS).
     The body is parsed ONCE inside the dependency to avoid 'Stream consumed'.
     """
-    user = authenticate_user(db, form.username, form.password)
+    user = await authenticate_user_async(db, form.username, form.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect email or password")
 
@@ -108,7 +116,7 @@ async def login(
     ip = request.client.host if request and request.client else None
     ua = request.headers.get("User-Agent") if request else None
 
-    access, refresh = issue_token_pair(db, user, ip=ip, ua=ua)
+    access, refresh = await run_in_threadpool(issue_token_pair, db, user, ip=ip, ua=ua)
     return {"access_token": access, "refresh_token": refresh, "token_type": "bearer"}
 
 @router.post("/refresh", response_model=TokenPair)
@@ -131,9 +139,16 @@ def logout(
     revoke_session(db, sess.id)
     return {"message": "Logged out"}
 
-@router.post("/verify-phone", response_model=VerifyPhoneOut)
+@router.post(
+    "/verify-phone",
+    response_model=VerifyPhoneOut,
+    dependencies=[Depends(limit_by_user(
+        "verify-phone", VERIFY_PHONE_MAX_ATTEMPTS, VERIFY_PHONE_WINDOW_SECONDS,
+        "Too many verification codes requested. Try again later.",
+    ))],
+)
 def send_phone_verification(payload: VerifyPhoneIn, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    if current.phone_verified and current.phone_number == payload.phone_number:
+    if current.phone_verified and current.phone_bidx and current.phone_bidx == phone_bidx(payload.phone_number):
         return {"message": "Phone already verified", "otp_for_testing": ""}
     try:
         otp = issue_phone_verification(db, current, payload.phone_number)
@@ -166,7 +181,14 @@ class ResetPasswordIn(BaseModel):
     otp: str
     new_password: str
 
-@router.post("/forgot-password", response_model=Message)
+@router.post(
+    "/forgot-password",
+    response_model=Message,
+    dependencies=[Depends(limit_by_ip(
+        "forgot-password", FORGOT_PASSWORD_MAX_ATTEMPTS, FORGOT_PASSWORD_WINDOW_SECONDS,
+        "Too many password reset requests. Try again later.",
+    ))],
+)
 def forgot_password(payload: ForgotPasswordIn, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == payload.email).first()
     if not user or not user.is_active or getattr(user, "is_blocked", False):
@@ -209,10 +231,7 @@ def forgot_password(payload: ForgotPasswordIn, db: Session = Depends(get_db)):
       <p style="color:#667085; font-size:12px;">— Fixion Security</p>
     </div>
     """
-    try:
-        send_email(to_email=payload.email, subject=subject, html=html)
-    except Exception as e:
-        print("[email] Failed to send reset email:", e)
+    enqueue_email(db, payload.email, subject, html, kind="password_reset")
 
     return {"message": "If that email exists, a reset code has been sent."}
 
@@ -9,14 +9,24 @@ routers.
 """
 
 from __future__ import annotations
+import asyncio
+import json
 import os
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
-from app.auth_utils import get_current_user, require_verified_contact, require_artisan_approved, _is_status_approved
-from app.security.rbac import require_job_access  # centralized guard
+from app.config import JOB_EVENTS_RETRY_MS, JOB_EVENTS_WS_AUTH_SECONDS
+from app.db.database import get_db, SessionLocal
+from app.auth_utils import (
+    Principal, get_principal, get_current_user, require_verified_contact, require_artisan_approved, _is_status_approved,
+    resolve_principal,
+)
+from app.security.rbac import require_job_access, check_job_access  # centralized guard
 from app.models import User, Job, JobStatusHistory, JobNote, JobPhoto, Review
 from app.models.enums import JobStatus, UserRole
 from app.schemas.job_schemas import (
@@ -25,6 +35,9 @@ from app.schemas.job_schemas import (
     JobNoteIn, JobNoteOut, ReviewIn, Message
 )
 from app.models.artisan import ArtisanProfile
+from app.pagination import TotalMode, keyset_paginate
+from app.http_cache import check, row_validators
+from app.services import job_events, upload_service
 
 # extra safety for notes
 from app.security.sanitize import clean_free_text
@@ -55,6 +68,8 @@ def to_out(j: Job) -> JobOut:
 
 def add_status_history(db: Session, job: Job, old, new, by: User):
     db.add(JobStatusHistory(job_id=job.id, old_status=old, new_status=new, changed_by_id=by.id))
+    if old is not None:  # nobody can be subscribed to a job that is being created
+        job_events.publish(db, job.id, old, new, by.id)
 
 ALLOWED_TRANSITIONS = {
     JobStatus.pending:     {JobStatus.accepted, JobStatus.cancelled},
@@ -105,22 +120,29 @@ def book_job(payload: BookJobIn, db: Session = Depends(get_db), current: User =
 
 @router.get("/my-bookings", response_model=JobListOut)
 def my_bookings(db: Session = Depends(get_db), current: User = Depends(get_current_user),
-                limit: int = Query(50, ge=1, le=200), offset: int = Query(0, ge=0)):
+                limit: int = Query(50, ge=1, le=200), offset: int = Query(0, ge=0, deprecated=True),
+                cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+                total: Optional[TotalMode] = Query(None, description="exact | estimate | none")):
     require_role(current, UserRole.customer)
-    q = db.query(Job).filter(Job.customer_id == current.id).order_by(Job.created_at.desc())
-    total = q.count()
-    rows = q.limit(limit).offset(offset).all()
-    return JobListOut(jobs=[to_out(j) for j in rows], total=total)
+    q = db.query(Job).filter(Job.customer_id == current.id)
+    page = keyset_paginate(q, created_col=Job.created_at, id_col=Job.id, scope="jobs.my_bookings",
+                           limit=limit, cursor=cursor, offset=offset, total=total)
+    return JobListOut(jobs=[to_out(j) for j in page.items], total=page.total,
+                      next_cursor=page.next_cursor, total_estimated=page.total_estimated)
 
 # artisan: requests & respond
 @router.get("/requests", response_model=JobListOut)
 def artisan_requests(db: Session = Depends(get_db), current: User = Depends(require_artisan_approved),
-                     limit: int = Query(50, ge=1, le=200), offset: int = Query(0, ge=0)):
+                     limit: int = Query(50, ge=1, le=200), offset: int = Query(0, ge=0, deprecated=True),
+                     cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+                     total: Optional[TotalMode] = Query(None, description="exact | estimate | none")):
     require_role(current, UserRole.artisan)
-    q = db.query(Job).filter(Job.artisan_id == current.id, Job.status == JobStatus.pending).order_by(Job.created_at.asc())
-    total = q.count()
-    rows = q.limit(limit).offset(offset).all()
-    return JobListOut(jobs=[to_out(j) for j in rows], total=total)
+    q = db.query(Job).filter(Job.artisan_id == current.id, Job.status == JobStatus.pending)
+    # oldest request first
+    page = keyset_paginate(q, created_col=Job.created_at, id_col=Job.id, scope="jobs.artisan_requests",
+                           limit=limit, cursor=cursor, offset=offset, total=total, ascending=True)
+    return JobListOut(jobs=[to_out(j) for j in page.items], total=page.total,
+                      next_cursor=page.next_cursor, total_estimated=page.total_estimated)
 
 @router.post("/respond", response_model=JobOut)
 def respond(payload: JobRespondIn, db: Session = Depends(get_db), current: User = Depends(require_artisan_approved)):
@@ -154,16 +176,102 @@ def respond(payload: JobRespondIn, db: Session = Depends(get_db), current: User
     404: {"description": "Job not found"},
 })
 def job_status(
+    request: Request,
+    response: Response,
     job: Job = Depends(require_job_access),
-    current: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_principal),
 ):
-    if current.role == UserRole.artisan:
-        ap = db.query(ArtisanProfile).filter(ArtisanProfile.user_id == current.id).first()
-        if not ap or not _is_status_approved(ap.verification_status):
-            raise HTTPException(status_code=403, detail="Your artisan account is pending admin approval")
+    if principal.is_artisan and not principal.artisan_approved:
+        raise HTTPException(status_code=403, detail="Your artisan account is pending admin approval")
+    check(request, response, row_validators(job))
     return to_out(job)
 
+# status push (instead of polling /status/{job_id})
+def _status_snapshot(job_id: uuid.UUID) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        status = db.execute(select(Job.status).where(Job.id == job_id)).scalar_one_or_none()
+    finally:
+        db.close()
+    if status is None:
+        return None
+    return {"type": "status", "job_id": str(job_id), "new_status": status.value}
+
+def _job_stream(job_id: uuid.UUID):
+    return job_events.stream(job_id, lambda: run_in_threadpool(_status_snapshot, job_id))
+
+@router.get("/status/{job_id}/events", response_class=StreamingResponse, responses={
+    200: {"content": {"text/event-stream": {}}, "description": "Server-sent events: status, resync"},
+    503: {"description": "Too many open streams on this worker – poll /status/{job_id}"},
+})
+def job_status_events(
+    job: Job = Depends(require_job_access),
+    principal: Principal = Depends(get_principal),
+):
+    """
+    Current status, then every transition, as server-sent events. "resync"
+    means events may have been missed: re-read /jobs/status/{job_id}. The
+    stream ends after completed/cancelled.
+    """
+    if principal.is_artisan and not principal.artisan_approved:
+        raise HTTPException(status_code=403, detail="Your artisan account is pending admin approval")
+    job_events.hub.check_capacity()
+
+    async def sse():
+        yield f"retry: {JOB_EVENTS_RETRY_MS}\n\n"
+        async for event in _job_stream(job.id):
+            if event is None:
+                yield ": ping\n\n"
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        sse(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/status/{job_id}/ws")
+async def job_status_ws(websocket: WebSocket, job_id: str):
+    """
+    Same events as /status/{job_id}/events as JSON messages. Browsers cannot
+    set headers on a WebSocket, so the first message must be
+    {"access_token": "<jwt>"} (keeps tokens out of URLs and access logs).
+    """
+    await websocket.accept()
+    try:
+        hello = await asyncio.wait_for(websocket.receive_json(), JOB_EVENTS_WS_AUTH_SECONDS)
+        jid = uuid.UUID(job_id)
+        await run_in_threadpool(_authorize_job_ws, str(hello.get("access_token") or ""), jid)
+        job_events.hub.check_capacity()
+    except HTTPException as exc:
+        await websocket.close(code=4000 + exc.status_code, reason=str(exc.detail)[:120])
+        return
+    except (asyncio.TimeoutError, ValueError, AttributeError):
+        await websocket.close(code=4400, reason="Send {\"access_token\": ...} first")
+        return
+    except WebSocketDisconnect:
+        return
+
+    try:
+        async for event in _job_stream(jid):
+            await websocket.send_json(event if event is not None else {"type": "ping"})
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError, OSError):
+        pass  # client went away; the stream's finally has unsubscribed
+
+def _authorize_job_ws(token: str, job_id: uuid.UUID) -> None:
+    db = SessionLocal()
+    try:
+        principal = resolve_principal(token, db)
+        job = db.get(Job, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        check_job_access(principal, job)
+        if principal.is_artisan and not principal.artisan_approved:
+            raise HTTPException(status_code=403, detail="Your artisan account is pending admin approval")
+    finally:
+        db.close()
+
 @router.patch("/update-status/{job_id}", response_model=JobOut)
 def update_status(
     payload: JobStatusUpdateIn,
@@ -179,9 +287,7 @@ def update_status(
     if new_status in {JobStatus.on_the_way, JobStatus.working, JobStatus.completed}:
         if current.role != UserRole.artisan or job.artisan_id != current.id:
             raise HTTPException(status_code=403, detail="Only the assigned artisan can update this status")
-        ap = db.query(ArtisanProfile).filter(ArtisanProfile.user_id == current.id).first()
-        if not ap or not _is_status_approved(ap.verification_status):
-            raise HTTPException(status_code=403, detail="Your artisan account is pending admin approval")
+        # approval already enforced by require_artisan_approved
 
     elif new_status == JobStatus.cancelled:
         if job.status == JobStatus.completed:
@@ -240,15 +346,12 @@ async def upload_completion_photo(
     if current.role != UserRole.artisan or job.artisan_id != current.id:
         raise HTTPException(status_code=403, detail="Only the assigned artisan can upload completion photos")
 
-    job_dir = os.path.join(UPLOAD_DIR, str(job.id))
-    os.makedirs(job_dir, exist_ok=True)
-    filename = f"{uuid.uuid4()}_{file.filename}"
-    dest = os.path.join(job_dir, filename)
-
-    with open(dest, "wb") as out:
-        out.write(await file.read())
+    # streamed with a size cap; stored as <sha256><ext>, the client filename is never used
+    stored = await upload_service.store_upload(file, os.path.join(UPLOAD_DIR, str(job.id)), upload_service.PHOTOS)
+    if stored.duplicate and db.query(JobPhoto.id).filter(JobPhoto.job_id == job.id, JobPhoto.path == stored.path).first():
+        return {"message": "Photo already uploaded"}
 
-    db.add(JobPhoto(job_id=job.id, path=dest))
+    db.add(JobPhoto(job_id=job.id, path=stored.path))
     db.commit()
     return {"message": "Photo uploaded"}
 
@@ -20,18 +20,17 @@ import uuid
 from typing import Optional
 
 from decimal import Decimal
-import httpx
-from httpx import AsyncClient, AsyncHTTPTransport
 from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, case
+from sqlalchemy import func, select
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db
 from app.auth_utils import get_current_user, require_verified_contact, require_artisan_approved
 from app.security.rbac import require_payment_access_by_path, require_payment_access_by_query
+from app.security.rate_limit import limit_by_user
 from app.models import User, Job
-from app.models.payments import Payment, WalletLedger, IdempotencyKey
-from app.models.payouts import Payout
+from app.models.payments import Payment, WalletLedger
 from app.models.enums import PaymentMethod, PaymentStatus, LedgerEntryType
 from app.schemas.payment_schemas import (
     CheckoutIn,
@@ -39,13 +38,20 @@ from app.schemas.payment_schemas import (
     PaymentHistoryOut,
     PaymentHistoryItem,
 )
-from app.services.payments_service import checkout
+from app.services.payments_service import checkout, wallet_balance
+from app.services import paystack_client, webhook_inbox
+from app.services.paystack_events import (
+    credit_artisan_if_needed as _credit_artisan_if_needed,
+    get_platform_user as _get_platform_user,
+)
+from app.pagination import TotalMode, keyset_paginate
+from app.http_cache import IMMUTABLE, PRIVATE_REVALIDATE, conditional, row_validators
 from app.config import (
     PAYSTACK_SECRET,
     FEE_CUSTOMER_NGN,
-    FEE_PAYOUT_NGN,
     FEE_WALLET_NGN,
-    PLATFORM_FEE_USER_EMAIL,
+    CHECKOUT_MAX_ATTEMPTS,
+    CHECKOUT_WINDOW_SECONDS,
 )
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
@@ -65,122 +71,13 @@ def _to_out(p: Payment) -> PaymentOut:
     )
 
 
-def _get_platform_user(db: Session) -> User:
-    """Find the platform user who receives Fixion fees."""
-    u = db.query(User).filter(User.email == PLATFORM_FEE_USER_EMAIL).first()
-    if not u:
-        # last-resort: any admin; if none, raise
-        u = db.query(User).filter(func.lower(func.cast(User.role, str)).like("%admin%")).first()
-    if not u:
-        raise HTTPException(status_code=500, detail="Platform fee user not found; set PLATFORM_FEE_USER_EMAIL.")
-    return u
-
-
-def _wallet_sum(db: Session, user_id) -> Decimal:
-    """SUM with signs implied by entry_type (amounts are stored positive)."""
-    credit_types = [LedgerEntryType.deposit, LedgerEntryType.payout, LedgerEntryType.refund, LedgerEntryType.adjust]
-    debit_types  = [LedgerEntryType.charge, LedgerEntryType.withdrawal]
-
-    raw = db.query(
-        func.coalesce(
-            func.sum(
-                case(
-                    (WalletLedger.entry_type.in_(credit_types), WalletLedger.amount),
-                    (WalletLedger.entry_type.in_(debit_types), -WalletLedger.amount),
-                    else_=0,
-                )
-            ),
-            0,
-        )
-    ).filter(WalletLedger.user_id == user_id).scalar()
-    return Decimal(str(raw))
-
-def _credit_artisan_if_needed(db: Session, pmt: Payment, event: str = "manual_verify"):
-    """
-    Idempotently mark captured and credit artisan via WalletLedger if not already done.
-    Terminal state lock: if payment is captured/failed/refunded, do not change state.
-    """
-    TERMINAL = {PaymentStatus.captured, PaymentStatus.failed, PaymentStatus.refunded}
-    changed = False
-
-    # Terminal lock: do not move away from any terminal state
-    if pmt.status in TERMINAL:
-        # still ensure artisan has been credited for this reference (idempotent safety)
-        if pmt.status == PaymentStatus.captured and pmt.artisan_id:
-            exists = (
-                db.query(WalletLedger)
-                .filter(
-                    and_(
-                        WalletLedger.reference == pmt.reference,
-                        WalletLedger.entry_type == LedgerEntryType.payout,
-                        WalletLedger.user_id == pmt.artisan_id,
-                    )
-                )
-                .first()
-            )
-            if not exists:
-                db.add(
-                    WalletLedger(
-                        user_id=pmt.artisan_id,
-                        currency=pmt.currency,
-                        entry_type=LedgerEntryType.payout,
-                        amount=Decimal(str(pmt.amount)),
-                        reference=pmt.reference,
-                        meta={
-                            "source": "paystack",
-                            "provider_event": event,
-                            "payment_id": str(pmt.id),
-                            "job_id": str(pmt.job_id) if pmt.job_id else None,
-                        },
-                    )
-                )
-                changed = True
-        if changed:
-            db.commit()
-        return  # nothing else to do
-
-    # Non-terminal -> allow transition to captured
-    pmt.status = PaymentStatus.captured
-    db.add(pmt)
-    changed = True
-
-    # Credit artisan if not already credited for this payment reference
-    if pmt.artisan_id:
-        exists = (
-            db.query(WalletLedger)
-            .filter(
-                and_(
-                    WalletLedger.reference == pmt.reference,
-                    WalletLedger.entry_type == LedgerEntryType.payout,
-                    WalletLedger.user_id == pmt.artisan_id,
-                )
-            )
-            .first()
-        )
-        if not exists:
-            db.add(
-                WalletLedger(
-                    user_id=pmt.artisan_id,
-                    currency=pmt.currency,
-                    entry_type=LedgerEntryType.payout,
-                    amount=Decimal(str(pmt.amount)),  # full amount
-                    reference=pmt.reference,
-                    meta={
-                        "source": "paystack",
-                        "provider_event": event,
-                        "payment_id": str(pmt.id),
-                        "job_id": str(pmt.job_id) if pmt.job_id else None,
-                    },
-                )
-            )
-            changed = True
-
-    if changed:
-        db.commit()
-
-
 # ---------- customer-initiated checkout ----------
-@router.post("/checkout", response_model=PaymentOut, status_code=201)
+@router.post(
+    "/checkout",
+    response_model=PaymentOut,
+    status_code=201,
+    dependencies=[Depends(limit_by_user("checkout", CHECKOUT_MAX_ATTEMPTS, CHECKOUT_WINDOW_SECONDS))],
+)
 def payments_checkout(
     payload: CheckoutIn,
     db: Session = Depends(get_db),
@@ -281,7 +178,7 @@ def payments_checkout(
             db.refresh(p)
             return _to_out(p)
 
-        have = _wallet_sum(db, current.id)
+        have = wallet_balance(db, current.id, p.currency, for_update=True)
         if have < remaining_customer_charge:
             try:
                 p.status = getattr(PaymentStatus, "failed", "failed")
@@ -360,12 +257,18 @@ def payments_checkout(
 
 
 # ---------- receipt ----------
+def _receipt_validators(p: Payment):
+    # terminal states never change again (see paystack_events.credit_artisan_if_needed)
+    final = p.status in (PaymentStatus.captured, PaymentStatus.failed, PaymentStatus.refunded)
+    return row_validators(p, cache_control=IMMUTABLE if final else PRIVATE_REVALIDATE)
+
+
 @router.get("/receipt/{payment_id}", response_model=PaymentOut, responses={
     403: {"description": "Forbidden – not your payment"},
     404: {"description": "Payment not found"},
 })
 def payment_receipt(
-    p: Payment = Depends(require_payment_access_by_path),
+    p: Payment = Depends(conditional(require_payment_access_by_path, _receipt_validators)),
     db: Session = Depends(get_db)    # <— centralized guard
 ):
     return _to_out(p)
@@ -377,15 +280,16 @@ def payment_history(
     db: Session = Depends(get_db),
     current: User = Depends(get_current_user),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    total: Optional[TotalMode] = Query(None, description="exact | estimate | none"),
 ):
-    q = (
-        db.query(Payment)
-        .filter(Payment.customer_id == current.id)
-        .order_by(Payment.created_at.desc())
+    q = db.query(Payment).filter(Payment.customer_id == current.id)
+    page = keyset_paginate(
+        q, created_col=Payment.created_at, id_col=Payment.id, scope="payments.history",
+        limit=limit, cursor=cursor, offset=offset, total=total,
     )
-    total = q.count()
-    rows = q.limit(limit).offset(offset).all()
+    rows = page.items
 
     return PaymentHistoryOut(
         items=[
@@ -400,7 +304,9 @@ def payment_history(
             )
             for p in rows
         ],
-        total=total,
+        total=page.total,
+        next_cursor=page.next_cursor,
+        total_estimated=page.total_estimated,
     )
 
 
@@ -408,14 +314,14 @@ def payment_history(
 @router.post("/paystack/initialize")
 async def paystack_initialize(
     payment_id: str = Query(..., description="UUID of an existing Payment created via /payments/checkout"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current: User = Depends(require_verified_contact),
 ):
     try:
         pid = uuid.UUID(payment_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid payment_id")
-    pmt = db.get(Payment, pid)
+    pmt = await db.get(Payment, pid)
     if not pmt:
         raise HTTPException(status_code=404, detail="Payment not found")
 
@@ -444,17 +350,13 @@ async def paystack_initialize(
             "artisan_id": str(pmt.artisan_id) if pmt.artisan_id else None,
         },
     }
-    headers = {"Authorization": f"Bearer {secret}", "Content-Type": "application/json"}
-
-    transport = AsyncHTTPTransport(retries=2)
-    async with AsyncClient(timeout=20.0, http2=False, transport=transport) as client:
-        rsp = await client.post("https://api.paystack.co/transaction/initialize", json=payload, headers=headers)
-        if rsp.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"Paystack init failed: {rsp.text}")
-        data = rsp.json().get("data") or {}
-        auth_url = data.get("authorization_url")
-        if not auth_url:
-            raise HTTPException(status_code=502, detail="authorization_url missing from Paystack response")
+    rsp = await paystack_client.post("/transaction/initialize", payload, endpoint="transaction.initialize")
+    if rsp.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"Paystack init failed: {rsp.text}")
+    data = rsp.json().get("data") or {}
+    auth_url = data.get("authorization_url")
+    if not auth_url:
+        raise HTTPException(status_code=502, detail="authorization_url missing from Paystack response")
 
     return {
         "reference": pmt.reference,
@@ -467,7 +369,7 @@ async def paystack_initialize(
 @router.get("/paystack/verify/{reference}")
 async def paystack_verify(
     reference: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current: User = Depends(get_current_user),
 ):
     """
@@ -479,7 +381,7 @@ async def paystack_verify(
         raise HTTPException(status_code=500, detail="PAYSTACK_SECRET not configured")
 
     # Locate the payment by reference
-    pmt = db.query(Payment).filter(Payment.reference == reference).first()
+    pmt = (await db.execute(select(Payment).where(Payment.reference == reference))).scalars().first()
     if not pmt:
         raise HTTPException(status_code=404, detail="Payment not found")
 
@@ -488,106 +390,39 @@ async def paystack_verify(
     if not is_admin and current.id not in (pmt.customer_id, pmt.artisan_id):
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    headers = {"Authorization": f"Bearer {secret}"}
-
-    # Force HTTP/1.1 + small retry (Windows TLS quirk mitigation)
-    transport = AsyncHTTPTransport(retries=2)
-    async with AsyncClient(timeout=15.0, http2=False, transport=transport) as client:
-        rsp = await client.get(f"https://api.paystack.co/transaction/verify/{reference}", headers=headers)
-        if rsp.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"Paystack verify failed: {rsp.text}")
-        body = rsp.json()
-        status = (body.get("data") or {}).get("status")
+    rsp = await paystack_client.get(f"/transaction/verify/{reference}", endpoint="transaction.verify")
+    if rsp.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"Paystack verify failed: {rsp.text}")
+    body = rsp.json()
+    status = (body.get("data") or {}).get("status")
 
     if status == "success":
         # Idempotently capture + credit artisan (full amount)
-        _credit_artisan_if_needed(db, pmt, event="verify")
+        await db.run_sync(_credit_artisan_if_needed, pmt, event="verify")
         # Optional: record fee meta for admin reports
         try:
             meta = dict(getattr(pmt, "meta", {}) or {})
             meta["fixion_customer_fee_ngn"] = int(FEE_CUSTOMER_NGN)
             meta["gross_charged_ngn"] = float(pmt.amount) + float(FEE_CUSTOMER_NGN)
             pmt.meta = meta
-            db.add(pmt); db.commit()
+            db.add(pmt); await db.commit()
         except Exception:
-            db.rollback()
+            await db.rollback()
         return {"status": "captured", "reference": reference}
 
     return {"status": status or "unknown", "reference": reference}
 
-# Paystack transfer events (for payouts)
-def handle_paystack_transfer_events(event: str, data: dict, db: Session):
-    """
-    Processes transfer.success / transfer.failed / transfer.reversed.
-    On success we:
-      - DEBIT artisan by FULL payout amount (requested)  [NEGATIVE ledger]
-      - CREDIT Fixion platform by ₦10 (payout fee)       [POSITIVE ledger]
-    """
-    if event not in ("transfer.success", "transfer.failed", "transfer.reversed"):
-        return {"status": "ignored"}
-
-    transfer_code = data.get("transfer_code")
-    reference = data.get("reference")
-
-    q = db.query(Payout)
-    if reference:
-        q = q.filter(Payout.reference == reference)
-    elif transfer_code:
-        q = q.filter(Payout.transfer_code == transfer_code)
-    payout = q.first()
-
-    if not payout:
-        return {"status": "ok", "note": "payout not found"}
-
-    if event == "transfer.success":
-        payout.status = "success"
-
-        exists = db.query(WalletLedger).filter(
-            WalletLedger.user_id == payout.user_id,
-            WalletLedger.entry_type == LedgerEntryType.withdrawal,
-            WalletLedger.reference == payout.reference,
-        ).first()
-        if not exists:
-            db.add(
-                WalletLedger(
-                    user_id=payout.user_id,
-                    entry_type=LedgerEntryType.withdrawal,
-                    amount=Decimal(str(payout.amount)) * Decimal("-1"),
-                    currency=payout.currency,
-                    reference=payout.reference,
-                    meta={"provider": "paystack", "transfer_code": payout.transfer_code, "reason": "bank_payout_debit"},
-                )
-            )
-
-        try:
-            platform_user = _get_platform_user(db)
-            db.add(
-                WalletLedger(
-                    user_id=platform_user.id,
-                    entry_type=LedgerEntryType.payout,
-                    amount=Decimal(str(FEE_PAYOUT_NGN)),
-                    currency=payout.currency,
-                    reference=payout.reference,
-                    meta={"provider": "paystack", "transfer_code": payout.transfer_code, "reason": "platform_fee_payout"},
-                )
-            )
-        except Exception:
-            pass
-
-    else:
-        payout.status = "failed"
-
-    db.add(payout)
-    db.commit()
-    return {"status": "ok"}
-
 # ---------- Paystack webhook (all events) ----------
 @router.post("/webhook")
 async def paystack_webhook(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     x_paystack_signature: str | None = Header(default=None, convert_underscores=False),
 ):
+    """
+    Verify, store in the webhook inbox and ack. The ledger work happens in the
+    webhook workers (app/services/webhook_inbox.py), one transaction per event.
+    """
     raw = await request.body()
     sig = (x_paystack_signature or "").strip()
 
@@ -604,114 +439,9 @@ async def paystack_webhook(
         payload = json.loads(raw.decode("utf-8") if raw else "{}")
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-    event = payload.get("event") or ""
-    data = payload.get("data") or {}
-    reference = data.get("reference")
-    event_id = str(data.get("id") or reference or "")
-
-    # --- transfer events (bank payouts) first, unchanged
-    if event.startswith("transfer."):
-        try:
-            return handle_paystack_transfer_events(event, data, db)
-        except Exception:
-            db.rollback()
-            return {"status": "ok", "note": "transfer handler error"}
-
-   
-    # NEW: wallet top-ups via Paystack (these do NOT create a Payment row)
-    # We detect a top-up by metadata.wallet_topup == True
-    # If charge.success, we credit the user's wallet idempotently.
-   
-    meta = (data.get("metadata") or {}) if isinstance(data, dict) else {}
-    if meta.get("wallet_topup") and (event == "charge.success"):
-        try:
-            user_id = meta.get("user_id")
-            amount = Decimal(str(meta.get("amount") or "0"))
-            topup_ref = reference  # paystack reference
-            if user_id and amount > 0 and topup_ref:
-                already = (
-                    db.query(WalletLedger)
-                    .filter(
-                        WalletLedger.reference == topup_ref,
-                        WalletLedger.entry_type == LedgerEntryType.deposit,
-                    )
-                    .first()
-                )
-                if not already:
-                    db.add(
-                        WalletLedger(
-                            user_id=uuid.UUID(user_id),
-                            currency="NGN",
-                            entry_type=LedgerEntryType.deposit,
-                            amount=amount,
-                            reference=topup_ref,
-                            meta={"reason": "wallet_topup_paystack_webhook"},
-                        )
-                    )
-                    db.commit()
-            return {"status": "ok", "wallet_topup": True}
-        except Exception:
-            db.rollback()
-            return {"status": "ok", "wallet_topup": "error"}
-
-    # If there's no reference, we can't continue
-    if not reference:
-        return {"status": "ok", "note": "no reference"}
-
-    # From here on, it's a normal job payment flow (there IS a Payment row)
-    pmt = (
-        db.query(Payment)
-        .filter(Payment.reference == reference)
-        .with_for_update()
-        .first()
-    )
-    if not pmt:
-        request.state.log_extra = {"unknown_reference": reference}
-        return {"status": "ok", "note": "unknown reference"}
-
-    # Idempotency on Paystack event id for payment events
-    if event_id:
-        seen = (
-            db.query(IdempotencyKey)
-            .filter(
-                IdempotencyKey.user_id == pmt.customer_id,
-                IdempotencyKey.scope == "paystack:webhook",
-                IdempotencyKey.key == event_id,
-            )
-            .first()
-        )
-        if seen:
-            return {"status": "ok", "idempotent": True}
-
-    if event == "charge.success":
-        try:
-            if hasattr(pmt, "signature_verified"):
-                pmt.signature_verified = True
-                db.add(pmt)
-                db.commit()
-
-            _credit_artisan_if_needed(db, pmt, event="webhook")
-
-            meta = dict(getattr(pmt, "meta", {}) or {})
-            meta["fixion_customer_fee_ngn"] = int(FEE_CUSTOMER_NGN)
-            meta["gross_charged_ngn"] = float(pmt.amount) + float(FEE_CUSTOMER_NGN)
-            pmt.meta = meta
-            db.add(pmt)
-            db.commit()
-
-            if event_id:
-                db.add(
-                    IdempotencyKey(
-                        user_id=pmt.customer_id,
-                        scope="paystack:webhook",
-                        key=event_id,
-                    )
-                )
-                db.commit()
-
-        except Exception:
-            db.rollback()
-            return {"status": "ok", "note": "charge.success handler error"}
-
-    return {"status": "ok", "idempotent": False}
+    # a storage failure surfaces as 5xx so Paystack redelivers the event
+    queued = await webhook_inbox.store_event(db, webhook_inbox.PROVIDER_PAYSTACK, payload, raw)
+    return {"status": "ok", "queued": queued, "duplicate": not queued}
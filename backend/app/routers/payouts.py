@@ -4,22 +4,24 @@ from __future__ import annotations
 
 from app.auth_utils import require_artisan_approved
 
-import httpx
-from httpx import AsyncClient, AsyncHTTPTransport
-
 import os
 import uuid
 from decimal import Decimal
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.auth_utils import get_current_user, require_admin
 from app.models import User
 from app.models.payouts import PayoutRecipient, Payout
 from app.config import PAYSTACK_SECRET, FEE_PAYOUT_NGN
+from app.pagination import TotalMode, keyset_paginate
+from app.services import bank_directory, paystack_client
 from app.schemas.payout_schemas import (
     CreateRecipientIn,
     RecipientOut,
@@ -46,21 +48,6 @@ def _is_artisan(user) -> bool:
     return str(r).split(".")[-1].lower() == "artisan"
 
 
-# HTTP helpers to Paystack
-async def _paystack_post(path: str, secret: str, payload: dict):
-    headers = {"Authorization": f"Bearer {secret}", "Content-Type": "application/json"}
-    transport = AsyncHTTPTransport(retries=2)  # retry transient TLS/NET errors
-    # Force HTTP/1.1 (http2=False) to avoid INVALID_SESSION_ID on Windows
-    async with AsyncClient(timeout=20, http2=False, transport=transport) as client:
-        return await client.post(f"https://api.paystack.co{path}", json=payload, headers=headers)
-
-async def _paystack_get(path: str, secret: str):
-    headers = {"Authorization": f"Bearer {secret}"}
-    transport = AsyncHTTPTransport(retries=2)
-    async with AsyncClient(timeout=20, http2=False, transport=transport) as client:
-        return await client.get(f"https://api.paystack.co{path}", headers=headers)
-
-
 def _as_recipient_out(r: PayoutRecipient) -> RecipientOut:
     return RecipientOut(
         id=str(r.id),
@@ -78,7 +65,7 @@ def _as_recipient_out(r: PayoutRecipient) -> RecipientOut:
 @router.post("/recipient", response_model=RecipientOut)
 async def create_or_update_recipient(
     payload: CreateRecipientIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current: User = Depends(require_artisan_approved),
 ):
     if not _is_artisan(current):
@@ -88,6 +75,14 @@ async def create_or_update_recipient(
     if not secret:
         raise HTTPException(status_code=500, detail="PAYSTACK_SECRET not configured")
 
+    # answered from the cached bank directory; if it has never loaded, Paystack validates
+    try:
+        bank = await bank_directory.bank_by_code(payload.bank_code)
+    except HTTPException:
+        bank = {}
+    if bank is None:
+        raise HTTPException(status_code=400, detail="Unknown bank_code")
+
     body = {
         "type": "nuban",
         "name": payload.account_name or current.full_name,
@@ -95,22 +90,24 @@ async def create_or_update_recipient(
         "bank_code": payload.bank_code,
         "currency": "NGN",
     }
-    rsp = await _paystack_post("/transferrecipient", secret, body)
+    rsp = await paystack_client.post("/transferrecipient", body, endpoint="transferrecipient")
     if rsp.status_code not in (200, 201):
         raise HTTPException(status_code=502, detail=f"Paystack transferrecipient failed: {rsp.text}")
 
     data = (rsp.json() or {}).get("data") or {}
     recipient_code = data.get("recipient_code")
-    bank_name = (data.get("details") or {}).get("bank_name") or data.get("name") or "Bank"
+    bank_name = (data.get("details") or {}).get("bank_name") or bank.get("name") or "Bank"
     acct = payload.account_number.strip()
     acct_last4 = acct[-4:] if len(acct) >= 4 else acct
 
     # Upsert locally
     rec = (
-        db.query(PayoutRecipient)
-        .filter(PayoutRecipient.user_id == current.id, PayoutRecipient.provider == "paystack")
-        .first()
-    )
+        await db.execute(
+            select(PayoutRecipient).where(
+                PayoutRecipient.user_id == current.id, PayoutRecipient.provider == "paystack"
+            )
+        )
+    ).scalars().first()
     if rec:
         rec.recipient_code = recipient_code
         rec.bank_code = payload.bank_code
@@ -132,28 +129,30 @@ async def create_or_update_recipient(
         )
         db.add(rec)
 
-    db.commit()
-    db.refresh(rec)
+    await db.commit()
+    await db.refresh(rec)
     return _as_recipient_out(rec)
 
 
-# List NGN/NUBAN banks (pick a valid bank_code)
+# List NGN/NUBAN banks (pick a valid bank_code); served from the cached directory
 @router.get("/banks")
-async def list_banks(current: User = Depends(get_current_user)):
+async def list_banks(request: Request, current: User = Depends(get_current_user)):
     secret = PAYSTACK_SECRET or os.getenv("PAYSTACK_SECRET")
     if not secret:
         raise HTTPException(status_code=500, detail="PAYSTACK_SECRET not configured")
-    rsp = await _paystack_get("/bank?currency=NGN&type=nuban", secret)
-    if rsp.status_code != 200:
-        raise HTTPException(status_code=502, detail=f"Paystack banks failed: {rsp.text}")
-    return rsp.json()
+    directory = await bank_directory.get_directory()
+    headers = {"ETag": directory.etag, "Cache-Control": "private, max-age=3600"}
+    inm = request.headers.get("if-none-match") or ""
+    if directory.etag in {t.strip().removeprefix("W/") for t in inm.split(",")}:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(directory.body, headers=headers)
 
 
 # Request payout (artisan) -- create Payout & initiate Paystack transfer
 @router.post("/request", response_model=PayoutOut)
 async def request_payout(
     payload: PayoutRequestIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current: User = Depends(require_artisan_approved),
 ):
     if not _is_artisan(current):
@@ -161,14 +160,14 @@ async def request_payout(
 
     # Must have an active Paystack recipient
     rec = (
-        db.query(PayoutRecipient)
-        .filter(
-            PayoutRecipient.user_id == current.id,
-            PayoutRecipient.provider == "paystack",
-            PayoutRecipient.active == True,  # noqa: E712
+        await db.execute(
+            select(PayoutRecipient).where(
+                PayoutRecipient.user_id == current.id,
+                PayoutRecipient.provider == "paystack",
+                PayoutRecipient.active == True,  # noqa: E712
+            )
         )
-        .first()
-    )
+    ).scalars().first()
     if not rec:
         raise HTTPException(status_code=400, detail="No active payout recipient for this artisan")
 
@@ -183,15 +182,15 @@ async def request_payout(
         reason=payload.reason or "Artisan payout",
     )
     db.add(p)
-    db.commit()
-    db.refresh(p)
+    await db.commit()
+    await db.refresh(p)
 
     # Apply Fixion payout fee (₦10) to the amount sent to bank
     transfer_amount = float(p.amount) - float(FEE_PAYOUT_NGN)
     if transfer_amount <= 0:
         p.status = "failed"
         db.add(p)
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=400, detail="Payout amount too small after ₦10 fee")
 
     amount_kobo = int(round(transfer_amount * 100))
@@ -208,12 +207,12 @@ async def request_payout(
         "recipient": rec.recipient_code,
         "reference": p.reference,
     }
-    rsp = await _paystack_post("/transfer", secret, body)
+    rsp = await paystack_client.post("/transfer", body, endpoint="transfer")
     if rsp.status_code not in (200, 201):
         # Mark the payout as failed before raising
         p.status = "failed"
         db.add(p)
-        db.commit()
+        await db.commit()
 
         # Attempt to extract a meaningful error message from Paystack's JSON
         error_detail = None
@@ -235,8 +234,8 @@ async def request_payout(
     p.transfer_code = data.get("transfer_code") or p.transfer_code
     # Keep status "processing" until Paystack webhook updates success/failed
     db.add(p)
-    db.commit()
-    db.refresh(p)
+    await db.commit()
+    await db.refresh(p)
 
     return PayoutOut(
         id=str(p.id),
@@ -253,16 +252,25 @@ async def request_payout(
 # List my payouts (artisan)
 @router.get("/my", response_model=dict)
 async def my_payouts(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current: User = Depends(get_current_user),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    total: Optional[TotalMode] = Query(None, description="exact | estimate | none"),
 ):
-    q = db.query(Payout).filter(Payout.user_id == current.id).order_by(Payout.created_at.desc())
-    total = q.count()
-    rows = q.limit(limit).offset(offset).all()
+    page = await db.run_sync(
+        lambda s: keyset_paginate(
+            s.query(Payout).filter(Payout.user_id == current.id),
+            created_col=Payout.created_at, id_col=Payout.id, scope="payouts.my",
+            limit=limit, cursor=cursor, offset=offset, total=total,
+        )
+    )
+    rows = page.items
     return {
-        "total": total,
+        "total": page.total,
+        "total_estimated": page.total_estimated,
+        "next_cursor": page.next_cursor,
         "items": [
             {
                 "id": str(r.id),
@@ -282,28 +290,27 @@ async def my_payouts(
 # Admin list payouts (optional)
 @router.get("/admin/list", response_model=dict)
 async def admin_list_payouts(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin: User = Depends(require_admin),
     status_eq: Optional[str] = Query(None),
     artisan_email: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
 ):
-    from sqlalchemy.orm import aliased
-
     Artisan = aliased(User)
-    q = (
-        db.query(Payout, Artisan.email.label("artisan_email"))
+    stmt = (
+        select(Payout, Artisan.email.label("artisan_email"))
         .join(Artisan, Artisan.id == Payout.user_id)
-        .order_by(Payout.created_at.desc())
     )
     if status_eq:
-        q = q.filter(Payout.status == status_eq)
+        stmt = stmt.where(Payout.status == status_eq)
     if artisan_email:
-        q = q.filter(Artisan.email == artisan_email)
+        stmt = stmt.where(Artisan.email == artisan_email)
 
-    total = q.count()
-    rows = q.limit(limit).offset(offset).all()
+    total = (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
+    rows = (
+        await db.execute(stmt.order_by(Payout.created_at.desc()).limit(limit).offset(offset))
+    ).all()
     return {
         "total": total,
         "items": [
@@ -1,18 +1,17 @@
 # app/routers/search.py
 from __future__ import annotations
-from typing import Optional, List
+from typing import Literal, Optional, List
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import or_, and_
-from sqlalchemy import func, cast, String
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
 
 from app.db.database import get_db
-from app.models import User
-from app.models.artisan import ArtisanProfile
-from app.models.enums import UserRole, VerificationStatus
-from app.schemas.artisan_schemas import ArtisanListOut
-from app.utils import decrypt_str
+from app.models.enums import VerificationStatus
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.schemas.artisan_schemas import ArtisanListOut, ArtisanNearbyOut
+from app.services import artisan_search_service
+from app.services.rating_service import rating_summary
+from app.security.pii import decrypt_many
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
@@ -23,16 +22,36 @@ def _kobo_to_naira(kobo: int | None) -> float | None:
     return round(kobo / 100.0, 2)
 
 
+def _list_fields(u, phone: Optional[str]) -> dict:
+    p = u.artisan_profile
+    return dict(
+        user_id=str(u.id),
+        full_name=u.full_name,
+        email=u.email,
+        phone_number=phone,
+        service_category=p.service_category if p else None,
+        service_location=p.service_location if p else None,
+        base_price_naira=_kobo_to_naira(getattr(p, "base_price_kobo", None)) if p else None,
+        verification_status=str(p.verification_status) if p else str(VerificationStatus.pending),
+        rating=rating_summary(p),
+    )
+
+
 @router.get(
     "/artisans",
     response_model=List[ArtisanListOut],
     summary="Search Artisans",
     description=(
-        "Search artisans by free-text (name/email), category, location, verification status, "
-        "and price range. Prices are specified in **naira**; they are stored in kobo internally."
+        "Search artisans by free-text (name, category, location, description or exact email), "
+        "category, location, verification status, and price range. Results are ranked by "
+        "relevance when `q` is given, newest first otherwise, or best rated first with "
+        "`sort=rating`. Prices are specified in **naira**; "
+        "they are stored in kobo internally. Pass the `X-Next-Cursor` response header back as "
+        "`cursor` to fetch the next page."
     ),
 )
 def search_artisans(
+    response: Response,
     db: Session = Depends(get_db),
     location: Optional[str] = Query(
         None,
@@ -46,8 +65,11 @@ def search_artisans(
     ),
     q: Optional[str] = Query(
         None,
-        description="Free-text search over full name and email.",
-        examples=["Ade", "artisan@example.com"],
+        description=(
+            "Free-text search over name, category, location and description (typo tolerant), "
+            "or an exact email address."
+        ),
+        examples=["Ade", "plumber yaba", "artisan@example.com"],
     ),
     status: Optional[VerificationStatus] = Query(
         None,
@@ -65,74 +87,110 @@ def search_artisans(
         description="Maximum displayed price in **naira** (inclusive).",
         examples=[20_000.0, 10_000.0],
     ),
+    sort: Literal["default", "rating"] = Query(
+        "default",
+        description=(
+            "`default`: relevance with `q`, newest first without. "
+            "`rating`: highest Bayesian rating score first (see `rating.score`)."
+        ),
+    ),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor from the previous page's `X-Next-Cursor` header.",
+    ),
+    offset: int = Query(
+        0,
+        ge=0,
+        deprecated=True,
+        description="Deprecated: use `cursor`. Ignored when `cursor` is given.",
+    ),
+    include_phone: bool = Query(
+        True,
+        description="Set to false when the phone number is not displayed; skips decrypting it.",
+    ),
 ):
     """
     Notes on price filtering:
     - `min_price` / `max_price` are **naira**, converted to kobo for DB filtering.
     - If an artisan hasn't set a price yet (`base_price_kobo` is NULL), they won't match
       a price filter (only returned when no `min_price`/`max_price` are provided).
-    - By default, only **approved** artisans are returned.
+    - By default, only **verified** artisans are returned.
     """
-    query = (
-        db.query(User)
-        .options(joinedload(User.artisan_profile))
-        .filter(User.role == UserRole.artisan)
-        .join(ArtisanProfile, ArtisanProfile.user_id == User.id)
+    # cursors are bound to the ordering they were issued for
+    if sort == "rating":
+        scope = "search.artisans:rating"
+    else:
+        scope = "search.artisans:rank" if (q or "").strip() else "search.artisans:recent"
+    after = decode_cursor(cursor, scope)
+
+    users, last = artisan_search_service.search_artisans(
+        db,
+        q=q,
+        category=category,
+        location=location,
+        status=status,
+        min_kobo=int(round(min_price * 100)) if min_price is not None else None,
+        max_kobo=int(round(max_price * 100)) if max_price is not None else None,
+        limit=limit,
+        after=after,
+        offset=offset,
+        sort=sort,
     )
+    if last is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last, scope)
+
+    phones = decrypt_many((u.phone_number for u in users), skip=not include_phone)
+    return [ArtisanListOut(**_list_fields(u, phone)) for u, phone in zip(users, phones)]
 
-    # Default: show only approved artisans unless an explicit status filter is supplied
-    if status is None:
-        query = query.filter(
-            func.lower(cast(ArtisanProfile.verification_status, String)).in_(
-                ["approved", "verified"]
-            )
-        )
-    else:
-        # Robust to DB enum/text storage
-        query = query.filter(
-            func.lower(cast(ArtisanProfile.verification_status, String))
-            == status.name.lower()
-        )
 
-    if q:
-        like = f"%{q}%"
-        query = query.filter(or_(User.full_name.ilike(like), User.email.ilike(like)))
-
-    if category:
-        query = query.filter(ArtisanProfile.service_category == category)
-
-    if location:
-        like_loc = f"%{location}%"
-        query = query.filter(ArtisanProfile.service_location.ilike(like_loc))
-
-    # price range in NAIRA - KOBO filtering
-    price_filters = []
-    if min_price is not None:
-        min_kobo = int(round(min_price * 100))
-        price_filters.append(ArtisanProfile.base_price_kobo >= min_kobo)
-    if max_price is not None:
-        max_kobo = int(round(max_price * 100))
-        price_filters.append(ArtisanProfile.base_price_kobo <= max_kobo)
-    if price_filters:
-        query = query.filter(and_(*price_filters))
-
-    rows = query.order_by(User.created_at.desc()).limit(limit).offset(offset).all()
-
-    out: List[ArtisanListOut] = []
-    for u in rows:
-        p = u.artisan_profile
-        out.append(
-            ArtisanListOut(
-                user_id=str(u.id),
-                full_name=u.full_name,
-                email=u.email,
-                phone_number=decrypt_str(u.phone_number) if u.phone_number else None,
-                service_category=p.service_category if p else None,
-                service_location=p.service_location if p else None,
-                base_price_naira=_kobo_to_naira(getattr(p, "base_price_kobo", None)) if p else None,
-                verification_status=str(p.verification_status) if p else str(VerificationStatus.pending),
-            )
+@router.get(
+    "/artisans/nearby",
+    response_model=List[ArtisanNearbyOut],
+    summary="Find Artisans Near a Point",
+    description=(
+        "Verified artisans whose service area (the radius set with /artisans/set-availability) "
+        "covers the given point, nearest first, with the distance in km. Pass the "
+        "`X-Next-Cursor` response header back as `cursor` to fetch the next page."
+    ),
+)
+def search_artisans_nearby(
+    response: Response,
+    db: Session = Depends(get_db),
+    lat: float = Query(..., ge=-90, le=90, description="Customer latitude (WGS84 degrees).", examples=[6.5244]),
+    lon: float = Query(..., ge=-180, le=180, description="Customer longitude (WGS84 degrees).", examples=[3.3792]),
+    category: Optional[str] = Query(
+        None,
+        description="Exact service category name (see /artisans/categories).",
+        examples=["plumbing", "electrical"],
+    ),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor from the previous page's `X-Next-Cursor` header.",
+    ),
+    include_phone: bool = Query(
+        True,
+        description="Set to false when the phone number is not displayed; skips decrypting it.",
+    ),
+):
+    # the sort key is the distance from this point, so the cursor is bound to it
+    scope = f"search.artisans:nearby:{lat:.6f},{lon:.6f}"
+    after = decode_cursor(cursor, scope)
+
+    rows, last = artisan_search_service.nearby_artisans(
+        db, lat=lat, lon=lon, category=category, limit=limit, after=after,
+    )
+    if last is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last, scope)
+
+    phones = decrypt_many((u.phone_number for u, _ in rows), skip=not include_phone)
+    return [
+        ArtisanNearbyOut(
+            **_list_fields(u, phone),
+            distance_km=round(distance, 2),
+            service_radius_km=u.artisan_profile.service_radius_km,
         )
-    return out
+        for (u, distance), phone in zip(rows, phones)
+    ]
+
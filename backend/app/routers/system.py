@@ -1,9 +1,14 @@
 # app/routers/system.py
 from __future__ import annotations
-from fastapi import APIRouter, Depends
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from app.config import METRICS_TOKEN
 from app.db.database import get_db
+from app.observability import metrics
 
 router = APIRouter(prefix="", tags=["System"])
 
@@ -16,3 +21,10 @@ def health(db: Session = Depends(get_db)):
     except Exception:
         db_ok = False
     return {"status": "ok", "db": db_ok}
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics_endpoint(authorization: Optional[str] = Header(default=None)):
+    """Prometheus text exposition (merged across workers when METRICS_MULTIPROC_DIR is set)."""
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return PlainTextResponse(metrics.exposition(), media_type="text/plain; version=0.0.4; charset=utf-8")
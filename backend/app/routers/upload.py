@@ -2,17 +2,17 @@
 from __future__ import annotations
 
 import os
-import uuid
-import shutil
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
 
+from app.config import UPLOAD_DOCUMENT_MAX_MB
 from app.db.database import get_db
 from app.auth_utils import get_current_user, require_verified_contact
 from app.models import User, ArtisanDocument
 from app.models.enums import UserRole
+from app.services import upload_service
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
 
@@ -21,7 +21,7 @@ UPLOAD_DIR = os.path.join(os.getcwd(), "uploaded_docs")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # Upload
-@router.post("/artisan-documents", summary="Upload artisan KYC/portfolio (PDF/JPG/PNG, <=10MB each)")
+@router.post("/artisan-documents", summary=f"Upload artisan KYC/portfolio (PDF/JPG/PNG, <={UPLOAD_DOCUMENT_MAX_MB}MB each)")
 async def upload_artisan_documents(
     files: List[UploadFile] = File(...),
     db: Session = Depends(get_db),
@@ -31,37 +31,32 @@ async def upload_artisan_documents(
     if getattr(me, "role", None) != UserRole.artisan:
         raise HTTPException(status_code=403, detail="Only artisans can upload documents")
 
-    # Lazy import to avoid circulars if any
-    from app.utils import validate_and_read_upload
-
-    # Ensure user-specific folder (no PII in names beyond UUID)
+    # Per-user folder (no PII in names beyond UUID); files are stored as <sha256><ext>
     user_dir = os.path.join(UPLOAD_DIR, str(me.id))
-    os.makedirs(user_dir, exist_ok=True)
-    abs_user_dir = os.path.abspath(user_dir)
+    known = {
+        name for (name,) in db.query(ArtisanDocument.stored_filename).filter(ArtisanDocument.user_id == me.id)
+    }
 
     saved = []
     for f in files:
-        # Validate & read (size/type/signature) -> (bytes, ext, safe_name)
-        content, ext, safe_name = validate_and_read_upload(f)
-
-        # Compose safe absolute path under user_dir
-        dest_path = os.path.abspath(os.path.join(abs_user_dir, safe_name))
-        # Prevent path traversal (must stay within user_dir)
-        if not dest_path.startswith(abs_user_dir + os.sep):
-            raise HTTPException(status_code=400, detail="Invalid path")
-
-        # Persist to disk
-        with open(dest_path, "wb") as out:
-            out.write(content)
-
-        # Save metadata
-        doc = ArtisanDocument(
-            user_id=me.id,
-            original_filename=f.filename,
-            stored_filename=safe_name,
-        )
-        db.add(doc)
-        saved.append({"original": f.filename, "stored_as": safe_name, "bytes": len(content)})
+        # Validate (type/signature/size) and stream to disk
+        stored = await upload_service.store_upload(f, user_dir, upload_service.DOCUMENTS)
+
+        # Same content uploaded before (or twice in this request): keep the one record
+        if stored.stored_name not in known:
+            known.add(stored.stored_name)
+            db.add(ArtisanDocument(
+                user_id=me.id,
+                original_filename=f.filename,
+                stored_filename=stored.stored_name,
+            ))
+        saved.append({
+            "original": f.filename,
+            "stored_as": stored.stored_name,
+            "bytes": stored.size,
+            "sha256": stored.sha256,
+            "duplicate": stored.duplicate,
+        })
 
     db.commit()
     return {"message": "Uploaded", "files": saved}
@@ -6,7 +6,10 @@ from sqlalchemy.orm import Session
 
 from app.db.database import get_db
 from app.auth_utils import get_current_user
-from app.utils import encrypt_str, decrypt_str
+from app.http_cache import conditional, row_validators
+from app.utils import decrypt_str
+from app.security.pii import set_phone
+from app.services.auth_service import phone_in_use
 from app.models import User
 from app.schemas.user_schemas import UserOut, UpdateProfileIn, PreferencesIn
 from app.schemas.auth_schemas import VerifyEmailOut, VerifyEmailConfirmIn
@@ -18,7 +21,7 @@ from app.security.sanitize import clean_name, clean_phone, clean_free_text
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.get("/me", response_model=UserOut)
-def get_me(current: User = Depends(get_current_user)):
+def get_me(current: User = Depends(conditional(get_current_user, row_validators))):
     u = current
     return {
         "id": str(u.id),
@@ -56,19 +59,12 @@ def update_profile(
         new_phone = clean_phone((payload.phone_number or "").strip(), 32)
 
         if new_phone:
-            # Ensure no duplicate phone across users
-            others = (
-                db.query(User.id, User.phone_number)
-                .filter(User.id != current.id)
-                .all()
-            )
-            for uid, enc_phone in others:
-                if decrypt_str(enc_phone) == new_phone:
-                    raise HTTPException(status_code=400, detail="Phone number already in use")
-
-            current.phone_number = encrypt_str(new_phone)
+            # Ensure no duplicate phone across users (indexed blind-index lookup)
+            if phone_in_use(db, new_phone, exclude_user_id=current.id):
+                raise HTTPException(status_code=400, detail="Phone number already in use")
+            set_phone(current, new_phone)
         else:
-            current.phone_number = None
+            set_phone(current, None)
 
     # Update location
     if payload.location is not None:
@@ -8,14 +8,15 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
 from app.models import User, Job
-from app.models.payments import Payment, WalletLedger
-from app.models.enums import LedgerEntryType, PaymentMethod, PaymentStatus
+from app.models.payments import Payment
+from app.models.enums import PaymentMethod, PaymentStatus
+from app.services.wallet_balance_service import total_balance
 from app.auth_utils import get_current_user
+from app.security.pii import set_phone, set_nin
 
 # Additional imports to fully disable a deleted account.  When a user
 # deletes their account we not only anonymize them but also revoke
@@ -34,24 +35,8 @@ router = APIRouter(prefix="/users", tags=["Users"])
 # helpers
 
 def _wallet_balance(db: Session, user_id: UUID) -> Decimal:
-    """Compute wallet balance using entry_type to imply sign; amounts are stored POSITIVE."""
-    credit_types = [LedgerEntryType.deposit, LedgerEntryType.payout, LedgerEntryType.refund, LedgerEntryType.adjust]
-    debit_types  = [LedgerEntryType.charge, LedgerEntryType.withdrawal]
-
-    raw = db.query(
-        func.coalesce(
-            func.sum(
-                case(
-                    (WalletLedger.entry_type.in_(credit_types), WalletLedger.amount),
-                    (WalletLedger.entry_type.in_(debit_types), -WalletLedger.amount),
-                    else_=0,
-                )
-            ),
-            0,
-        )
-    ).filter(WalletLedger.user_id == user_id).scalar()
-
-    return Decimal(str(raw or 0))
+    """Wallet balance across currencies, read from the materialized snapshot."""
+    return total_balance(db, user_id)
 
 # response schemas (kept light & PII-safe)
 
@@ -182,9 +167,9 @@ def delete_me(
     if hasattr(current, "full_name"):
         current.full_name = "Deleted User"
     if hasattr(current, "phone_number"):
-        setattr(current, "phone_number", None)
+        set_phone(current, None)  # clears phone_bidx too, freeing the number
     if hasattr(current, "nin"):
-        setattr(current, "nin", None)
+        set_nin(current, None)
     if hasattr(current, "address"):
         setattr(current, "address", None)
 
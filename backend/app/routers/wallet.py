@@ -1,17 +1,19 @@
 # app/routers/wallet.py
 from __future__ import annotations
 from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from decimal import Decimal
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db
 from app.auth_utils import get_current_user, require_verified_contact, require_artisan_approved
 from app.models import User
 from app.schemas.payment_schemas import WalletBalanceOut, WalletDepositIn, WalletWithdrawIn, Message
 from app.services.payments_service import wallet_balance, wallet_deposit, wallet_withdraw
 
-from httpx import AsyncClient, AsyncHTTPTransport
 from app.config import PAYSTACK_SECRET
+from app.services import paystack_client
 from app.models.payments import WalletLedger, IdempotencyKey
 from app.models.enums import LedgerEntryType
 import uuid
@@ -53,7 +55,7 @@ def withdraw(payload: WalletWithdrawIn, db: Session = Depends(get_db), current:
 @router.post("/topup/paystack/init")
 async def wallet_topup_init(
     amount: Decimal,  # NGN, e.g. 1000
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current: User = Depends(require_verified_contact),
 ):
     """
@@ -78,17 +80,13 @@ async def wallet_topup_init(
             "amount": float(amount),
         },
     }
-    headers = {"Authorization": f"Bearer {PAYSTACK_SECRET}", "Content-Type": "application/json"}
-
-    transport = AsyncHTTPTransport(retries=2)
-    async with AsyncClient(timeout=20.0, http2=False, transport=transport) as client:
-        rsp = await client.post("https://api.paystack.co/transaction/initialize", json=payload, headers=headers)
-        if rsp.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"Paystack init failed: {rsp.text}")
-        data = rsp.json().get("data") or {}
-        auth_url = data.get("authorization_url")
-        if not auth_url:
-            raise HTTPException(status_code=502, detail="authorization_url missing from Paystack response")
+    rsp = await paystack_client.post("/transaction/initialize", payload, endpoint="transaction.initialize")
+    if rsp.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"Paystack init failed: {rsp.text}")
+    data = rsp.json().get("data") or {}
+    auth_url = data.get("authorization_url")
+    if not auth_url:
+        raise HTTPException(status_code=502, detail="authorization_url missing from Paystack response")
 
     return {"reference": topup_ref, "authorization_url": auth_url}
 
@@ -96,7 +94,7 @@ async def wallet_topup_init(
 @router.get("/topup/paystack/verify/{reference}")
 async def wallet_topup_verify(
     reference: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current: User = Depends(get_current_user),
 ):
     """
@@ -106,24 +104,25 @@ async def wallet_topup_verify(
     if not PAYSTACK_SECRET:
         raise HTTPException(status_code=500, detail="PAYSTACK_SECRET not configured")
 
-    headers = {"Authorization": f"Bearer {PAYSTACK_SECRET}"}
-    transport = AsyncHTTPTransport(retries=2)
-    async with AsyncClient(timeout=15.0, http2=False, transport=transport) as client:
-        rsp = await client.get(f"https://api.paystack.co/transaction/verify/{reference}", headers=headers)
-        if rsp.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"Paystack verify failed: {rsp.text}")
-        body = rsp.json()
-        status = (body.get("data") or {}).get("status")
-        meta = (body.get("data") or {}).get("metadata") or {}
-        is_topup = bool(meta.get("wallet_topup"))
-        user_id = meta.get("user_id")
-        amount = Decimal(str(meta.get("amount") or "0"))
+    rsp = await paystack_client.get(f"/transaction/verify/{reference}", endpoint="transaction.verify")
+    if rsp.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"Paystack verify failed: {rsp.text}")
+    body = rsp.json()
+    status = (body.get("data") or {}).get("status")
+    meta = (body.get("data") or {}).get("metadata") or {}
+    is_topup = bool(meta.get("wallet_topup"))
+    user_id = meta.get("user_id")
+    amount = Decimal(str(meta.get("amount") or "0"))
 
     if status == "success" and is_topup and user_id and amount > 0:
         # Idempotent credit if not already present
-        exists = db.query(WalletLedger).filter(
-            WalletLedger.reference == reference,
-            WalletLedger.entry_type == LedgerEntryType.deposit,
+        exists = (
+            await db.execute(
+                select(WalletLedger.id).where(
+                    WalletLedger.reference == reference,
+                    WalletLedger.entry_type == LedgerEntryType.deposit,
+                )
+            )
         ).first()
         if not exists:
             db.add(
@@ -136,7 +135,7 @@ async def wallet_topup_verify(
                     meta={"reason": "wallet_topup_paystack_verify"},
                 )
             )
-            db.commit()
+            await db.commit()
         return {"status": "credited", "reference": reference}
 
     return {"status": status or "unknown", "reference": reference}
@@ -15,6 +15,7 @@ class AdminSummaryOut(BaseModel):
     artisans_pending: int
     jobs_by_status: Dict[str, int]
     reviews_total: int
+    computed_at: Optional[datetime] = None  # when the served snapshot was computed
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -35,8 +36,10 @@ class AdminBookingRow(BaseModel):
     artisan_email: Optional[EmailStr] = None
 
 class AdminBookingListOut(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[AdminBookingRow]
+    next_cursor: Optional[str] = None
+    total_estimated: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -66,8 +69,10 @@ class AdminAnnouncementRow(BaseModel):
     is_active: bool
 
 class AdminAnnouncementListOut(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[AdminAnnouncementRow]
+    next_cursor: Optional[str] = None
+    total_estimated: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -95,8 +100,10 @@ class AdminUserRow(BaseModel):
     verification_status: Optional[str] = None
 
 class AdminUserListOut(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[AdminUserRow]    
+    next_cursor: Optional[str] = None
+    total_estimated: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -111,8 +118,10 @@ class AdminArtisanRow(BaseModel):
     rejection_reason: Optional[str] = None
 
 class AdminArtisanListOut(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[AdminArtisanRow]   
+    next_cursor: Optional[str] = None
+    total_estimated: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -127,8 +136,10 @@ class AdminComplaintRow(BaseModel):
     created_at: datetime
 
 class AdminComplaintListOut(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[AdminComplaintRow]
+    next_cursor: Optional[str] = None
+    total_estimated: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -152,8 +163,10 @@ class AdminDisputeRow(BaseModel):
     created_at: datetime
 
 class AdminDisputeListOut(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[AdminDisputeRow]
+    next_cursor: Optional[str] = None
+    total_estimated: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -10,7 +10,7 @@ such as `is_active` or `created_by_admin_id`.
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, ConfigDict
 
 
@@ -24,7 +24,9 @@ class AnnouncementOut(BaseModel):
 
 
 class AnnouncementListOut(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[AnnouncementOut]
+    next_cursor: Optional[str] = None
+    total_estimated: bool = False
 
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -3,6 +3,12 @@ from __future__ import annotations
 from typing import Optional, List
 from pydantic import BaseModel, ConfigDict
 
+class ArtisanRatingOut(BaseModel):
+    count: int = 0
+    average: Optional[float] = None   # plain mean of the reviews, None without reviews
+    score: float                      # Bayesian average; what `sort=rating` orders by
+    histogram: List[int]              # number of 1..5 star reviews
+
 class ArtisanMeOut(BaseModel):
     user_id: str
     full_name: str
@@ -24,6 +30,8 @@ class ArtisanMeOut(BaseModel):
 
     verification_status: str
     rejection_reason: Optional[str] = None
+
+    rating: Optional[ArtisanRatingOut] = None
  
     model_config = ConfigDict(from_attributes=True)
 
@@ -53,8 +61,14 @@ class ArtisanListOut(BaseModel):
 
     verification_status: str
 
+    rating: Optional[ArtisanRatingOut] = None
+
     model_config = ConfigDict(from_attributes=True)
 
+class ArtisanNearbyOut(ArtisanListOut):
+    distance_km: float
+    service_radius_km: Optional[float] = None
+
 class VerifyActionIn(BaseModel):
     approve: bool
     rejection_reason: Optional[str] = None
@@ -43,7 +43,9 @@ class JobOut(BaseModel):
 
 class JobListOut(BaseModel):
     jobs: List[JobOut]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+    total_estimated: bool = False
     model_config = ConfigDict(from_attributes=True)
 
 class JobRespondIn(BaseModel):
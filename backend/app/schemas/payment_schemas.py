@@ -66,7 +66,9 @@ class PaymentHistoryItem(BaseModel):
 
 class PaymentHistoryOut(BaseModel):
     items: List[PaymentHistoryItem]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+    total_estimated: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,176 @@
+# app/security/passwords.py
+"""
+Password hashing on a bounded worker pool.
+
+bcrypt at cost 12 takes ~250ms of CPU. Run inline in an async route it
+stalls the event loop (and every other request on the worker) for that long;
+run in the default threadpool it competes with all sync routes. Instead:
+
+- all hashing/verification goes through one ThreadPoolExecutor of
+  PASSWORD_HASH_WORKERS threads (the bcrypt extension releases the GIL, so
+  threads run in parallel on separate cores)
+- at most PASSWORD_HASH_MAX_PENDING jobs may be queued or running; beyond
+  that callers get an immediate 503 with Retry-After instead of waiting
+  behind a queue that cannot drain in time
+- async callers await the job (hash_async/verify_and_update_async); sync
+  callers (threadpool routes, scripts) block on it but share the same bound
+- verify_and_update returns a new hash when the stored one was made with a
+  cost other than BCRYPT_ROUNDS, so logins upgrade hashes transparently
+
+metrics_snapshot() reports pending/running jobs, rejections and timings.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+from app.observability.metrics import registry
+
+# min = max = default, so passlib flags any other cost as needing an update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class HasherBusy(HTTPException):
+    """The hashing pool is saturated; the client should retry shortly."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            detail="Server is busy, please retry in a moment.",
+            headers={"Retry-After": "1"},
+        )
+
+
+_POOL_REJECTED = registry.counter("password_hash_rejected_total", "Hash/verify jobs refused with 503 (pool full).")
+
+
+class PasswordHasherPool:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0  # queued + running
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0  # total time jobs spent queued
+        self.run_seconds = 0.0   # total time jobs spent hashing
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+        return self._executor
+
+    def _submit(self, fn: Callable, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                _POOL_REJECTED.inc()
+                raise HasherBusy()
+            self._pending += 1
+            executor = self._get_executor()
+        queued_at = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args)
+            finally:
+                done = time.perf_counter()
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+                    self.completed += 1
+                    self.wait_seconds += started - queued_at
+                    self.run_seconds += done - started
+
+        try:
+            return executor.submit(job)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def run(self, fn: Callable, *args):
+        """Run on the pool and block until done (for sync callers)."""
+        return self._submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable, *args):
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def metrics_snapshot(self) -> dict:
+        with self._lock:
+            n = self.completed or 1
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "queued": self._pending - self._running,
+                "running": self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.wait_seconds / n * 1000, 2),
+                "avg_run_ms": round(self.run_seconds / n * 1000, 2),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+pool = PasswordHasherPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+_POOL_JOBS = registry.gauge("password_hash_jobs", "Password hash/verify jobs by state.", ("state",))
+
+
+def _collect_pool() -> None:
+    m = pool.metrics_snapshot()
+    _POOL_JOBS.set(m["queued"], state="queued")
+    _POOL_JOBS.set(m["running"], state="running")
+
+
+registry.register_collector(_collect_pool)
+
+
+def hash_password(password: str) -> str:
+    return pool.run(pwd_context.hash, password)
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return pool.run(pwd_context.verify, plain, hashed)
+
+
+def verify_and_update(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(ok, new_hash); new_hash is set when the stored hash should be replaced."""
+    return pool.run(pwd_context.verify_and_update, plain, hashed)
+
+
+async def hash_password_async(password: str) -> str:
+    return await pool.run_async(pwd_context.hash, password)
+
+
+async def verify_and_update_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await pool.run_async(pwd_context.verify_and_update, plain, hashed)
+
+
+def metrics_snapshot() -> dict:
+    return pool.metrics_snapshot()
@@ -0,0 +1,253 @@
+# app/security/pii.py
+"""
+PII codec: Fernet field encryption with batched, cached decryption.
+
+List endpoints decrypt one column (phone_number) for every row of a page.
+decrypt_many() handles the whole page at once:
+- duplicate ciphertexts are decrypted once
+- results are kept in a bounded LRU keyed by ciphertext (PII_CACHE_SIZE),
+  so a row seen on a previous request costs a dict lookup instead of
+  HMAC-SHA256 + AES-CBC; the lock is taken once per page, not per row
+- callers whose response does not show the phone pass skip=True and pay nothing
+
+Ciphertexts are random per encryption, so a re-encrypted (changed) value gets
+a new cache key and a stale plaintext is never served. Without FERNET_KEY the
+codec passes values through unchanged (same as utils.encrypt_str/decrypt_str).
+
+Because of that randomness encrypted columns cannot be searched. Blind indexes
+(phone_bidx, nin_bidx) hold a keyed HMAC of the normalised value, so exact-match
+lookups and uniqueness run on an indexed column; set_phone()/set_nin() keep the
+ciphertext and its blind index in step.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import re
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Iterable, Optional
+
+from app.config import FERNET_KEY, PII_CACHE_SIZE, BLIND_INDEX_KEY, SECRET_KEY
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except Exception:  # cryptography missing: plaintext fallback
+    Fernet = None
+    InvalidToken = Exception
+
+_INVALID = object()  # cached marker for tokens that fail to decrypt
+
+
+class PIICodec:
+    def __init__(self, key: str = "", cache_size: int = 0):
+        try:
+            self._fernet = Fernet(key.encode()) if (key and Fernet is not None) else None
+        except ValueError:
+            self._fernet = None  # malformed key: same plaintext fallback utils always had
+        self.cache_size = max(0, cache_size)
+        self._cache: OrderedDict[str, object] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._fernet is not None
+
+    def encrypt(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        if not self._fernet:
+            return value  # plaintext fallback if no key configured
+        return self._fernet.encrypt(value.encode()).decode()
+
+    def _decrypt_uncached(self, token: str):
+        try:
+            return self._fernet.decrypt(token.encode()).decode()
+        except InvalidToken:
+            return _INVALID
+
+    def decrypt(self, value: Optional[str]) -> Optional[str]:
+        return self.decrypt_many([value])[0]
+
+    def decrypt_many(self, values: Iterable[Optional[str]], *, skip: bool = False) -> list[Optional[str]]:
+        """
+        Decrypt a batch, preserving order. None/empty stay None; tokens that fail
+        to decrypt give None (like utils.decrypt_str). skip=True returns all None.
+        """
+        values = list(values)
+        if skip:
+            return [None] * len(values)
+        if not self._fernet:
+            return [v if v else None for v in values]
+
+        wanted = {v for v in values if v}
+        plain: dict[str, object] = {}
+        if self.cache_size:
+            with self._lock:
+                for token in wanted:
+                    hit = self._cache.get(token)
+                    if hit is not None:
+                        self._cache.move_to_end(token)
+                        plain[token] = hit
+                self.hits += len(plain)
+                self.misses += len(wanted) - len(plain)
+
+        fresh = {token: self._decrypt_uncached(token) for token in wanted if token not in plain}
+        plain.update(fresh)
+
+        if fresh and self.cache_size:
+            with self._lock:
+                self._cache.update(fresh)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        out: list[Optional[str]] = []
+        for v in values:
+            p = plain.get(v) if v else None
+            out.append(None if p is None or p is _INVALID else p)
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+codec = PIICodec(FERNET_KEY, PII_CACHE_SIZE)
+
+
+def encrypt_pii(value: Optional[str]) -> Optional[str]:
+    return codec.encrypt(value)
+
+
+def decrypt_pii(value: Optional[str]) -> Optional[str]:
+    return codec.decrypt(value)
+
+
+def decrypt_many(values: Iterable[Optional[str]], *, skip: bool = False) -> list[Optional[str]]:
+    return codec.decrypt_many(values, skip=skip)
+
+
+# blind indexes
+
+def _blind_key() -> bytes:
+    if BLIND_INDEX_KEY:
+        return BLIND_INDEX_KEY.encode()
+    # derived, so it differs from the encryption key itself
+    return hmac.new((FERNET_KEY or SECRET_KEY).encode(), b"fixion-blind-index-v1", hashlib.sha256).digest()
+
+
+_BLIND_KEY = _blind_key()
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    """Digits in international form without '+': '0803 123 4567' and '+2348031234567' -> '2348031234567'."""
+    digits = re.sub(r"\D+", "", phone or "")
+    if digits.startswith("0") and len(digits) == 11:
+        return "234" + digits[1:]  # Nigerian local format
+    return digits
+
+
+def normalize_nin(nin: Optional[str]) -> str:
+    return re.sub(r"[^0-9A-Za-z]+", "", nin or "").upper()
+
+
+def blind_index(normalized: str, field: str) -> Optional[str]:
+    if not normalized:
+        return None
+    return hmac.new(_BLIND_KEY, f"{field}:{normalized}".encode(), hashlib.sha256).hexdigest()
+
+
+def phone_bidx(phone: Optional[str]) -> Optional[str]:
+    return blind_index(normalize_phone(phone), "phone")
+
+
+def nin_bidx(nin: Optional[str]) -> Optional[str]:
+    return blind_index(normalize_nin(nin), "nin")
+
+
+def set_phone(user, phone: Optional[str]) -> None:
+    """Store a plaintext phone on a User: ciphertext plus blind index."""
+    phone = phone or None
+    user.phone_number = codec.encrypt(phone)
+    user.phone_bidx = phone_bidx(phone)
+
+
+def set_nin(user, nin: Optional[str]) -> None:
+    nin = nin or None
+    user.nin = codec.encrypt(nin)
+    user.nin_bidx = nin_bidx(nin)
+
+
+_FERNET_PREFIX = "gAAAAA"  # version byte 0x80, base64url
+
+
+def _legacy_plaintext(stored: Optional[str], decrypted: Optional[str]) -> bool:
+    # rows written before encryption was switched on hold the plaintext itself;
+    # a Fernet token that fails (wrong key) is not plaintext and is left alone
+    return bool(stored) and decrypted is None and codec.enabled and not stored.startswith(_FERNET_PREFIX)
+
+
+def backfill_blind_indexes(conn, *, batch_size: int = 1000) -> dict:
+    """
+    Recompute phone_bidx/nin_bidx for every user from the encrypted columns
+    (after BLIND_INDEX_KEY changes, or FERNET_KEY is first set). Values that are
+    still legacy plaintext are indexed as they are and encrypted in the same
+    UPDATE. Runs on a Connection inside the caller's transaction. When two
+    accounts share a phone number only the oldest keeps phone_bidx, so the
+    unique index holds.
+    """
+    from sqlalchemy import text
+
+    conn.execute(text("UPDATE users SET phone_bidx = NULL, nin_bidx = NULL"))
+    seen_phones: set[str] = set()
+    stats = {"users": 0, "phones": 0, "nins": 0, "duplicate_phones": 0, "legacy_plaintext": 0, "undecryptable": 0}
+    last = None
+    while True:
+        after = "WHERE (created_at, id) > (:c, :i) " if last else ""
+        rows = conn.execute(
+            text(f"SELECT id, created_at, phone_number, nin FROM users {after}ORDER BY created_at, id LIMIT :n"),
+            {"c": last[0], "i": last[1], "n": batch_size} if last else {"n": batch_size},
+        ).all()
+        if not rows:
+            return stats
+        phones = codec.decrypt_many(r.phone_number for r in rows)
+        nins = codec.decrypt_many(r.nin for r in rows)
+        updates = []
+        for r, phone, nin in zip(rows, phones, nins):
+            fixed = SimpleNamespace(phone_number=None, nin=None)
+            if _legacy_plaintext(r.phone_number, phone):
+                phone = r.phone_number
+                set_phone(fixed, phone)
+            if _legacy_plaintext(r.nin, nin):
+                nin = r.nin
+                set_nin(fixed, nin)
+            if fixed.phone_number or fixed.nin:
+                stats["legacy_plaintext"] += 1
+            if (r.phone_number and phone is None) or (r.nin and nin is None):
+                stats["undecryptable"] += 1
+            p_idx, n_idx = phone_bidx(phone), nin_bidx(nin)
+            if p_idx and p_idx in seen_phones:
+                stats["duplicate_phones"] += 1
+                p_idx = None
+            elif p_idx:
+                seen_phones.add(p_idx)
+                stats["phones"] += 1
+            if n_idx:
+                stats["nins"] += 1
+            if p_idx or n_idx or fixed.phone_number or fixed.nin:
+                updates.append({"id": r.id, "p": p_idx, "n": n_idx, "pc": fixed.phone_number, "nc": fixed.nin})
+        if updates:
+            conn.execute(
+                text(
+                    "UPDATE users SET phone_bidx = :p, nin_bidx = :n, "
+                    "phone_number = COALESCE(:pc, phone_number), nin = COALESCE(:nc, nin) WHERE id = :id"
+                ),
+                updates,
+            )
+        stats["users"] += len(rows)
+        last = (rows[-1].created_at, rows[-1].id)
@@ -1,27 +1,386 @@
 # app/security/rate_limit.py
-import time
+"""
+Rate limiting shared by all uvicorn workers and replicas.
+
+Algorithm: GCRA (generic cell rate algorithm). "limit requests per period"
+becomes an emission interval T = period / limit; each key stores one number,
+its theoretical arrival time (TAT). A request at `now` is allowed when
+max(TAT, now) + T - period <= now, which permits a burst of `limit` and then
+one request every T. No timestamp lists, and a key is idle (safe to drop)
+as soon as its TAT is in the past.
+
+Backends (RATE_LIMIT_BACKEND):
+- memory: RATE_LIMIT_SHARDS dicts, each with its own lock; expired keys are
+  swept per shard and the oldest are evicted above RATE_LIMIT_MAX_KEYS.
+  Per process only.
+- redis: one Lua script per hit (GCRA on the server clock, key expires with
+  its TAT), spoken over a small pooled RESP client, so it works against Redis,
+  Valkey, KeyDB or scripts/fake_redis.py. If Redis is unreachable, hits fall
+  back to the memory backend for a few seconds instead of failing requests.
+
+Endpoints use the dependencies at the bottom (limit_by_ip / limit_by_user,
+login_rate_limit_and_form); a denied hit is a 429 with Retry-After.
+"""
+
+from __future__ import annotations
+
+import abc
 import asyncio
-from collections import defaultdict, deque
-from typing import Tuple, Deque, Optional
+import hashlib
+import logging
+import math
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
 
 from fastapi import Request, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.config import LOGIN_MAX_ATTEMPTS, LOGIN_WINDOW_SECONDS
+from app.auth_utils import get_current_user
+from app.observability.metrics import RATE_LIMIT_REJECTIONS
+from app.config import (
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_REDIS_URL,
+    RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+    RATE_LIMIT_REDIS_POOL_SIZE,
+    RATE_LIMIT_SHARDS,
+    RATE_LIMIT_MAX_KEYS,
+    LOGIN_MAX_ATTEMPTS,
+    LOGIN_WINDOW_SECONDS,
+)
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    retry_after: float  # seconds until the next request would be allowed (0 when allowed)
+    reset_after: float  # seconds until the bucket is completely empty again
+
+
+def gcra(tat: Optional[float], now: float, limit: int, period: float, cost: int = 1):
+    """
+    One GCRA step. Returns (allowed, new_tat, retry_after); new_tat is the
+    value to store (unchanged when denied). Units are whatever `now` uses.
+    """
+    emission = period / limit
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + emission * cost
+    allow_at = new_tat - period
+    if now < allow_at:
+        return False, tat, allow_at - now
+    return True, new_tat, 0.0
+
+
+def _result(allowed: bool, tat: float, now: float, limit: int, period: float, retry_after: float) -> RateLimitResult:
+    reset_after = max(0.0, tat - now)
+    remaining = max(0, int((period - reset_after) // (period / limit))) if limit else 0
+    return RateLimitResult(allowed, min(remaining, limit), retry_after, reset_after)
+
+
+class RateLimitBackend(abc.ABC):
+    """Interface: hit() counts one request against `key`; reset() forgets it."""
+
+    @abc.abstractmethod
+    async def hit(self, key: str, limit: int, period: float, cost: int = 1) -> RateLimitResult:
+        ...
+
+    @abc.abstractmethod
+    async def reset(self, key: str) -> None:
+        ...
+
+    async def aclose(self) -> None:
+        return None
+
+
+# memory backend
+
+class _Shard:
+    __slots__ = ("lock", "tats", "next_sweep")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tats: dict[str, float] = {}  # insertion order = least recently written first
+        self.next_sweep = 0.0
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Sharded in-process store. Locks are threading locks held for a dict
+    operation, so sync (threadpool) and async callers can share it.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100_000, sweep_interval: float = 30.0, clock=time.monotonic):
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self._max_per_shard = max(1, max_keys // len(self._shards))
+        self._sweep_interval = sweep_interval
+        self._clock = clock
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def _sweep(self, shard: _Shard, now: float) -> None:
+        # caller holds shard.lock
+        if now >= shard.next_sweep:
+            for k in [k for k, tat in shard.tats.items() if tat <= now]:
+                del shard.tats[k]
+            shard.next_sweep = now + self._sweep_interval
+        while len(shard.tats) > self._max_per_shard:
+            del shard.tats[next(iter(shard.tats))]
+
+    def hit_sync(self, key: str, limit: int, period: float, cost: int = 1) -> RateLimitResult:
+        shard = self._shard(key)
+        now = self._clock()
+        with shard.lock:
+            allowed, tat, retry_after = gcra(shard.tats.get(key), now, limit, period, cost)
+            if allowed:
+                shard.tats.pop(key, None)  # re-insert at the end (recently written)
+                shard.tats[key] = tat
+                self._sweep(shard, now)
+        return _result(allowed, tat, now, limit, period, retry_after)
+
+    async def hit(self, key: str, limit: int, period: float, cost: int = 1) -> RateLimitResult:
+        return self.hit_sync(key, limit, period, cost)
+
+    async def reset(self, key: str) -> None:
+        shard = self._shard(key)
+        with shard.lock:
+            shard.tats.pop(key, None)
+
+    def __len__(self) -> int:
+        return sum(len(s.tats) for s in self._shards)
+
+
+# redis backend
+
+class RedisError(Exception):
+    pass
 
-# In-memory store (resets on process restart)
-# key: (client_ip, username/email) -> deque[timestamps]
-_attempts: dict[Tuple[str, str], Deque[float]] = defaultdict(deque)
-_lock = asyncio.Lock()
 
+# KEYS[1] = bucket; ARGV = emission interval ms, period ms, cost.
+# Returns {allowed, retry_after_ms, tat_offset_ms} using the server clock so
+# replicas with skewed clocks agree.
+GCRA_SCRIPT = """
+local emission = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then tat = now end
+local new_tat = tat + emission * cost
+local allow_at = new_tat - period
+if now < allow_at then
+  return {0, allow_at - now, tat - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.max(1, new_tat - now))
+return {1, 0, new_tat - now}
+"""
+GCRA_SCRIPT_SHA = hashlib.sha1(GCRA_SCRIPT.encode()).hexdigest()
+
+
+class _RespConnection:
+    """One RESP2 connection: send a command, read one reply."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @staticmethod
+    def encode(*args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for a in args:
+            b = a if isinstance(a, bytes) else str(a).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(b), b))
+        return b"".join(out)
+
+    async def _read_reply(self):
+        line = await self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed by server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            n = int(body)
+            if n < 0:
+                return None
+            data = await self.reader.readexactly(n + 2)
+            return data[:-2]
+        if kind == b"*":
+            n = int(body)
+            if n < 0:
+                return None
+            return [await self._read_reply() for _ in range(n)]
+        raise RedisError(f"unexpected reply type {kind!r}")
+
+    async def call(self, *args):
+        self.writer.write(self.encode(*args))
+        await self.writer.drain()
+        return await self._read_reply()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class RedisBackend(RateLimitBackend):
+    def __init__(self, url: str, *, timeout: float = 0.25, pool_size: int = 16, prefix: str = "rl:"):
+        u = urlparse(url)
+        self.host = u.hostname or "127.0.0.1"
+        self.port = u.port or 6379
+        self.password = u.password
+        self.db = int((u.path or "/0").lstrip("/") or 0)
+        self.timeout = timeout
+        self.prefix = prefix
+        self._idle: list[_RespConnection] = []
+        self._slots = asyncio.Semaphore(max(1, pool_size))
+
+    async def _connect(self) -> _RespConnection:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        conn = _RespConnection(reader, writer)
+        try:
+            if self.password:
+                await conn.call("AUTH", self.password)
+            if self.db:
+                await conn.call("SELECT", self.db)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    async def execute(self, *args):
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else None
+            try:
+                if conn is None:
+                    conn = await asyncio.wait_for(self._connect(), self.timeout)
+                reply = await asyncio.wait_for(conn.call(*args), self.timeout)
+            except RedisError:
+                if conn is not None:
+                    self._idle.append(conn)  # error reply: the connection is still in sync
+                raise
+            except BaseException:
+                if conn is not None:
+                    conn.close()  # unknown state (timeout mid-reply etc.): never reuse
+                raise
+            self._idle.append(conn)
+            return reply
+
+    async def hit(self, key: str, limit: int, period: float, cost: int = 1) -> RateLimitResult:
+        period_ms = max(1, int(period * 1000))
+        emission_ms = max(1, period_ms // limit)
+        args = (1, self.prefix + key, emission_ms, period_ms, cost)
+        try:
+            reply = await self.execute("EVALSHA", GCRA_SCRIPT_SHA, *args)
+        except RedisError as e:
+            if not str(e).startswith("NOSCRIPT"):
+                raise
+            reply = await self.execute("EVAL", GCRA_SCRIPT, *args)
+        allowed, retry_ms, offset_ms = (int(x) for x in reply)
+        # the script reports the TAT relative to the server's now
+        return _result(bool(allowed), offset_ms / 1000, 0.0, limit, period, retry_ms / 1000)
+
+    async def reset(self, key: str) -> None:
+        await self.execute("DEL", self.prefix + key)
+
+    async def aclose(self) -> None:
+        while self._idle:
+            conn = self._idle.pop()
+            conn.close()
+            await conn.writer.wait_closed()
+
+
+class FallbackBackend(RateLimitBackend):
+    """Use `primary`; while it is failing, count locally for `cooldown` seconds."""
+
+    def __init__(self, primary: RateLimitBackend, fallback: RateLimitBackend, cooldown: float = 5.0):
+        self.primary = primary
+        self.fallback = fallback
+        self.cooldown = cooldown
+        self._down_until = 0.0
+
+    async def _use(self, method: str, *args):
+        if time.monotonic() >= self._down_until:
+            try:
+                return await getattr(self.primary, method)(*args)
+            except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, RedisError) as e:
+                self._down_until = time.monotonic() + self.cooldown
+                log.warning("rate limit backend unavailable (%s: %s); using local limits for %.0fs",
+                            type(e).__name__, e, self.cooldown)
+        return await getattr(self.fallback, method)(*args)
+
+    async def hit(self, key: str, limit: int, period: float, cost: int = 1) -> RateLimitResult:
+        return await self._use("hit", key, limit, period, cost)
+
+    async def reset(self, key: str) -> None:
+        await self.fallback.reset(key)
+        await self._use("reset", key)
+
+    async def aclose(self) -> None:
+        await self.primary.aclose()
+        await self.fallback.aclose()
+
+
+def build_backend(kind: str = RATE_LIMIT_BACKEND) -> RateLimitBackend:
+    memory = MemoryBackend(RATE_LIMIT_SHARDS, RATE_LIMIT_MAX_KEYS)
+    if kind == "redis":
+        redis = RedisBackend(
+            RATE_LIMIT_REDIS_URL,
+            timeout=RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+            pool_size=RATE_LIMIT_REDIS_POOL_SIZE,
+        )
+        return FallbackBackend(redis, memory)
+    return memory
+
+
+limiter: RateLimitBackend = build_backend()
+
+
+# FastAPI dependencies
 
 def _client_ip(req: Request) -> str:
     return (req.client.host if req.client else "unknown").strip().lower()
 
 
-def _key(ip: str, ident: Optional[str]) -> Tuple[str, str]:
-    ident_norm = (ident or "").strip().lower()
-    return (ip, ident_norm)
+def _bucket(scope: str, *parts: Optional[str]) -> str:
+    # hashed so Redis never holds emails/IPs in clear and keys stay short
+    ident = "|".join((p or "").strip().lower() for p in parts)
+    return f"{scope}:{hashlib.sha256(ident.encode()).hexdigest()[:32]}"
+
+
+async def enforce(bucket: str, limit: int, period: float, detail: str) -> RateLimitResult:
+    res = await limiter.hit(bucket, int(limit), float(period))
+    if not res.allowed:
+        RATE_LIMIT_REJECTIONS.inc(scope=bucket.split(":", 1)[0])
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(res.retry_after)))},
+        )
+    return res
+
+
+def limit_by_ip(scope: str, limit: int, period: float, detail: str = "Too many requests. Try again later."):
+    """Dependency: at most `limit` requests per `period` seconds per client IP."""
+    async def dependency(request: Request) -> None:
+        await enforce(_bucket(scope, _client_ip(request)), limit, period, detail)
+    return dependency
+
+
+def limit_by_user(scope: str, limit: int, period: float, detail: str = "Too many requests. Try again later."):
+    """Dependency: at most `limit` requests per `period` seconds per authenticated user."""
+    async def dependency(current=Depends(get_current_user)) -> None:
+        await enforce(_bucket(scope, str(current.id)), limit, period, detail)
+    return dependency
 
 
 async def login_rate_limit_and_form(
@@ -33,28 +392,12 @@ async def login_rate_limit_and_form(
     to /auth/login per (ip, username).
     Returns the parsed form to the endpoint.
     """
-    ip = _client_ip(request)
-    ident = (form.username or "").strip().lower()
-
-    now = time.time()
-    window = float(LOGIN_WINDOW_SECONDS)
-    max_hits = int(LOGIN_MAX_ATTEMPTS)
-    key = _key(ip, ident)
-
-    async with _lock:
-        dq = _attempts[key]
-        # purge old timestamps
-        while dq and (now - dq[0]) > window:
-            dq.popleft()
-
-        if len(dq) >= max_hits:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Too many login attempts. Try again in a few minutes.",
-            )
-
-        dq.append(now)
-
+    await enforce(
+        _bucket("login", _client_ip(request), form.username),
+        LOGIN_MAX_ATTEMPTS,
+        LOGIN_WINDOW_SECONDS,
+        "Too many login attempts. Try again in a few minutes.",
+    )
     return form
 
 
@@ -63,7 +406,4 @@ async def clear_login_bucket(request: Request, ident: Optional[str]) -> None:
     Clear rate-limit bucket after a successful login to avoid throttling
     the user who just authenticated correctly.
     """
-    ip = _client_ip(request)
-    key = _key(ip, (ident or "").strip().lower())
-    async with _lock:
-        _attempts.pop(key, None)
+    await limiter.reset(_bucket("login", _client_ip(request), ident))
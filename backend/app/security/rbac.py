@@ -5,7 +5,7 @@ from fastapi import Depends, HTTPException, Path, Query
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
-from app.auth_utils import get_current_user
+from app.auth_utils import Principal, get_principal, require_admin  # noqa: F401 (re-exported)
 from app.models.enums import UserRole
 from app.models import User, Job
 from app.models.payments import Payment
@@ -13,35 +13,30 @@ from app.models.payments import Payment
 def _forbidden(msg="Forbidden"):
     raise HTTPException(status_code=403, detail=msg)
 
-# Role guards
-def require_admin(current: User = Depends(get_current_user)) -> User:
-    if current.role != UserRole.admin:
-        _forbidden("Admin only")
-    return current
-
+# Role guards (require_admin lives in auth_utils so both modules share one dependency)
 def require_self_or_admin(
     user_id: str = Path(..., description="Target user id"),
-    current: User = Depends(get_current_user),
+    principal: Principal = Depends(get_principal),
 ) -> User:
-    if current.role == UserRole.admin or str(current.id) == str(user_id):
-        return current
+    if principal.is_admin or str(principal.user_id) == str(user_id):
+        return principal.user
     _forbidden("You can only act on your own account")
 
-def require_customer_self(current: User = Depends(get_current_user)) -> User:
-    if current.role == UserRole.customer:
-        return current
+def require_customer_self(principal: Principal = Depends(get_principal)) -> User:
+    if principal.role == UserRole.customer:
+        return principal.user
     _forbidden("Customers only")
 
-def require_artisan_self(current: User = Depends(get_current_user)) -> User:
-    if current.role == UserRole.artisan:
-        return current
+def require_artisan_self(principal: Principal = Depends(get_principal)) -> User:
+    if principal.is_artisan:
+        return principal.user
     _forbidden("Artisans only")
 
 # Resource access guards
 def require_job_access(
     job_id: str = Path(..., description="Job id"),
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    principal: Principal = Depends(get_principal),
 ) -> Job:
     try:
         jid = uuid.UUID(job_id)
@@ -51,17 +46,19 @@ def require_job_access(
     job = db.get(Job, jid)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    check_job_access(principal, job)
+    return job
 
-    if current.role == UserRole.admin or current.id in (job.customer_id, job.artisan_id):
-        return job
-
-    _forbidden("You are not allowed to access this job")
+def check_job_access(principal: Principal, job: Job) -> None:
+    """The job's customer, its artisan or an admin; plain function for non-HTTP callers."""
+    if not (principal.is_admin or principal.user_id in (job.customer_id, job.artisan_id)):
+        _forbidden("You are not allowed to access this job")
 
 # Use this when the route URL has /{payment_id}
 def require_payment_access_by_path(
     payment_id: str = Path(..., description="Payment id"),
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    principal: Principal = Depends(get_principal),
 ) -> Payment:
     try:
         pid = uuid.UUID(payment_id)
@@ -72,7 +69,7 @@ def require_payment_access_by_path(
     if not p:
         raise HTTPException(status_code=404, detail="Payment not found")
 
-    if current.role == UserRole.admin or current.id in (p.customer_id, p.artisan_id):
+    if principal.is_admin or principal.user_id in (p.customer_id, p.artisan_id):
         return p
 
     _forbidden("You are not allowed to access this payment")
@@ -82,7 +79,7 @@ def require_payment_access_by_query(
     payment_id: str | None = Query(None, description="Payment id"),
     reference: str | None = Query(None, description="Payment reference"),
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    principal: Principal = Depends(get_principal),
 ) -> Payment:
     q = None
     if payment_id:
@@ -100,7 +97,7 @@ def require_payment_access_by_query(
     if not p:
         raise HTTPException(status_code=404, detail="Payment not found")
 
-    if current.role == UserRole.admin or current.id in (p.customer_id, p.artisan_id):
+    if principal.is_admin or principal.user_id in (p.customer_id, p.artisan_id):
         return p
 
     _forbidden("You are not allowed to access this payment")
@@ -0,0 +1,158 @@
+# app/security/revocation.py
+"""
+Revoked-session set for stateless access-token validation (AUTH_STATELESS_TOKENS).
+
+In stateless mode the claims of a valid access token (role, verified flags,
+artisan approval) are trusted for the token's lifetime, so authenticating a
+request needs no DB read. The one thing a token cannot tell is whether its
+session was revoked after it was issued; this set answers that:
+
+- only sessions revoked within the last ACCESS_TOKEN_EXPIRE_MINUTES matter
+  (an older revocation cannot have a live access token), so the set stays
+  small and entries age out on their own
+- a poller thread re-reads `sessions.revoked_at` (indexed) every
+  AUTH_REVOCATION_POLL_SECONDS, overlapping the previous window so rows that
+  committed late are not missed
+- revocations committed by this process (logout, block, account deletion)
+  are added immediately through session_cache.mark_revoked()
+- until the first sync succeeds, or once syncing has failed for longer than
+  AUTH_REVOCATION_MAX_STALENESS_SECONDS, is_fresh() is False and auth falls
+  back to the DB path
+
+The poller also writes back the sliding last_seen_at that the DB path keeps:
+touch() records activity in memory and each cycle persists it in one UPDATE.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    AUTH_REVOCATION_POLL_SECONDS,
+    AUTH_REVOCATION_MAX_STALENESS_SECONDS,
+)
+from app.models.session import Session as UserSession
+from app.observability.metrics import registry
+
+log = logging.getLogger(__name__)
+
+# re-read this much of the previous window: covers commit delays and clock skew between app servers
+SYNC_OVERLAP = timedelta(seconds=30)
+
+_SIZE = registry.gauge("auth_revoked_sessions", "Sessions in the in-memory revocation set.", mode="max")
+_AGE = registry.gauge("auth_revocation_sync_age_seconds", "Seconds since the revocation set last synced.", mode="max")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class RevocationSet:
+    def __init__(self, horizon: timedelta):
+        self.horizon = horizon
+        self._revoked: dict[uuid.UUID, datetime] = {}  # sid -> revoked_at
+        self._touched: dict[uuid.UUID, datetime] = {}  # sid -> last activity not yet persisted
+        self._lock = threading.Lock()
+        self._since: Optional[datetime] = None         # start of the last successful sync window
+        self.synced_at: Optional[float] = None         # time.monotonic() of the last successful sync
+
+    def add(self, sid: uuid.UUID, when: Optional[datetime] = None) -> None:
+        with self._lock:
+            self._revoked[sid] = when or _now()
+            self._touched.pop(sid, None)
+
+    def is_revoked(self, sid: uuid.UUID) -> bool:
+        return sid in self._revoked
+
+    def is_fresh(self, max_staleness: float = AUTH_REVOCATION_MAX_STALENESS_SECONDS) -> bool:
+        return self.synced_at is not None and time.monotonic() - self.synced_at <= max_staleness
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def touch(self, sid: uuid.UUID, when: datetime) -> None:
+        self._touched[sid] = when
+
+    def _prune(self, now: datetime) -> None:
+        cutoff = now - self.horizon
+        with self._lock:
+            for sid in [s for s, at in self._revoked.items() if at < cutoff]:
+                del self._revoked[sid]
+
+    def sync(self, db: Session) -> int:
+        """Pull revocations newer than the last window from `sessions`; returns rows read."""
+        now = _now()
+        since = now - self.horizon if self._since is None else self._since - SYNC_OVERLAP
+        rows = db.execute(
+            select(UserSession.id, UserSession.revoked_at).where(UserSession.revoked_at > since)
+        ).all()
+        with self._lock:
+            for sid, revoked_at in rows:
+                self._revoked[sid] = revoked_at
+        self._since = now
+        self._prune(now)
+        self.synced_at = time.monotonic()
+        return len(rows)
+
+    def flush_touches(self, db: Session) -> int:
+        """Persist last_seen_at for sessions used since the previous flush."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if not touched:
+            return 0
+        db.execute(
+            update(UserSession)
+            .where(UserSession.id.in_(list(touched)), UserSession.revoked_at.is_(None))
+            .values(last_seen_at=max(touched.values()))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return len(touched)
+
+
+revocations = RevocationSet(timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+
+
+def _collect() -> None:
+    _SIZE.set(len(revocations))
+    if revocations.synced_at is not None:
+        _AGE.set(time.monotonic() - revocations.synced_at)
+
+
+registry.register_collector(_collect)
+
+
+def run_sync(session_factory, *, interval: float = AUTH_REVOCATION_POLL_SECONDS, stop: Optional[threading.Event] = None) -> None:
+    """Keep `revocations` in sync until `stop` is set."""
+    stop = stop or threading.Event()
+    while True:
+        db = session_factory()
+        try:
+            revocations.sync(db)
+            revocations.flush_touches(db)
+        except Exception:
+            db.rollback()
+            log.exception("revocation sync failed")
+        finally:
+            db.close()
+        if stop.wait(interval):
+            return
+
+
+def start_sync_thread(session_factory, **kwargs) -> threading.Event:
+    """Run the poller on a daemon thread; set the returned event to stop it."""
+    stop = threading.Event()
+    threading.Thread(
+        target=run_sync, args=(session_factory,), kwargs={**kwargs, "stop": stop},
+        name="revocation-sync", daemon=True,
+    ).start()
+    return stop
@@ -0,0 +1,176 @@
+# app/services/admin_stats_service.py
+"""
+Admin dashboard statistics.
+
+compute_stats() gathers every dashboard number in one statement: one
+single-row aggregate (grouped FILTER counts) per table, cross-joined, so each
+table is scanned once and the DB sees one round trip.
+
+get_snapshot() serves those numbers from a per-process snapshot:
+- recomputed when older than ADMIN_STATS_MAX_AGE_SECONDS (scheduled refresh)
+- recomputed sooner when a committed write touched the counted tables, but at
+  most once per ADMIN_STATS_MIN_REFRESH_SECONDS (write-triggered refresh)
+- only one thread recomputes; concurrent readers get the current snapshot
+- computed on the read replica when DATABASE_READ_URL is set
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event, func, select, true
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.config import ADMIN_STATS_MAX_AGE_SECONDS, ADMIN_STATS_MIN_REFRESH_SECONDS
+from app.db.database import ReadSessionLocal
+from app.models import User, ArtisanProfile, Job, Review
+from app.models.enums import JobStatus, UserRole, VerificationStatus
+from app.models.payments import Payment
+
+
+def compute_stats(db: Session) -> dict:
+    """All dashboard counters in a single query."""
+    users = select(
+        func.count().label("users_total"),
+        func.count().filter(User.role == UserRole.customer).label("customers_total"),
+        func.count().filter(User.role == UserRole.artisan).label("artisans_total"),
+    ).cte("u")
+    profiles = select(
+        func.count().filter(ArtisanProfile.verification_status == VerificationStatus.verified).label("artisans_verified"),
+        func.count().filter(ArtisanProfile.verification_status == VerificationStatus.pending).label("artisans_pending"),
+    ).cte("ap")
+    jobs = select(
+        func.count().label("jobs_total"),
+        *[func.count().filter(Job.status == s).label(f"jobs_{s.value}") for s in JobStatus],
+    ).cte("j")
+    reviews = select(func.count().label("reviews_total")).select_from(Review).cte("r")
+    payments = select(func.coalesce(func.sum(Payment.amount), 0).label("payments_total_amount")).cte("p")
+
+    stmt = (
+        select(users, profiles, jobs, reviews, payments)
+        .select_from(users)
+        .join(profiles, true())
+        .join(jobs, true())
+        .join(reviews, true())
+        .join(payments, true())
+    )
+    row = db.execute(stmt).mappings().one()
+
+    return {
+        "users_total": row["users_total"],
+        "customers_total": row["customers_total"],
+        "artisans_total": row["artisans_total"],
+        "artisans_verified": row["artisans_verified"],
+        "artisans_pending": row["artisans_pending"],
+        "jobs_total": row["jobs_total"],
+        "jobs_by_status": {s: row[f"jobs_{s.value}"] for s in JobStatus},
+        "reviews_total": row["reviews_total"],
+        "payments_total_amount": row["payments_total_amount"],
+    }
+
+
+# snapshot
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    stats: dict
+    computed_at: datetime
+    generation: int       # value of _write_generation when the compute started
+    _monotonic: float
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self._monotonic
+
+
+_snapshot: Optional[StatsSnapshot] = None
+_refresh_lock = threading.Lock()
+_write_generation = 0
+
+
+def _is_stale(snap: StatsSnapshot) -> bool:
+    age = snap.age_seconds
+    if age >= ADMIN_STATS_MAX_AGE_SECONDS:
+        return True
+    return snap.generation != _write_generation and age >= ADMIN_STATS_MIN_REFRESH_SECONDS
+
+
+def _refresh() -> StatsSnapshot:
+    global _snapshot
+    generation = _write_generation
+    db = ReadSessionLocal()
+    try:
+        stats = compute_stats(db)
+    finally:
+        db.close()
+    _snapshot = StatsSnapshot(
+        stats=stats,
+        computed_at=datetime.now(timezone.utc),
+        generation=generation,
+        _monotonic=time.monotonic(),
+    )
+    return _snapshot
+
+
+def get_snapshot(*, force: bool = False) -> StatsSnapshot:
+    """Current stats; recomputes only when stale (or forced), one thread at a time."""
+    snap = _snapshot
+    if snap is not None and not force and not _is_stale(snap):
+        return snap
+    # someone else is refreshing: serve the snapshot we have rather than queueing
+    if not _refresh_lock.acquire(blocking=snap is None or force):
+        return snap
+    try:
+        snap = _snapshot
+        if snap is None or force or _is_stale(snap):
+            snap = _refresh()
+        return snap
+    finally:
+        _refresh_lock.release()
+
+
+def invalidate() -> None:
+    """Mark the snapshot as behind the DB (bulk writes that bypass the ORM should call this)."""
+    global _write_generation
+    _write_generation += 1
+
+
+# write events: bump the generation after commits that can change a counter
+
+_COUNTED = (User, ArtisanProfile, Job, Review, Payment)
+_COUNTED_FIELDS = ("role", "verification_status", "status", "amount")
+_PENDING = "_admin_stats_touched"
+
+
+def _touches_counters(obj) -> bool:
+    state = sa_inspect(obj)
+    return any(
+        key in state.attrs and state.attrs[key].history.has_changes()
+        for key in _COUNTED_FIELDS
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_writes(db: Session, flush_context) -> None:
+    if db.info.get(_PENDING):
+        return
+    if any(isinstance(o, _COUNTED) for o in list(db.new) + list(db.deleted)) or any(
+        isinstance(o, _COUNTED) and _touches_counters(o) for o in db.dirty
+    ):
+        db.info[_PENDING] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_writes(db: Session) -> None:
+    if db.info.pop(_PENDING, None):
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(db: Session) -> None:
+    db.info.pop(_PENDING, None)
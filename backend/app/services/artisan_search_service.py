@@ -0,0 +1,264 @@
+# app/services/artisan_search_service.py
+"""
+Artisan search backed by a per-profile search document.
+
+Every artisan profile carries two derived columns:
+- search_document: lowercased "name category location description" (trigram-indexed,
+  gives typo tolerance via word_similarity / the `<%` operator)
+- search_vector:   weighted tsvector (name A, category/location B, description C)
+
+Both are recomputed in SQL by refresh_search_documents(), which the after_flush hook
+below calls whenever a profile is created or a searchable field (including the owning
+user's full_name) changes. Bulk updates that bypass the ORM must call it themselves.
+
+Nearby search (nearby_artisans) works on the service area instead: the GiST index on
+each profile's coverage box finds the circles that may contain the customer's point,
+and the exact great-circle distance then filters and orders them.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import Float, and_, bindparam, cast, event, func, literal, or_, text, tuple_
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, contains_eager
+
+from app.models import User
+from app.models.artisan import ArtisanProfile, coverage_box
+from app.models.enums import UserRole, VerificationStatus
+
+_PROFILE_FIELDS = ("service_category", "service_location", "service_description", "user_id")
+
+_REFRESH_SQL = """
+    UPDATE artisan_profiles AS ap
+    SET search_document = lower(concat_ws(' ',
+            u.full_name, ap.service_category, ap.service_location, ap.service_description)),
+        search_vector =
+            setweight(to_tsvector('simple', coalesce(u.full_name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(ap.service_category, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(ap.service_location, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(ap.service_description, '')), 'C')
+    FROM users AS u
+    WHERE u.id = ap.user_id
+"""
+
+
+def refresh_search_documents(db: Session, user_ids: Optional[Iterable] = None) -> None:
+    """Recompute search columns for the given artisans (all profiles when user_ids is None)."""
+    if user_ids is None:
+        db.execute(text(_REFRESH_SQL))
+        return
+    ids = sorted(set(user_ids), key=str)
+    if ids:
+        stmt = text(_REFRESH_SQL + " AND ap.user_id IN :ids").bindparams(
+            bindparam("ids", expanding=True)
+        )
+        db.execute(stmt, {"ids": ids})
+
+
+def _query_terms(q: str):
+    norm = " ".join(q.lower().split())
+    # 'simple' matches names/categories verbatim, 'english' matches stemmed descriptions
+    tsq = func.websearch_to_tsquery("simple", norm).op("||")(func.websearch_to_tsquery("english", norm))
+    return norm, tsq
+
+
+def search_artisans(
+    db: Session,
+    *,
+    q: Optional[str] = None,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    status: Optional[VerificationStatus] = None,
+    min_kobo: Optional[int] = None,
+    max_kobo: Optional[int] = None,
+    limit: int = 50,
+    after: Optional[list] = None,
+    offset: int = 0,
+    sort: str = "default",
+) -> tuple[list[User], Optional[list]]:
+    """
+    Return (users with artisan_profile loaded, sort key of the last row or None).
+
+    With sort="rating" rows are ordered best rated first (rating_score, id).
+    Otherwise with `q` they are ordered by relevance (rank, id), without it
+    newest first (created_at, id). `after` is the sort key returned by the
+    previous page.
+    """
+    query = (
+        db.query(User)
+        .join(ArtisanProfile, ArtisanProfile.user_id == User.id)
+        .options(contains_eager(User.artisan_profile))
+        .filter(User.role == UserRole.artisan)
+        .filter(ArtisanProfile.verification_status == (status or VerificationStatus.verified))
+    )
+
+    if category:
+        query = query.filter(ArtisanProfile.service_category == category)
+    if location:
+        # served by the trigram index on service_location
+        query = query.filter(ArtisanProfile.service_location.ilike(f"%{location}%"))
+    if min_kobo is not None:
+        query = query.filter(ArtisanProfile.base_price_kobo >= min_kobo)
+    if max_kobo is not None:
+        query = query.filter(ArtisanProfile.base_price_kobo <= max_kobo)
+
+    q = (q or "").strip()
+    if q:
+        query = _filter_text(query, q)
+    if sort == "rating":
+        return _page_by_rating(query, limit, after, offset)
+    if q:
+        if "@" in q:
+            rank = cast(literal(1.0), Float)
+        else:
+            norm, tsq = _query_terms(q)
+            rank = cast(
+                func.ts_rank_cd(ArtisanProfile.search_vector, tsq)
+                + func.word_similarity(norm, ArtisanProfile.search_document),
+                Float,
+            )
+        if after:
+            r, last_id = float(after[0]), uuid.UUID(after[1])
+            query = query.filter(or_(rank < r, and_(rank == r, ArtisanProfile.id < last_id)))
+        query = query.add_columns(rank).order_by(rank.desc(), ArtisanProfile.id.desc())
+        rows = query.limit(limit).offset(0 if after else offset).all()
+        users = [u for u, _ in rows]
+        last = [rows[-1][1], str(rows[-1][0].artisan_profile.id)] if len(rows) == limit else None
+        return users, last
+
+    if after:
+        ts, last_id = datetime.fromisoformat(after[0]), uuid.UUID(after[1])
+        query = query.filter(
+            tuple_(ArtisanProfile.created_at, ArtisanProfile.id) < (ts, last_id)
+        )
+    users = (
+        query.order_by(ArtisanProfile.created_at.desc(), ArtisanProfile.id.desc())
+        .limit(limit)
+        .offset(0 if after else offset)
+        .all()
+    )
+    last = None
+    if len(users) == limit:
+        p = users[-1].artisan_profile
+        last = [p.created_at.isoformat(), str(p.id)]
+    return users, last
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Haversine great-circle distance in km, as a SQL expression."""
+    a = (
+        func.power(func.sin(func.radians(lat2 - lat1) / 2.0), 2)
+        + func.cos(func.radians(lat1)) * func.cos(func.radians(lat2))
+        * func.power(func.sin(func.radians(lon2 - lon1) / 2.0), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a)))
+
+
+def nearby_artisans(
+    db: Session,
+    *,
+    lat: float,
+    lon: float,
+    category: Optional[str] = None,
+    limit: int = 20,
+    after: Optional[list] = None,
+) -> tuple[list[tuple[User, float]], Optional[list]]:
+    """
+    Return ([(user with artisan_profile loaded, distance in km)], sort key of the last
+    row or None) for verified artisans whose service area covers (lat, lon), nearest first.
+    """
+    lat_p = bindparam("near_lat", lat, type_=Float)
+    lon_p = bindparam("near_lon", lon, type_=Float)
+    here = func.box(func.point(lon_p, lat_p), func.point(lon_p, lat_p))
+    dist = cast(distance_km(lat_p, lon_p, ArtisanProfile.latitude, ArtisanProfile.longitude), Float)
+
+    query = (
+        db.query(User, dist)
+        .join(ArtisanProfile, ArtisanProfile.user_id == User.id)
+        .options(contains_eager(User.artisan_profile))
+        .filter(User.role == UserRole.artisan)
+        .filter(ArtisanProfile.verification_status == VerificationStatus.verified)
+        # index probe: coverage boxes containing the point (a superset of the circles)
+        .filter(
+            coverage_box(
+                ArtisanProfile.latitude, ArtisanProfile.longitude, ArtisanProfile.service_radius_km
+            ).op("@>")(here)
+        )
+        # exact: the point is within the artisan's radius
+        .filter(dist <= ArtisanProfile.service_radius_km)
+    )
+    if category:
+        query = query.filter(ArtisanProfile.service_category == category)
+    if after:
+        d, last_id = float(after[0]), uuid.UUID(after[1])
+        query = query.filter(or_(dist > d, and_(dist == d, ArtisanProfile.id > last_id)))
+
+    rows = query.order_by(dist, ArtisanProfile.id).limit(limit).all()
+    last = [rows[-1][1], str(rows[-1][0].artisan_profile.id)] if len(rows) == limit else None
+    return [(u, d) for u, d in rows], last
+
+
+def _filter_text(query, q: str):
+    if "@" in q:
+        # emails are stored lowercased; an exact match uses the unique index
+        return query.filter(User.email == q.lower())
+    norm, tsq = _query_terms(q)
+    return query.filter(
+        or_(
+            ArtisanProfile.search_vector.op("@@")(tsq),
+            literal(norm).op("<%")(ArtisanProfile.search_document),
+        )
+    )
+
+
+def _page_by_rating(query, limit: int, after: Optional[list], offset: int):
+    # served by the (verification_status, rating_score, id) index, walked backwards
+    if after:
+        score, last_id = float(after[0]), uuid.UUID(after[1])
+        query = query.filter(
+            tuple_(ArtisanProfile.rating_score, ArtisanProfile.id) < (score, last_id)
+        )
+    users = (
+        query.order_by(ArtisanProfile.rating_score.desc(), ArtisanProfile.id.desc())
+        .limit(limit)
+        .offset(0 if after else offset)
+        .all()
+    )
+    last = None
+    if len(users) == limit:
+        p = users[-1].artisan_profile
+        last = [p.rating_score, str(p.id)]
+    return users, last
+
+
+# keep search columns current on ORM writes
+
+def _searchable_change(obj, fields) -> bool:
+    state = sa_inspect(obj)
+    return any(state.attrs[key].history.has_changes() for key in fields)
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_on_flush(db: Session, flush_context) -> None:
+    ids = set()
+    for obj in db.new:
+        if isinstance(obj, ArtisanProfile):
+            ids.add(obj.user_id)
+    for obj in db.dirty:
+        if isinstance(obj, ArtisanProfile) and _searchable_change(obj, _PROFILE_FIELDS):
+            ids.add(obj.user_id)
+        elif (
+            isinstance(obj, User)
+            and obj.role == UserRole.artisan
+            and _searchable_change(obj, ("full_name",))
+        ):
+            ids.add(obj.id)
+    if ids:
+        refresh_search_documents(db, ids)
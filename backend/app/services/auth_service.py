@@ -7,10 +7,10 @@ from uuid import UUID
 from datetime import datetime, timedelta, timezone
 from typing import Tuple, Optional
 
+from fastapi.concurrency import run_in_threadpool
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, update
 
 from app.config import (
     SECRET_KEY,
@@ -25,18 +25,13 @@ from app.models.token import RefreshToken
 from app.models import User, Wallet, ArtisanProfile, RefreshToken
 from app.models.enums import UserRole, VerificationStatus
 from app.models.session import Session as UserSession
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-# password helpers
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
-
+from app.services import session_cache
+from app.security.pii import phone_bidx, set_phone, set_nin
+from app.security.passwords import (
+    hash_password,
+    verify_and_update,
+    verify_and_update_async,
+)
 
 # time / ids
 def _now() -> datetime:
@@ -65,11 +60,18 @@ def revoke_session(db: Session, sid: uuid.UUID) -> None:
 
 
 def revoke_all_sessions_for_user(db: Session, user_id: UUID) -> None:
-    db.query(UserSession).filter(
-        UserSession.user_id == user_id,
-        UserSession.revoked_at.is_(None)
-    ).update({UserSession.revoked_at: _now()}, synchronize_session=False)
+    revoked = db.execute(
+        update(UserSession)
+        .where(UserSession.user_id == user_id, UserSession.revoked_at.is_(None))
+        .values(revoked_at=_now())
+        .returning(UserSession.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
     db.commit()
+    # bulk UPDATE bypasses the ORM hooks: force every cached session of this user back to the DB
+    session_cache.invalidate_user(user_id)
+    for sid in revoked:
+        session_cache.mark_revoked(sid)
 
 
 def _get_or_create_active_session(db: Session, user: User) -> UserSession:
@@ -98,6 +100,7 @@ def create_access_token(user: User, sid: str) -> str:
     jti = _generate_jti()
     iat = int(_now().timestamp())
     exp = int((_now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)).timestamp())
+    profile = user.artisan_profile if user.role == UserRole.artisan else None
     payload = {
         "iss": JWT_ISSUER,
         "aud": JWT_AUDIENCE,
@@ -108,6 +111,10 @@ def create_access_token(user: User, sid: str) -> str:
         "iat": iat,
         "exp": exp,
         "typ": "access",
+        # trusted by the stateless auth path (AUTH_STATELESS_TOKENS) until exp
+        "email_verified": bool(user.email_verified),
+        "phone_verified": bool(user.phone_verified),
+        "artisan_approved": profile is not None and profile.verification_status == VerificationStatus.verified,
     }
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
@@ -156,14 +163,37 @@ def create_refresh_token(db: Session, user: User) -> str:
 
 
 # auth core 
+def _login_allowed(user: User) -> bool:
+    return getattr(user, "is_active", True) and not getattr(user, "is_blocked", False)
+
+
 def authenticate_user(db: Session, email: str, password: str) -> User | None:
     user = db.query(User).filter(User.email == email).first()
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    ok, new_hash = verify_and_update(password, user.password_hash)
+    if not ok or not _login_allowed(user):
         return None
-    if not getattr(user, "is_active", True) or getattr(user, "is_blocked", False):
+    if new_hash:
+        user.password_hash = new_hash  # cost changed (BCRYPT_ROUNDS): upgrade in place
+        db.commit()
+    return user
+
+
+async def authenticate_user_async(db: Session, email: str, password: str) -> User | None:
+    """
+    authenticate_user for async routes: the sync DB calls run in the threadpool
+    and bcrypt on the password pool, so the event loop is never blocked.
+    """
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == email).first())
+    if not user:
+        return None
+    ok, new_hash = await verify_and_update_async(password, user.password_hash)
+    if not ok or not _login_allowed(user):
         return None
+    if new_hash:
+        user.password_hash = new_hash
+        await run_in_threadpool(db.commit)
     return user
 
 
@@ -237,7 +267,18 @@ def revoke_all_refresh_tokens_for_user(db: Session, user_id: UUID) -> None:
     db.commit()
 
 
-# signup helpers 
+# signup helpers (phone / nin arrive in plaintext; stored encrypted with blind indexes)
+def phone_in_use(db: Session, phone: str, *, exclude_user_id=None) -> bool:
+    """Exact-match lookup on the phone blind index (no decryption)."""
+    bidx = phone_bidx(phone)
+    if not bidx:
+        return False
+    q = db.query(User.id).filter(User.phone_bidx == bidx)
+    if exclude_user_id is not None:
+        q = q.filter(User.id != exclude_user_id)
+    return q.first() is not None
+
+
 def create_customer(
     db: Session,
     *,
@@ -250,18 +291,18 @@ def create_customer(
     # uniqueness checks
     if db.query(User).filter(User.email == email).first():
         raise ValueError("Email already exists")
-    if phone and db.query(User).filter(User.phone_number == phone).first():
+    if phone and phone_in_use(db, phone):
         raise ValueError("Phone already exists")
 
     user = User(
         full_name=full_name,
         email=email,
-        phone_number=phone,
         password_hash=hash_password(password),
-        nin=nin,
         role=UserRole.customer,
         is_active=True,
     )
+    set_phone(user, phone)
+    set_nin(user, nin)
     db.add(user)
     db.flush()
     db.add(Wallet(user_id=user.id, balance_kobo=0))
@@ -284,18 +325,18 @@ def create_artisan(
 ) -> User:
     if db.query(User).filter(User.email == email).first():
         raise ValueError("Email already exists")
-    if phone and db.query(User).filter(User.phone_number == phone).first():
+    if phone and phone_in_use(db, phone):
         raise ValueError("Phone already exists")
 
     user = User(
         full_name=full_name,
         email=email,
-        phone_number=phone,
         password_hash=hash_password(password),
-        nin=nin,
         role=UserRole.artisan,
         is_active=True,
     )
+    set_phone(user, phone)
+    set_nin(user, nin)
     db.add(user)
     db.flush()
     db.add(Wallet(user_id=user.id, balance_kobo=0))
@@ -0,0 +1,136 @@
+# app/services/bank_directory.py
+"""
+Cached Paystack bank directory (GET /bank?currency=NGN&type=nuban).
+
+The list changes a few times a year, so it is fetched once per process and:
+- refreshed in the background every PAYSTACK_BANKS_TTL_SECONDS (run_refresh_loop,
+  started on app startup); a request that finds it expired triggers one
+  refresh and is served the cached copy meanwhile
+- served stale for up to PAYSTACK_BANKS_MAX_STALE_SECONDS while Paystack errors
+  (stale-while-revalidate); only a cold cache makes a request wait on Paystack
+- tagged with a content ETag so clients can revalidate with If-None-Match
+
+bank_by_code() answers name/code lookups (recipient setup) from the same copy.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.config import PAYSTACK_BANKS_TTL_SECONDS, PAYSTACK_BANKS_MAX_STALE_SECONDS
+from app.services import paystack_client
+
+log = logging.getLogger(__name__)
+
+# retry delay for the background loop after a failed refresh
+RETRY_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class BankDirectory:
+    body: dict            # Paystack's response body, returned as-is by /payouts/banks
+    etag: str
+    fetched_at: float     # time.monotonic()
+    by_code: dict = field(default_factory=dict)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    @property
+    def banks(self) -> list[dict]:
+        return self.body.get("data") or []
+
+
+_directory: Optional[BankDirectory] = None
+_refresh_lock = asyncio.Lock()
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def _build(body: dict) -> BankDirectory:
+    raw = json.dumps(body, sort_keys=True, separators=(",", ":")).encode()
+    etag = '"' + hashlib.sha256(raw).hexdigest()[:32] + '"'
+    by_code = {str(b.get("code")): b for b in (body.get("data") or []) if b.get("code")}
+    return BankDirectory(body=body, etag=etag, fetched_at=time.monotonic(), by_code=by_code)
+
+
+async def refresh() -> BankDirectory:
+    """Fetch the list from Paystack (one fetch at a time per process)."""
+    global _directory
+    started = time.monotonic()
+    async with _refresh_lock:
+        # another caller refreshed while we waited
+        if _directory is not None and _directory.fetched_at >= started:
+            return _directory
+        rsp = await paystack_client.get("/bank", params={"currency": "NGN", "type": "nuban"}, endpoint="bank")
+        if rsp.status_code != 200:
+            raise HTTPException(status_code=502, detail=f"Paystack banks failed: {rsp.text}")
+        body = rsp.json()
+        if not isinstance(body, dict) or not isinstance(body.get("data"), list):
+            raise HTTPException(status_code=502, detail="Paystack banks returned an unexpected body")
+        _directory = _build(body)
+        return _directory
+
+
+def _refresh_in_background() -> None:
+    global _refresh_task
+    if _refresh_task is not None and not _refresh_task.done():
+        return
+
+    async def _run():
+        try:
+            await refresh()
+        except HTTPException as e:
+            log.warning("bank directory refresh failed, serving stale copy: %s", e.detail)
+
+    _refresh_task = asyncio.get_running_loop().create_task(_run())
+
+
+async def get_directory() -> BankDirectory:
+    """
+    Current directory. Fresh copies return immediately; expired ones are served
+    while a background refresh runs; past max-stale (or cold) we wait on Paystack.
+    """
+    d = _directory
+    if d is None:
+        return await refresh()
+    age = d.age_seconds
+    if age < PAYSTACK_BANKS_TTL_SECONDS:
+        return d
+    if age < PAYSTACK_BANKS_MAX_STALE_SECONDS:
+        _refresh_in_background()
+        return d
+    try:
+        return await refresh()
+    except HTTPException:
+        log.warning("bank directory is %ds old and Paystack is failing; serving it anyway", int(age))
+        return d
+
+
+async def bank_by_code(code: str) -> Optional[dict]:
+    """Bank entry for a bank code, or None if unknown. Raises only when no copy was ever loaded."""
+    d = await get_directory()
+    return d.by_code.get(str(code).strip())
+
+
+async def run_refresh_loop() -> None:
+    """Keep the directory warm: refresh every TTL (sooner after a failure)."""
+    while True:
+        try:
+            await refresh()
+            delay = PAYSTACK_BANKS_TTL_SECONDS
+        except HTTPException as e:
+            log.warning("bank directory refresh failed: %s", e.detail)
+            delay = RETRY_SECONDS
+        except Exception:
+            log.exception("bank directory refresh crashed")
+            delay = RETRY_SECONDS
+        await asyncio.sleep(delay)
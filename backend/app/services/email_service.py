@@ -1,21 +1,102 @@
 # app/services/email_service.py
 from __future__ import annotations
 import smtplib, ssl
+import threading
+import time
+from contextlib import contextmanager
 from email.message import EmailMessage
 from typing import Optional
 from app.config import (
     SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD,
-    SMTP_FROM_EMAIL, SMTP_FROM_NAME
+    SMTP_FROM_EMAIL, SMTP_FROM_NAME,
+    SMTP_POOL_SIZE, SMTP_MAX_IDLE_SECONDS, SMTP_MAX_MESSAGES_PER_CONN,
 )
+from app.observability.metrics import observe_external
 
-def send_email(to_email: str, subject: str, html: str, text: Optional[str] = None) -> None:
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
     """
-    Sends an email using Gmail SMTP (App Password).
-    Raises an exception if sending fails.
+    Keeps up to `size` logged-in SMTP connections open so each message skips the
+    connect + STARTTLS + AUTH handshake. Connections idle longer than
+    SMTP_MAX_IDLE_SECONDS, or that sent SMTP_MAX_MESSAGES_PER_CONN messages, are
+    closed instead of reused (servers drop idle sessions and cap per-session sends).
     """
-    if not (SMTP_HOST and SMTP_PORT and SMTP_USERNAME and SMTP_PASSWORD and SMTP_FROM_EMAIL):
-        raise RuntimeError("SMTP not configured. Check SMTP_* env in .env")
 
+    def __init__(self, size: int = SMTP_POOL_SIZE):
+        self.size = max(1, size)
+        self._idle: list[_PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _connect(self) -> _PooledConnection:
+        context = ssl.create_default_context()
+        smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
+        try:
+            smtp.ehlo()
+            smtp.starttls(context=context)
+            smtp.ehlo()
+            smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+        except Exception:
+            smtp.close()
+            raise
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _discard(conn: _PooledConnection) -> None:
+        try:
+            conn.smtp.quit()
+        except Exception:
+            conn.smtp.close()
+
+    def _checkout(self) -> _PooledConnection:
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if time.monotonic() - conn.last_used < SMTP_MAX_IDLE_SECONDS:
+                    return conn
+                self._discard(conn)
+        return self._connect()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it goes back to the pool only if the block succeeded."""
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn.smtp
+            except Exception:
+                self._discard(conn)
+                raise
+            conn.sent += 1
+            conn.last_used = time.monotonic()
+            if conn.sent >= SMTP_MAX_MESSAGES_PER_CONN:
+                self._discard(conn)
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._discard(conn)
+
+
+smtp_pool = SMTPPool()
+
+
+def smtp_configured() -> bool:
+    return bool(SMTP_HOST and SMTP_PORT and SMTP_USERNAME and SMTP_PASSWORD and SMTP_FROM_EMAIL)
+
+
+def build_message(to_email: str, subject: str, html: str, text: Optional[str] = None) -> EmailMessage:
     msg = EmailMessage()
     msg["Subject"] = subject
     msg["From"] = f"{SMTP_FROM_NAME} <{SMTP_FROM_EMAIL}>"
@@ -26,11 +107,31 @@ def send_email(to_email: str, subject: str, html: str, text: Optional[str] = Non
         text = "Please view this email in an HTML-capable client."
     msg.set_content(text)
     msg.add_alternative(html, subtype="html")
+    return msg
+
+
+def send_email(to_email: str, subject: str, html: str, text: Optional[str] = None) -> None:
+    """
+    Sends an email using Gmail SMTP (App Password) over a pooled connection.
+    Raises an exception if sending fails.
+
+    Request handlers should not call this directly; use
+    outbound_queue.enqueue_email() and let the worker deliver it.
+    """
+    if not smtp_configured():
+        raise RuntimeError("SMTP not configured. Check SMTP_* env in .env")
 
-    context = ssl.create_default_context()
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30) as smtp:
-        smtp.ehlo()
-        smtp.starttls(context=context)
-        smtp.ehlo()
-        smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
-        smtp.send_message(msg)
+    msg = build_message(to_email, subject, html, text)
+    t0 = time.perf_counter()
+    try:
+        try:
+            with smtp_pool.connection() as smtp:
+                smtp.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # a pooled connection the server had already dropped; one fresh attempt
+            with smtp_pool.connection() as smtp:
+                smtp.send_message(msg)
+    except Exception:
+        observe_external("smtp", "send", t0, "error")
+        raise
+    observe_external("smtp", "send", t0)
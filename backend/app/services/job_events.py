@@ -0,0 +1,289 @@
+# app/services/job_events.py
+"""
+Job status push: JobStatusHistory transitions streamed to the customer and
+artisan on a job (SSE at GET /jobs/status/{job_id}/events, WebSocket at
+/jobs/status/{job_id}/ws) instead of polling GET /jobs/status/{job_id}.
+
+Bus: publish() runs pg_notify(JOB_EVENTS_CHANNEL, <json>) inside the
+caller's transaction, so an event goes out only if the status change commits,
+and Postgres delivers it to every worker. Each worker holds one asyncpg
+connection outside the pool that LISTENs on the channel (opened with the
+first subscriber, reconnected with backoff) and hands events to its local
+subscribers by job id. Other modules put their own channels on the same
+connection with hub.add_channel() (read_cache invalidations) rather than
+opening another listener.
+
+Memory per subscriber is a small bounded buffer (JOB_EVENTS_QUEUE_SIZE events).
+A subscriber that falls that far behind loses its backlog and gets a single
+"resync" event; so does everyone when the listener (re)connects, because
+NOTIFYs sent while it was down are lost. On "resync" a client re-reads
+GET /jobs/status/{job_id}. Streams end after a terminal status (completed,
+cancelled). Beyond JOB_EVENTS_MAX_SUBSCRIBERS per worker new subscriptions
+get 503 and clients fall back to polling.
+
+Open streams keep uvicorn from finishing a graceful shutdown; run it with
+--timeout-graceful-shutdown so they are cut after a few seconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import asyncpg
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import (
+    JOB_EVENTS_CHANNEL,
+    JOB_EVENTS_QUEUE_SIZE,
+    JOB_EVENTS_HEARTBEAT_SECONDS,
+    JOB_EVENTS_MAX_SUBSCRIBERS,
+)
+from app.db.database import asyncpg_connect_params
+from app.models.enums import JobStatus
+from app.observability.metrics import registry
+
+log = logging.getLogger(__name__)
+
+TERMINAL = {JobStatus.completed.value, JobStatus.cancelled.value}
+RESYNC = {"type": "resync"}
+
+_SUBSCRIBERS = registry.gauge("job_event_subscribers", "Open job status streams (SSE + WebSocket).")
+_EVENTS = registry.counter("job_events_total", "Job status events handed to subscribers.", ("outcome",))
+
+
+def _value(status) -> Optional[str]:
+    return getattr(status, "value", status)
+
+
+def publish(db: Session, job_id, old, new, changed_by_id=None) -> None:
+    """Queue a status event in the current transaction (sent on commit, dropped on rollback)."""
+    payload = {
+        "type": "status",
+        "job_id": str(job_id),
+        "old_status": _value(old),
+        "new_status": _value(new),
+        "changed_by": str(changed_by_id) if changed_by_id else None,
+        "at": datetime.now(timezone.utc).isoformat(),
+    }
+    db.execute(select(func.pg_notify(JOB_EVENTS_CHANNEL, json.dumps(payload))))
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Subscription:
+    # a deque + one future per wait instead of asyncio.Queue + wait_for (which adds a task per wait)
+    __slots__ = ("job_id", "size", "events", "_waiter")
+
+    def __init__(self, job_id: str, size: int):
+        self.job_id = job_id
+        self.size = size
+        self.events: deque = deque()
+        self._waiter: Optional[asyncio.Future] = None
+
+    def offer(self, event: dict) -> None:
+        if len(self.events) >= self.size:
+            # too slow: drop the backlog, tell the client to re-read the status
+            self.events.clear()
+            self.events.append(RESYNC)
+            _EVENTS.inc(outcome="dropped")
+        else:
+            self.events.append(event)
+            _EVENTS.inc(outcome="delivered")
+        if self._waiter is not None:
+            _wake(self._waiter)
+
+    async def next(self, timeout: float) -> Optional[dict]:
+        """Next event, or None after `timeout` seconds without one."""
+        if not self.events:
+            loop = asyncio.get_running_loop()
+            self._waiter = loop.create_future()
+            timer = loop.call_later(timeout, _wake, self._waiter)
+            try:
+                await self._waiter
+            finally:
+                timer.cancel()
+                self._waiter = None
+            if not self.events:
+                return None
+        return self.events.popleft()
+
+
+class JobEventHub:
+    def __init__(self, *, max_subscribers: int, queue_size: int, listen: bool = True):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.listen = listen
+        self._subs: dict[str, set[Subscription]] = {}
+        self._count = 0
+        self._channels: dict[str, tuple[Callable[[str], None], Optional[Callable[[], None]]]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._conn = None
+        self._closing = False
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add_channel(
+        self, channel: str, on_notify: Callable[[str], None], on_reset: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Also LISTEN on `channel`: on_notify(payload) per notification, on_reset()
+        when the listener connects or loses its connection (notifications sent
+        meanwhile are lost). Register before the listener starts.
+        """
+        self._channels[channel] = (on_notify, on_reset)
+
+    def start(self) -> None:
+        """Start the listener on the running loop unless it is already up (the first subscribe() does this)."""
+        if self.listen and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    def check_capacity(self) -> None:
+        if self._count >= self.max_subscribers:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many live status streams; poll /jobs/status instead.",
+                headers={"Retry-After": "30"},
+            )
+
+    def subscribe(self, job_id) -> Subscription:
+        self.check_capacity()
+        sub = Subscription(str(job_id), self.queue_size)
+        self._subs.setdefault(sub.job_id, set()).add(sub)
+        self._count += 1
+        self.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subs.get(sub.job_id)
+        if subs is None or sub not in subs:
+            return
+        subs.discard(sub)
+        self._count -= 1
+        if not subs:
+            del self._subs[sub.job_id]
+
+    def dispatch(self, event: dict) -> int:
+        subs = self._subs.get(event.get("job_id"), ())
+        for sub in subs:
+            sub.offer(event)
+        return len(subs)
+
+    def resync_all(self) -> None:
+        for subs in self._subs.values():
+            for sub in subs:
+                sub.offer(RESYNC)
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            log.warning("ignoring malformed job event: %.200s", payload)
+            return
+        self.dispatch(event)
+
+    def _on_channel(self, conn, pid, channel, payload) -> None:
+        try:
+            self._channels[channel][0](payload)
+        except Exception:
+            log.exception("notification handler failed for channel %s", channel)
+
+    def _reset_channels(self) -> None:
+        for _, on_reset in self._channels.values():
+            if on_reset is not None:
+                on_reset()
+
+    async def _listen(self) -> None:
+        backoff = 1.0
+        while not self._closing:
+            lost = asyncio.Event()
+            try:
+                dsn, kwargs = asyncpg_connect_params()
+                self._conn = await asyncpg.connect(dsn, **kwargs)
+                self._conn.add_termination_listener(lambda _conn: lost.set())
+                await self._conn.add_listener(JOB_EVENTS_CHANNEL, self._on_notify)
+                for channel in self._channels:
+                    await self._conn.add_listener(channel, self._on_channel)
+                backoff = 1.0
+                # anything published before LISTEN took effect was missed
+                self.resync_all()
+                self._reset_channels()
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), 30)
+                    except asyncio.TimeoutError:
+                        await self._conn.execute("SELECT 1")  # notices half-open connections
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.warning("job events listener disconnected; retrying in %.0fs", backoff, exc_info=True)
+            finally:
+                conn, self._conn = self._conn, None
+                if conn is not None and not conn.is_closed():
+                    try:
+                        await asyncio.wait_for(conn.close(), 2)
+                    except Exception:
+                        conn.terminate()
+                self._reset_channels()
+            if not self._closing:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def aclose(self) -> None:
+        self._closing = True
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+hub = JobEventHub(max_subscribers=JOB_EVENTS_MAX_SUBSCRIBERS, queue_size=JOB_EVENTS_QUEUE_SIZE)
+
+
+def _collect() -> None:
+    _SUBSCRIBERS.set(len(hub))
+
+
+registry.register_collector(_collect)
+
+
+async def stream(
+    job_id,
+    snapshot: Callable[[], Awaitable[Optional[dict]]],
+    *,
+    heartbeat: float = JOB_EVENTS_HEARTBEAT_SECONDS,
+    events: JobEventHub = hub,
+) -> AsyncIterator[Optional[dict]]:
+    """
+    Subscribe, then yield the current status from `snapshot()` followed by
+    live events; None means "nothing for `heartbeat` seconds" (send a ping).
+    Subscribing before reading the snapshot means no transition is missed.
+    """
+    sub = events.subscribe(job_id)
+    try:
+        current = await snapshot()
+        if current is None:
+            return
+        yield current
+        if current.get("new_status") in TERMINAL:
+            return
+        while True:
+            event = await sub.next(heartbeat)
+            yield event
+            if event is not None and event.get("new_status") in TERMINAL:
+                return
+    finally:
+        events.unsubscribe(sub)
@@ -0,0 +1,281 @@
+# app/services/outbound_queue.py
+"""
+Durable outbound email/SMS queue (table outbound_messages).
+
+Request handlers call enqueue_email() / enqueue_sms_code(), which only insert a
+row, and return; a worker (scripts/run_outbound_worker.py, or an in-process
+thread when OUTBOUND_WORKER_IN_PROCESS is set) delivers them:
+
+- claim:   SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers can run;
+           a claimed row is leased for OUTBOUND_LEASE_SECONDS and picked up
+           again if its worker died mid-send
+- deliver: email over the pooled SMTP connections (email_service.smtp_pool),
+           SMS via Twilio Verify; a small thread pool sends a batch concurrently
+- retry:   exponential backoff with jitter up to OUTBOUND_BACKOFF_MAX_SECONDS
+- dead:    permanent errors (bad address/number, Twilio 4xx) and messages out of
+           attempts move to status 'dead'; requeue_dead() puts them back
+
+Recipients and bodies (which carry OTPs) are stored Fernet-encrypted.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import (
+    OUTBOUND_MAX_ATTEMPTS,
+    OUTBOUND_BACKOFF_BASE_SECONDS,
+    OUTBOUND_BACKOFF_MAX_SECONDS,
+    OUTBOUND_LEASE_SECONDS,
+)
+from app.models.outbound_message import (
+    OutboundMessage,
+    OUTBOUND_PENDING,
+    OUTBOUND_SENDING,
+    OUTBOUND_SENT,
+    OUTBOUND_DEAD,
+)
+from app.services.auth_service import _now
+from app.services.email_service import send_email
+from app.services.sms_service import send_phone_code, SmsSendError
+from app.utils import encrypt_str, decrypt_str
+
+log = logging.getLogger(__name__)
+
+CHANNEL_EMAIL = "email"
+CHANNEL_SMS = "sms"
+
+
+class PermanentDeliveryError(Exception):
+    """Retrying cannot help; the message goes straight to 'dead'."""
+
+
+# enqueue (request side)
+
+def _enqueue(db: Session, channel: str, kind: str, recipient: str, payload: Optional[dict], commit: bool) -> OutboundMessage:
+    msg = OutboundMessage(
+        channel=channel,
+        kind=kind,
+        recipient=encrypt_str(recipient),
+        payload=encrypt_str(json.dumps(payload)) if payload is not None else None,
+        status=OUTBOUND_PENDING,
+        attempts=0,
+        max_attempts=OUTBOUND_MAX_ATTEMPTS,
+        next_attempt_at=_now(),
+    )
+    db.add(msg)
+    if commit:
+        db.commit()
+    return msg
+
+
+def enqueue_email(
+    db: Session,
+    to_email: str,
+    subject: str,
+    html: str,
+    text: Optional[str] = None,
+    *,
+    kind: str,
+    commit: bool = True,
+) -> OutboundMessage:
+    return _enqueue(db, CHANNEL_EMAIL, kind, to_email, {"subject": subject, "html": html, "text": text}, commit)
+
+
+def enqueue_sms_code(db: Session, phone: str, *, kind: str = "phone_verify", commit: bool = True) -> OutboundMessage:
+    """Queue a Twilio Verify code for `phone` (Twilio generates and checks the code)."""
+    return _enqueue(db, CHANNEL_SMS, kind, phone, None, commit)
+
+
+# worker side
+
+def _backoff_seconds(attempts: int) -> float:
+    ceiling = min(OUTBOUND_BACKOFF_MAX_SECONDS, OUTBOUND_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def claim_batch(db: Session, limit: int) -> list[tuple]:
+    """
+    Lease up to `limit` due messages. Returns (id, channel, recipient, payload)
+    tuples with plaintext fields, so delivery needs no session.
+    """
+    now = _now()
+    rows = db.execute(
+        select(OutboundMessage)
+        .where(or_(
+            and_(OutboundMessage.status == OUTBOUND_PENDING, OutboundMessage.next_attempt_at <= now),
+            and_(OutboundMessage.status == OUTBOUND_SENDING, OutboundMessage.locked_until < now),
+        ))
+        .order_by(OutboundMessage.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    claimed = []
+    for m in rows:
+        if m.status == OUTBOUND_SENDING and m.attempts >= m.max_attempts:
+            # its last attempt never reported back
+            m.status = OUTBOUND_DEAD
+            m.last_error = (m.last_error or "") + " [lease expired on final attempt]"
+            continue
+        m.status = OUTBOUND_SENDING
+        m.attempts += 1
+        m.locked_until = now + timedelta(seconds=OUTBOUND_LEASE_SECONDS)
+        payload = json.loads(decrypt_str(m.payload)) if m.payload else None
+        claimed.append((m.id, m.channel, decrypt_str(m.recipient), payload))
+    db.commit()
+    return claimed
+
+
+def deliver(channel: str, recipient: str, payload: Optional[dict]) -> None:
+    """Send one message; raises PermanentDeliveryError when retrying is pointless."""
+    try:
+        if channel == CHANNEL_EMAIL:
+            send_email(recipient, payload["subject"], payload["html"], payload.get("text"))
+        elif channel == CHANNEL_SMS:
+            send_phone_code(recipient)
+        else:
+            raise PermanentDeliveryError(f"unknown channel {channel!r}")
+    except SmsSendError as e:
+        if not e.retryable:
+            raise PermanentDeliveryError(str(e)) from e
+        raise
+    except smtplib.SMTPRecipientsRefused as e:
+        raise PermanentDeliveryError(f"recipient refused: {e.recipients}") from e
+    except (KeyError, TypeError) as e:
+        raise PermanentDeliveryError(f"malformed payload: {e!r}") from e
+    except ValueError as e:
+        # phone normalisation and other input errors
+        raise PermanentDeliveryError(str(e)) from e
+
+
+def record_result(db: Session, msg_id, error: Optional[BaseException]) -> None:
+    m = db.get(OutboundMessage, msg_id)
+    if m is None:
+        return
+    m.locked_until = None
+    if error is None:
+        m.status = OUTBOUND_SENT
+        m.sent_at = _now()
+        m.last_error = None
+    elif isinstance(error, PermanentDeliveryError) or m.attempts >= m.max_attempts:
+        m.status = OUTBOUND_DEAD
+        m.last_error = f"{type(error).__name__}: {error}"[:2000]
+        log.warning("outbound %s (%s) dead after %d attempt(s): %s", m.id, m.kind, m.attempts, m.last_error)
+    else:
+        m.status = OUTBOUND_PENDING
+        m.last_error = f"{type(error).__name__}: {error}"[:2000]
+        m.next_attempt_at = _now() + timedelta(seconds=_backoff_seconds(m.attempts))
+
+
+def process_batch(db: Session, pool: ThreadPoolExecutor, limit: int) -> int:
+    """Claim, deliver concurrently and record one batch. Returns the number of messages handled."""
+    claimed = claim_batch(db, limit)
+    if not claimed:
+        return 0
+
+    def _send(item):
+        msg_id, channel, recipient, payload = item
+        try:
+            deliver(channel, recipient, payload)
+            return msg_id, None
+        except Exception as e:
+            return msg_id, e
+
+    for msg_id, error in pool.map(_send, claimed):
+        record_result(db, msg_id, error)
+    db.commit()
+    return len(claimed)
+
+
+def run_worker(
+    session_factory,
+    *,
+    batch_size: int = 20,
+    concurrency: int = 4,
+    poll_interval: float = 1.0,
+    stop: Optional[threading.Event] = None,
+    once: bool = False,
+) -> None:
+    """Deliver until `stop` is set (or the queue is drained, with once=True)."""
+    stop = stop or threading.Event()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="outbound") as pool:
+        while not stop.is_set():
+            db = session_factory()
+            try:
+                handled = process_batch(db, pool, batch_size)
+            except Exception:
+                db.rollback()
+                log.exception("outbound worker batch failed")
+                handled = 0
+            finally:
+                db.close()
+            if once and handled == 0:
+                return
+            if handled < batch_size:
+                stop.wait(poll_interval)
+
+
+def start_worker_thread(session_factory, **kwargs) -> threading.Event:
+    """Run the worker on a daemon thread (in-process mode); set the returned event to stop it."""
+    stop = threading.Event()
+    threading.Thread(
+        target=run_worker, args=(session_factory,), kwargs={**kwargs, "stop": stop},
+        name="outbound-worker", daemon=True,
+    ).start()
+    return stop
+
+
+# dead-letter / maintenance
+
+def queue_stats(db: Session) -> dict[str, int]:
+    rows = db.execute(
+        select(OutboundMessage.status, func.count()).group_by(OutboundMessage.status)
+    ).all()
+    return {status: n for status, n in rows}
+
+
+def list_dead(db: Session, limit: int = 50) -> list[OutboundMessage]:
+    return db.execute(
+        select(OutboundMessage)
+        .where(OutboundMessage.status == OUTBOUND_DEAD)
+        .order_by(OutboundMessage.created_at.desc())
+        .limit(limit)
+    ).scalars().all()
+
+
+def requeue_dead(db: Session, ids: Optional[Sequence] = None) -> int:
+    """Give dead messages (all, or the given ids) a fresh set of attempts."""
+    stmt = (
+        update(OutboundMessage)
+        .where(OutboundMessage.status == OUTBOUND_DEAD)
+        .values(status=OUTBOUND_PENDING, attempts=0, next_attempt_at=_now(), locked_until=None)
+    )
+    if ids:
+        stmt = stmt.where(OutboundMessage.id.in_(list(ids)))
+    n = db.execute(stmt).rowcount
+    db.commit()
+    return n
+
+
+def purge(db: Session, older_than_days: int) -> int:
+    """Delete sent and dead messages older than `older_than_days`."""
+    cutoff = _now() - timedelta(days=older_than_days)
+    n = db.execute(
+        delete(OutboundMessage).where(
+            OutboundMessage.status.in_([OUTBOUND_SENT, OUTBOUND_DEAD]),
+            OutboundMessage.created_at < cutoff.replace(tzinfo=None),
+        )
+    ).rowcount
+    db.commit()
+    return n
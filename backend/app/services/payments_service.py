@@ -4,12 +4,12 @@ from uuid import uuid4
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Optional
 
-from sqlalchemy import func, select, case
 from sqlalchemy.orm import Session
 
 from app.models import User, Job
 from app.models.payments import WalletLedger, Payment, IdempotencyKey
 from app.models.enums import LedgerEntryType, PaymentMethod, PaymentStatus
+from app.services.wallet_balance_service import snapshot_balance
 
 # NEW: import platform fee settings
 from app.config import FEE_WALLET_NGN, FEE_PAYOUT_NGN, PLATFORM_FEE_USER_EMAIL
@@ -72,37 +72,15 @@ def _get_platform_user(db: Session) -> User:
 
 # wallet ops
 
-def wallet_balance(db: Session, user_id: str, currency: str = "NGN") -> Decimal:
+def wallet_balance(db: Session, user_id: str, currency: str = "NGN", *, for_update: bool = False) -> Decimal:
     """
-    Compute wallet balance with a single aggregate query.
-    Credits: deposit, payout, refund, adjust (added to balance)
-    Debits:  charge, withdrawal (subtracted from balance)
+    Read the wallet balance from the materialized snapshot (primary-key lookup).
+    The snapshot is maintained alongside every WalletLedger insert, see
+    app/services/wallet_balance_service.py. Pass for_update=True before a debit
+    to lock the wallet row until commit.
     """
     currency = _normalize_currency(currency)
-
-    credit_types = [LedgerEntryType.deposit, LedgerEntryType.payout, LedgerEntryType.refund, LedgerEntryType.adjust]
-    debit_types  = [LedgerEntryType.charge, LedgerEntryType.withdrawal]
-
-    stmt = (
-        select(
-            func.coalesce(
-                func.sum(
-                    case(
-                        (WalletLedger.entry_type.in_(credit_types), WalletLedger.amount),
-                        (WalletLedger.entry_type.in_(debit_types), -WalletLedger.amount),
-                        else_=Decimal("0.00"),
-                    )
-                ),
-                Decimal("0.00"),
-            )
-        )
-        .where(
-            WalletLedger.user_id == user_id,
-            WalletLedger.currency == currency,
-        )
-    )
-    (balance,) = db.execute(stmt).one()
-    return _quant(balance or Decimal("0.00"))
+    return snapshot_balance(db, user_id, currency, for_update=for_update)
 
 def wallet_deposit(
     db: Session,
@@ -173,7 +151,7 @@ def wallet_withdraw(
     fee = _quant(Decimal(FEE_PAYOUT_NGN)) if is_artisan else Decimal("0.00")
 
     # Ensure the user has enough balance to cover the withdrawal and fee
-    bal = wallet_balance(db, str(user.id), currency)
+    bal = wallet_balance(db, str(user.id), currency, for_update=True)
     total_required = amount + fee
     if bal < total_required:
         raise ValueError("Insufficient balance")
@@ -292,7 +270,7 @@ def checkout(
         platform_user = _get_platform_user(db)
 
         # Ensure funds first: need = amount + fee
-        bal = wallet_balance(db, str(customer.id), currency)
+        bal = wallet_balance(db, str(customer.id), currency, for_update=True)
         need = amount + fee
         if bal < need:
             raise ValueError("Insufficient wallet balance")
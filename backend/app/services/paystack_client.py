@@ -0,0 +1,265 @@
+# app/services/paystack_client.py
+"""
+App-lifetime HTTP client for the Paystack API.
+
+- one pooled AsyncClient per process (keep-alive, no TLS handshake per call);
+  closed on app shutdown via aclose()
+- per-endpoint timeouts (ENDPOINT_TIMEOUTS)
+- bounded retries with full jitter for GETs (idempotent) on transport errors,
+  429 and 5xx; POSTs are only retried when the connection could not be made.
+  This loop is the only retry layer (the transport does not retry), and a
+  call counts as an error only when its last attempt fails
+- a circuit breaker: after PAYSTACK_BREAKER_FAILURES consecutive failures calls
+  fail fast with 503 for PAYSTACK_BREAKER_RESET_SECONDS, then one probe is let through
+- per-endpoint call/error/latency metrics (metrics_snapshot(), and exported
+  at /metrics as external_call_duration_seconds{service="paystack"})
+
+Callers get the httpx.Response back and keep their own status handling;
+transport failures and an open breaker surface as PaystackUnavailable (503).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException
+
+from app.config import (
+    PAYSTACK_SECRET,
+    PAYSTACK_BASE_URL,
+    PAYSTACK_MAX_CONNECTIONS,
+    PAYSTACK_MAX_RETRIES,
+    PAYSTACK_BREAKER_FAILURES,
+    PAYSTACK_BREAKER_RESET_SECONDS,
+)
+from app.observability.metrics import registry, EXTERNAL_CALLS
+
+log = logging.getLogger(__name__)
+
+# read timeout per endpoint (seconds); connect timeout is shared
+ENDPOINT_TIMEOUTS = {
+    "transaction.initialize": 20.0,
+    "transaction.verify": 15.0,
+    "transferrecipient": 20.0,
+    "transfer": 30.0,
+    "bank": 10.0,
+}
+DEFAULT_TIMEOUT = 20.0
+CONNECT_TIMEOUT = 5.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.2
+BACKOFF_MAX = 2.0
+
+
+class PaystackUnavailable(HTTPException):
+    """Paystack could not be reached, or the breaker is open."""
+
+    def __init__(self, detail: str = "Payment provider temporarily unavailable"):
+        super().__init__(status_code=503, detail=detail)
+
+
+# circuit breaker
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_seconds:
+                return False
+            # half-open: a single probe at a time (a probe that never reported back expires)
+            if self._probe_started is not None and now - self._probe_started < self.reset_seconds:
+                return False
+            self._probe_started = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_started = None
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    log.warning("paystack circuit opened after %d consecutive failures", self._failures)
+                self._opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(PAYSTACK_BREAKER_FAILURES, PAYSTACK_BREAKER_RESET_SECONDS)
+
+PAYSTACK_SKIPPED = registry.counter(
+    "paystack_calls_skipped_total", "Paystack calls retried or refused by the open breaker.", ("endpoint", "reason"),
+)
+PAYSTACK_BREAKER = registry.gauge("paystack_breaker_open", "1 while the Paystack circuit breaker is open.", mode="max")
+registry.register_collector(lambda: PAYSTACK_BREAKER.set(1 if breaker.state == "open" else 0))
+
+
+# metrics
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_metrics: dict[str, dict] = {}
+_metrics_lock = threading.Lock()
+
+
+def _observe(endpoint: str, seconds: float, outcome: str) -> None:
+    if outcome in ("ok", "error"):
+        EXTERNAL_CALLS.observe(seconds, service="paystack", operation=endpoint, outcome=outcome)
+    else:
+        PAYSTACK_SKIPPED.inc(endpoint=endpoint, reason=outcome)
+    with _metrics_lock:
+        m = _metrics.setdefault(endpoint, {
+            "calls": 0, "errors": 0, "retries": 0, "rejected": 0,
+            "latency_sum": 0.0, "latency_buckets": [0] * len(LATENCY_BUCKETS),
+        })
+        if outcome == "rejected":
+            m["rejected"] += 1
+            return
+        if outcome == "retry":
+            m["retries"] += 1
+            return
+        m["calls"] += 1
+        if outcome == "error":
+            m["errors"] += 1
+        m["latency_sum"] += seconds
+        for i, le in enumerate(LATENCY_BUCKETS):
+            if seconds <= le:
+                m["latency_buckets"][i] += 1
+
+
+def metrics_snapshot() -> dict:
+    """Per-endpoint counters (latency buckets are cumulative upper bounds, see LATENCY_BUCKETS)."""
+    with _metrics_lock:
+        out = {k: {**v, "latency_buckets": list(v["latency_buckets"])} for k, v in _metrics.items()}
+    return {"breaker": breaker.state, "endpoints": out}
+
+
+# client
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=PAYSTACK_BASE_URL,
+            http2=False,  # HTTP/1.1 avoids INVALID_SESSION_ID on some Windows TLS stacks
+            limits=httpx.Limits(
+                max_connections=PAYSTACK_MAX_CONNECTIONS,
+                max_keepalive_connections=PAYSTACK_MAX_CONNECTIONS,
+                keepalive_expiry=60.0,
+            ),
+        )
+    return _client
+
+
+async def aclose() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _secret() -> str:
+    return PAYSTACK_SECRET or os.getenv("PAYSTACK_SECRET", "")
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+async def request(
+    method: str,
+    path: str,
+    *,
+    endpoint: str,
+    json: Optional[dict] = None,
+    params: Optional[dict] = None,
+) -> httpx.Response:
+    """
+    Call Paystack. `endpoint` names the operation for timeouts/metrics
+    (see ENDPOINT_TIMEOUTS). Non-2xx responses are returned, not raised.
+    """
+    if not breaker.allow():
+        _observe(endpoint, 0.0, "rejected")
+        raise PaystackUnavailable()
+
+    headers = {"Authorization": f"Bearer {_secret()}"}
+    timeout = httpx.Timeout(ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT), connect=CONNECT_TIMEOUT)
+    idempotent = method.upper() == "GET"
+    attempts = 1 + PAYSTACK_MAX_RETRIES
+    client = _get_client()
+
+    for attempt in range(attempts):
+        last = attempt == attempts - 1
+        t0 = time.perf_counter()
+        try:
+            rsp = await client.request(method, path, json=json, params=params, headers=headers, timeout=timeout)
+        except httpx.HTTPError as e:
+            # connect errors happen before the request is sent, so they are safe to retry for POST too
+            if not last and (idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))):
+                _observe(endpoint, 0.0, "retry")
+                await asyncio.sleep(_backoff(attempt))
+                continue
+            _observe(endpoint, time.perf_counter() - t0, "error")
+            breaker.record_failure()
+            log.warning("paystack %s failed: %r", endpoint, e)
+            raise PaystackUnavailable()
+
+        elapsed = time.perf_counter() - t0
+        if rsp.status_code >= 500 or rsp.status_code == 429:
+            if idempotent and not last and rsp.status_code in RETRY_STATUSES:
+                _observe(endpoint, 0.0, "retry")
+                await asyncio.sleep(_backoff(attempt))
+                continue
+            _observe(endpoint, elapsed, "error")
+            if rsp.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()  # throttled, but reachable
+            return rsp
+
+        _observe(endpoint, elapsed, "ok")
+        breaker.record_success()
+        return rsp
+
+    raise PaystackUnavailable()  # unreachable
+
+
+async def get(path: str, *, endpoint: str, params: Optional[dict] = None) -> httpx.Response:
+    return await request("GET", path, endpoint=endpoint, params=params)
+
+
+async def post(path: str, json: dict, *, endpoint: str) -> httpx.Response:
+    return await request("POST", path, endpoint=endpoint, json=json)
@@ -0,0 +1,264 @@
+# app/services/paystack_events.py
+"""
+Ledger side of Paystack events (charges, wallet top-ups, payout transfers).
+
+apply_paystack_event() applies one webhook payload inside the caller's
+transaction and never commits, so the webhook workers can apply an event and
+mark its inbox row done atomically. The verify routes call
+credit_artisan_if_needed() directly (commit=True keeps their old behaviour).
+"""
+
+from __future__ import annotations
+
+import uuid
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.config import FEE_CUSTOMER_NGN, FEE_PAYOUT_NGN, PLATFORM_FEE_USER_EMAIL
+from app.models import User
+from app.models.enums import PaymentStatus, LedgerEntryType
+from app.models.payments import Payment, WalletLedger, IdempotencyKey
+from app.models.payouts import Payout
+
+
+def get_platform_user(db: Session) -> User:
+    """Find the platform user who receives Fixion fees."""
+    u = db.query(User).filter(User.email == PLATFORM_FEE_USER_EMAIL).first()
+    if not u:
+        # last-resort: any admin; if none, raise
+        u = db.query(User).filter(func.lower(func.cast(User.role, str)).like("%admin%")).first()
+    if not u:
+        raise HTTPException(status_code=500, detail="Platform fee user not found; set PLATFORM_FEE_USER_EMAIL.")
+    return u
+
+
+def _finish(db: Session, commit: bool) -> None:
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+
+
+def _artisan_credited(db: Session, pmt: Payment) -> bool:
+    return (
+        db.query(WalletLedger)
+        .filter(
+            and_(
+                WalletLedger.reference == pmt.reference,
+                WalletLedger.entry_type == LedgerEntryType.payout,
+                WalletLedger.user_id == pmt.artisan_id,
+            )
+        )
+        .first()
+        is not None
+    )
+
+
+def _credit_artisan(db: Session, pmt: Payment, event: str) -> None:
+    db.add(
+        WalletLedger(
+            user_id=pmt.artisan_id,
+            currency=pmt.currency,
+            entry_type=LedgerEntryType.payout,
+            amount=Decimal(str(pmt.amount)),  # full amount
+            reference=pmt.reference,
+            meta={
+                "source": "paystack",
+                "provider_event": event,
+                "payment_id": str(pmt.id),
+                "job_id": str(pmt.job_id) if pmt.job_id else None,
+            },
+        )
+    )
+
+
+def credit_artisan_if_needed(db: Session, pmt: Payment, event: str = "manual_verify", *, commit: bool = True):
+    """
+    Idempotently mark captured and credit artisan via WalletLedger if not already done.
+    Terminal state lock: if payment is captured/failed/refunded, do not change state.
+    """
+    TERMINAL = {PaymentStatus.captured, PaymentStatus.failed, PaymentStatus.refunded}
+    changed = False
+
+    # Terminal lock: do not move away from any terminal state
+    if pmt.status in TERMINAL:
+        # still ensure artisan has been credited for this reference (idempotent safety)
+        if pmt.status == PaymentStatus.captured and pmt.artisan_id and not _artisan_credited(db, pmt):
+            _credit_artisan(db, pmt, event)
+            changed = True
+        if changed:
+            _finish(db, commit)
+        return  # nothing else to do
+
+    # Non-terminal -> allow transition to captured
+    pmt.status = PaymentStatus.captured
+    db.add(pmt)
+
+    # Credit artisan if not already credited for this payment reference
+    if pmt.artisan_id and not _artisan_credited(db, pmt):
+        _credit_artisan(db, pmt, event)
+
+    _finish(db, commit)
+
+
+def record_customer_fee_meta(pmt: Payment) -> None:
+    """Fee meta for admin reports."""
+    meta = dict(getattr(pmt, "meta", {}) or {})
+    meta["fixion_customer_fee_ngn"] = int(FEE_CUSTOMER_NGN)
+    meta["gross_charged_ngn"] = float(pmt.amount) + float(FEE_CUSTOMER_NGN)
+    pmt.meta = meta
+
+
+def handle_transfer_event(db: Session, event: str, data: dict, *, commit: bool = True) -> dict:
+    """
+    Processes transfer.success / transfer.failed / transfer.reversed.
+    On success we:
+      - DEBIT artisan by FULL payout amount (requested)  [NEGATIVE ledger]
+      - CREDIT Fixion platform by ₦10 (payout fee)       [POSITIVE ledger]
+    """
+    if event not in ("transfer.success", "transfer.failed", "transfer.reversed"):
+        return {"status": "ignored"}
+
+    transfer_code = data.get("transfer_code")
+    reference = data.get("reference")
+
+    q = db.query(Payout)
+    if reference:
+        q = q.filter(Payout.reference == reference)
+    elif transfer_code:
+        q = q.filter(Payout.transfer_code == transfer_code)
+    payout = q.with_for_update().first()
+
+    if not payout:
+        return {"status": "ok", "note": "payout not found"}
+
+    if event == "transfer.success":
+        payout.status = "success"
+
+        exists = db.query(WalletLedger).filter(
+            WalletLedger.user_id == payout.user_id,
+            WalletLedger.entry_type == LedgerEntryType.withdrawal,
+            WalletLedger.reference == payout.reference,
+        ).first()
+        if not exists:
+            db.add(
+                WalletLedger(
+                    user_id=payout.user_id,
+                    entry_type=LedgerEntryType.withdrawal,
+                    amount=Decimal(str(payout.amount)) * Decimal("-1"),
+                    currency=payout.currency,
+                    reference=payout.reference,
+                    meta={"provider": "paystack", "transfer_code": payout.transfer_code, "reason": "bank_payout_debit"},
+                )
+            )
+
+            try:
+                platform_user = get_platform_user(db)
+                db.add(
+                    WalletLedger(
+                        user_id=platform_user.id,
+                        entry_type=LedgerEntryType.payout,
+                        amount=Decimal(str(FEE_PAYOUT_NGN)),
+                        currency=payout.currency,
+                        reference=payout.reference,
+                        meta={"provider": "paystack", "transfer_code": payout.transfer_code, "reason": "platform_fee_payout"},
+                    )
+                )
+            except HTTPException:
+                pass
+
+    else:
+        payout.status = "failed"
+
+    db.add(payout)
+    _finish(db, commit)
+    return {"status": "ok"}
+
+
+def _apply_wallet_topup(db: Session, meta: dict, reference: str | None) -> dict:
+    user_id = meta.get("user_id")
+    amount = Decimal(str(meta.get("amount") or "0"))
+    if user_id and amount > 0 and reference:
+        already = (
+            db.query(WalletLedger.id)
+            .filter(
+                WalletLedger.reference == reference,
+                WalletLedger.entry_type == LedgerEntryType.deposit,
+            )
+            .first()
+        )
+        if not already:
+            db.add(
+                WalletLedger(
+                    user_id=uuid.UUID(user_id),
+                    currency="NGN",
+                    entry_type=LedgerEntryType.deposit,
+                    amount=amount,
+                    reference=reference,
+                    meta={"reason": "wallet_topup_paystack_webhook"},
+                )
+            )
+    return {"status": "ok", "wallet_topup": True}
+
+
+def apply_paystack_event(db: Session, payload: dict) -> dict:
+    """
+    Apply one (already signature-checked) Paystack webhook payload.
+    Flushes but does not commit; raises on failure so the caller can roll back and retry.
+    """
+    event = payload.get("event") or ""
+    data = payload.get("data") or {}
+    if not isinstance(data, dict):
+        return {"status": "ignored", "note": "no data"}
+    reference = data.get("reference")
+    event_id = str(data.get("id") or reference or "")
+
+    # transfer events (bank payouts)
+    if event.startswith("transfer."):
+        return handle_transfer_event(db, event, data, commit=False)
+
+    # wallet top-ups via Paystack (these do NOT create a Payment row),
+    # detected by metadata.wallet_topup == True
+    meta = data.get("metadata") or {}
+    if isinstance(meta, dict) and meta.get("wallet_topup") and event == "charge.success":
+        result = _apply_wallet_topup(db, meta, reference)
+        db.flush()
+        return result
+
+    # If there's no reference, we can't continue
+    if not reference:
+        return {"status": "ok", "note": "no reference"}
+
+    # From here on, it's a normal job payment flow (there IS a Payment row)
+    pmt = db.query(Payment).filter(Payment.reference == reference).with_for_update().first()
+    if not pmt:
+        return {"status": "ok", "note": "unknown reference"}
+
+    # Idempotency on Paystack event id for payment events
+    if event_id:
+        seen = (
+            db.query(IdempotencyKey.id)
+            .filter(
+                IdempotencyKey.user_id == pmt.customer_id,
+                IdempotencyKey.scope == "paystack:webhook",
+                IdempotencyKey.key == event_id,
+            )
+            .first()
+        )
+        if seen:
+            return {"status": "ok", "idempotent": True}
+
+    if event == "charge.success":
+        if hasattr(pmt, "signature_verified"):
+            pmt.signature_verified = True
+        credit_artisan_if_needed(db, pmt, event="webhook", commit=False)
+        record_customer_fee_meta(pmt)
+        db.add(pmt)
+        if event_id:
+            db.add(IdempotencyKey(user_id=pmt.customer_id, scope="paystack:webhook", key=event_id))
+        db.flush()
+
+    return {"status": "ok", "idempotent": False}
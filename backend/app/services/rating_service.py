@@ -0,0 +1,209 @@
+# app/services/rating_service.py
+"""
+Materialized artisan ratings.
+
+Each artisan profile carries the aggregates of the artisan's reviews
+(rating_count, rating_sum, rating_histogram for 1..5 stars, rating_score), so
+showing or sorting by rating never scans `reviews`.
+
+- Every flush that inserts, deletes or re-rates Review rows applies the
+  deltas to the profile with one atomic UPDATE per artisan on the same
+  connection, so the aggregates commit (or roll back) together with the
+  reviews. The hook is registered by install(), called once from app/main.py.
+- rating_score is the Bayesian average (prior_weight * prior_mean + sum) /
+  (prior_weight + count): a single 5-star review does not outrank fifty
+  4.8s, and artisans without reviews sit at the prior. It is recomputed from
+  the stored count/sum on every update, and indexed together with
+  verification_status for the `sort=rating` search order.
+- `rebuild_ratings` re-derives the aggregates from `reviews`, reports drift
+  and optionally repairs it (reviews removed by ON DELETE CASCADE bypass the
+  ORM; a changed prior rescores everyone). See scripts/rebuild_artisan_ratings.py.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import event, func, literal, select, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import Session
+
+from app.config import RATING_PRIOR_MEAN, RATING_PRIOR_WEIGHT
+from app.models.artisan import ArtisanProfile
+from app.models.review import Review
+
+log = logging.getLogger(__name__)
+
+STARS = 5
+
+
+def bayesian_score(count: int, total: int) -> float:
+    return (RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN + total) / (RATING_PRIOR_WEIGHT + count)
+
+
+def rating_summary(p: Optional[ArtisanProfile]) -> Optional[dict]:
+    """Public rating fields of a profile (ArtisanRatingOut)."""
+    if p is None:
+        return None
+    count = p.rating_count or 0
+    score = p.rating_score if p.rating_score is not None else bayesian_score(count, p.rating_sum or 0)
+    return {
+        "count": count,
+        "average": round(p.rating_sum / count, 2) if count else None,
+        "score": round(score, 3),
+        "histogram": list(p.rating_histogram or [0] * STARS),
+    }
+
+
+class _Delta:
+    __slots__ = ("count", "total", "stars")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.stars = [0] * STARS
+
+    def add(self, rating: int, sign: int) -> None:
+        if not 1 <= (rating or 0) <= STARS:
+            return
+        self.count += sign
+        self.total += sign * rating
+        self.stars[rating - 1] += sign
+
+    def __bool__(self) -> bool:
+        return self.count != 0 or self.total != 0 or any(self.stars)
+
+
+# write path: keep the aggregates in step with review writes
+
+def _apply_deltas(db: Session, deltas: dict) -> None:
+    conn = db.connection()
+    cols = ArtisanProfile.__table__.c
+    # stable order so two transactions touching the same artisans lock rows in the same order
+    for artisan_id in sorted(deltas, key=str):
+        d = deltas[artisan_id]
+        if not d:
+            continue
+        conn.execute(
+            update(ArtisanProfile.__table__)
+            .where(cols.user_id == artisan_id)
+            .values(
+                rating_count=cols.rating_count + d.count,
+                rating_sum=cols.rating_sum + d.total,
+                rating_histogram=array([cols.rating_histogram[i + 1] + d.stars[i] for i in range(STARS)]),
+                # SET expressions see the old row, so add the delta here as well
+                rating_score=(literal(RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN) + cols.rating_sum + d.total)
+                / (literal(RATING_PRIOR_WEIGHT) + cols.rating_count + d.count),
+                updated_at=func.now(),
+            )
+        )
+
+
+def _old_value(obj, key):
+    hist = sa_inspect(obj).attrs[key].history
+    return hist.deleted[0] if hist.deleted else getattr(obj, key)
+
+
+def _sync_artisan_ratings(db: Session, flush_context) -> None:
+    deltas: dict = defaultdict(_Delta)
+    for obj in db.new:
+        if isinstance(obj, Review) and obj.artisan_id is not None:
+            deltas[obj.artisan_id].add(obj.rating, +1)
+    for obj in db.deleted:
+        if isinstance(obj, Review):
+            artisan_id = _old_value(obj, "artisan_id")
+            if artisan_id is not None:
+                deltas[artisan_id].add(_old_value(obj, "rating"), -1)
+    for obj in db.dirty:
+        if not isinstance(obj, Review):
+            continue
+        state = sa_inspect(obj)
+        if not (state.attrs.rating.history.has_changes() or state.attrs.artisan_id.history.has_changes()):
+            continue
+        old_artisan = _old_value(obj, "artisan_id")
+        if old_artisan is not None:
+            deltas[old_artisan].add(_old_value(obj, "rating"), -1)
+        if obj.artisan_id is not None:
+            deltas[obj.artisan_id].add(obj.rating, +1)
+    if deltas:
+        _apply_deltas(db, deltas)
+
+
+_installed = False
+
+
+def install() -> None:
+    """Attach the review hook to every Session (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Session, "after_flush", _sync_artisan_ratings)
+    _installed = True
+
+
+# rebuild / reconciliation
+
+def _review_aggregates(db: Session, artisan_ids=None) -> dict:
+    star_counts = [func.count().filter(Review.rating == s) for s in range(1, STARS + 1)]
+    stmt = (
+        select(Review.artisan_id, func.count(), func.coalesce(func.sum(Review.rating), 0), *star_counts)
+        .where(Review.artisan_id.is_not(None), Review.rating.between(1, STARS))
+        .group_by(Review.artisan_id)
+    )
+    if artisan_ids is not None:
+        stmt = stmt.where(Review.artisan_id.in_(artisan_ids))
+    return {row[0]: (row[1], row[2], list(row[3:])) for row in db.execute(stmt).all()}
+
+
+def rebuild_ratings(db: Session, *, fix: bool = False) -> list[dict]:
+    """
+    Compare every profile's aggregates with those re-derived from `reviews`.
+    Returns one dict per drifted artisan. With fix=True each drifted profile is
+    locked, recomputed and overwritten; the caller commits.
+    """
+    derived = _review_aggregates(db)
+    stored = db.execute(
+        select(
+            ArtisanProfile.user_id, ArtisanProfile.rating_count, ArtisanProfile.rating_sum,
+            ArtisanProfile.rating_histogram, ArtisanProfile.rating_score,
+        )
+    ).all()
+
+    drift: list[dict] = []
+    for artisan_id, count, total, hist, score in stored:
+        exp_count, exp_total, exp_hist = derived.get(artisan_id, (0, 0, [0] * STARS))
+        exp_score = bayesian_score(exp_count, exp_total)
+        if (count, total, list(hist or ())) == (exp_count, exp_total, exp_hist) and abs(score - exp_score) < 1e-9:
+            continue
+        drift.append({
+            "artisan_id": str(artisan_id),
+            "stored": {"count": count, "sum": total, "histogram": hist, "score": score},
+            "reviews": {"count": exp_count, "sum": exp_total, "histogram": exp_hist, "score": exp_score},
+        })
+        log.warning(
+            "artisan rating drift artisan_id=%s stored=%s/%s reviews=%s/%s",
+            artisan_id, count, total, exp_count, exp_total,
+        )
+        if fix:
+            _repair(db, artisan_id)
+    return drift
+
+
+def _repair(db: Session, artisan_id) -> None:
+    # lock first, then recount, so review writes racing with us queue behind the lock
+    db.execute(select(ArtisanProfile.id).where(ArtisanProfile.user_id == artisan_id).with_for_update())
+    count, total, hist = _review_aggregates(db, [artisan_id]).get(artisan_id, (0, 0, [0] * STARS))
+    db.execute(
+        update(ArtisanProfile.__table__)
+        .where(ArtisanProfile.__table__.c.user_id == artisan_id)
+        .values(
+            rating_count=count,
+            rating_sum=total,
+            rating_histogram=hist,
+            rating_score=bayesian_score(count, total),
+            updated_at=func.now(),
+        )
+    )
@@ -0,0 +1,208 @@
+# app/services/read_cache.py
+"""
+Versioned in-process cache for small, read-mostly public datasets
+(service categories, announcements), served with strong ETags.
+
+- A cached entry is the rendered JSON body of one response plus its ETag
+  (a SHA-256 of the body), stored per dataset and per variant (the query
+  parameters that shape the response). A hit costs no DB work; a request
+  whose If-None-Match carries the current ETag gets a body-less 304. Since
+  the ETag is derived from the bytes, every worker produces the same one for
+  the same content.
+- Each dataset has a version number. Writes to a watched model (Announcement,
+  ServiceCategory) committed through the ORM bump it on commit, whichever
+  endpoint made them. A load that raced with a bump is returned but not
+  stored.
+- Other workers hear about the bump through Postgres: the flush that
+  changes a watched row also runs pg_notify(READ_CACHE_CHANNEL, <dataset>) in
+  the same transaction, and each worker applies it from the LISTEN
+  connection it already holds for job events (job_events.hub, started at app
+  startup). When that listener (re)connects or drops everything is
+  invalidated, since notifications sent while it was down are lost.
+- READ_CACHE_TTL_SECONDS bounds staleness for changes nothing announced
+  (bulk SQL, a missed notification).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, func, select as sa_select
+from sqlalchemy.orm import Session
+
+from app.config import (
+    READ_CACHE_ENABLED,
+    READ_CACHE_CHANNEL,
+    READ_CACHE_TTL_SECONDS,
+    READ_CACHE_MAX_VARIANTS,
+)
+from app.models import Announcement, ServiceCategory
+from app.observability.metrics import registry
+from app.services import job_events
+
+log = logging.getLogger(__name__)
+
+CATEGORIES = "categories"
+ANNOUNCEMENTS = "announcements"
+
+# model -> dataset invalidated by its writes
+WATCHED = {ServiceCategory: CATEGORIES, Announcement: ANNOUNCEMENTS}
+
+_REQUESTS = registry.counter("read_cache_requests_total", "Cached dataset requests.", ("dataset", "outcome"))
+
+
+@dataclass(frozen=True)
+class Entry:
+    body: bytes
+    etag: str
+    version: int
+    expires: float
+
+
+def render(content: Any) -> bytes:
+    """JSON body exactly as FastAPI's JSONResponse would render it."""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/"x" matches "x"."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ReadCache:
+    def __init__(self, *, ttl: float, max_variants: int, enabled: bool = True):
+        self.ttl = ttl
+        self.max_variants = max_variants
+        self.enabled = enabled
+        self._versions: dict[str, int] = {}
+        self._entries: dict[str, OrderedDict] = {}
+        self._loading: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def version(self, dataset: str) -> int:
+        return self._versions.get(dataset, 0)
+
+    def invalidate(self, dataset: Optional[str] = None) -> None:
+        """Bump one dataset (all of them when None) and drop its entries."""
+        with self._lock:
+            names = [dataset] if dataset else set(WATCHED.values()) | set(self._versions) | set(self._entries)
+            for name in names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+                self._entries.pop(name, None)
+
+    def _lookup(self, dataset: str, key: Hashable) -> Optional[Entry]:
+        with self._lock:
+            entries = self._entries.get(dataset)
+            entry = entries.get(key) if entries else None
+            if entry is None or entry.version != self.version(dataset) or entry.expires < time.monotonic():
+                return None
+            entries.move_to_end(key)
+            return entry
+
+    def _store(self, dataset: str, key: Hashable, entry: Entry) -> None:
+        with self._lock:
+            if entry.version != self.version(dataset):
+                return  # invalidated while loading
+            entries = self._entries.setdefault(dataset, OrderedDict())
+            entries[key] = entry
+            entries.move_to_end(key)
+            while len(entries) > self.max_variants:
+                entries.popitem(last=False)
+
+    def get(self, dataset: str, key: Hashable, load: Callable[[], Any]) -> tuple[Entry, bool]:
+        """(entry, hit). `load()` returns the response content; concurrent misses load once."""
+        if not self.enabled:
+            body = render(load())
+            return Entry(body, etag_for(body), 0, 0.0), False
+        entry = self._lookup(dataset, key)
+        if entry is not None:
+            return entry, True
+        with self._lock:
+            loading = self._loading.setdefault(dataset, threading.Lock())
+        with loading:
+            entry = self._lookup(dataset, key)
+            if entry is not None:
+                return entry, True
+            version = self.version(dataset)
+            body = render(load())
+            entry = Entry(body, etag_for(body), version, time.monotonic() + self.ttl)
+            self._store(dataset, key, entry)
+            return entry, False
+
+
+cache = ReadCache(ttl=READ_CACHE_TTL_SECONDS, max_variants=READ_CACHE_MAX_VARIANTS, enabled=READ_CACHE_ENABLED)
+
+
+def respond(request: Request, dataset: str, key: Hashable, load: Callable[[], Any]) -> Response:
+    """Cached JSON response for `dataset`/`key` with ETag; 304 when the client's copy is current."""
+    entry, hit = cache.get(dataset, key, load)
+    headers = {"ETag": entry.etag, "Cache-Control": "public, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        _REQUESTS.inc(dataset=dataset, outcome="not_modified")
+        return Response(status_code=304, headers=headers)
+    _REQUESTS.inc(dataset=dataset, outcome="hit" if hit else "miss")
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+# invalidation on ORM writes
+
+_PENDING = "read_cache_pending"
+
+
+@event.listens_for(Session, "after_flush")
+def _notify_on_flush(db: Session, flush_context) -> None:
+    touched = {
+        WATCHED[type(obj)]
+        for obj in (*db.new, *db.dirty, *db.deleted)
+        if type(obj) in WATCHED
+    }
+    if not touched:
+        return
+    pending = db.info.setdefault(_PENDING, set())
+    for dataset in sorted(touched - pending):
+        # delivered to every worker's listener on commit, dropped on rollback
+        db.execute(sa_select(func.pg_notify(READ_CACHE_CHANNEL, dataset)))
+    pending |= touched
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(db: Session) -> None:
+    # this worker does not wait for its own notification
+    for dataset in db.info.pop(_PENDING, ()):
+        cache.invalidate(dataset)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(db: Session) -> None:
+    db.info.pop(_PENDING, None)
+
+
+# cross-worker invalidation
+
+def _on_notify(payload: str) -> None:
+    cache.invalidate(payload or None)
+
+
+if READ_CACHE_ENABLED:
+    job_events.hub.add_channel(READ_CACHE_CHANNEL, _on_notify, cache.invalidate)
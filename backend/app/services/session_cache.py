@@ -0,0 +1,228 @@
+# app/services/session_cache.py
+"""
+Session-validation cache for authenticated requests.
+
+Keeps verified (user, session) state so `auth_utils.get_current_user_with_session`
+does not hit `users` and `sessions` on every request, and remembers revoked
+sessions so replayed tokens are rejected without a query.
+
+Keys (values are plain dicts, so a shared backend can serialize them):
+- "user:<user_id>"  -> column values of the User row
+- "sess:<sid>"      -> {"user_id", "created_at", "last_seen_at"} or {"revoked": True}
+
+A request is served from cache only when both entries are present. Changes to
+User / Session rows committed through the ORM invalidate their entries (see the
+session event hooks at the bottom); bulk updates must call the helpers directly.
+
+The default backend is an in-process TTL cache. Without a shared backend,
+revocations are immediate on the worker that performed them and bounded by
+SESSION_CACHE_TTL_SECONDS on the others; install one with set_backend().
+"""
+
+from __future__ import annotations
+
+import abc
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import (
+    SESSION_CACHE_TTL_SECONDS,
+    SESSION_CACHE_MAX_ENTRIES,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+)
+from app.models import User
+from app.models.session import Session as UserSession
+from app.security.revocation import revocations
+
+# revoked markers must outlive any access token that may still carry the sid
+REVOKED_TTL_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+# backends
+
+class SessionCacheBackend(abc.ABC):
+    """Store interface. Implement it over a shared cache (e.g. Redis) to share state across workers."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+
+class InMemoryTTLCache(SessionCacheBackend):
+    """Bounded, thread-safe LRU with per-key expiry (process-local)."""
+
+    def __init__(self, max_entries: int = SESSION_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_backend: SessionCacheBackend = InMemoryTTLCache()
+
+
+def set_backend(backend: SessionCacheBackend) -> None:
+    """Swap the store (call once at startup)."""
+    global _backend
+    _backend = backend
+
+
+def get_backend() -> SessionCacheBackend:
+    return _backend
+
+
+# entries
+
+def _user_key(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def _sess_key(sid) -> str:
+    return f"sess:{sid}"
+
+
+def _columns(obj) -> dict:
+    return {attr.key: getattr(obj, attr.key) for attr in sa_inspect(type(obj)).column_attrs}
+
+
+def lookup(sid) -> tuple[Optional[dict], Optional[dict]]:
+    """Return (user_entry, sess_entry); either may be None. A revoked sess_entry has revoked=True."""
+    sess = _backend.get(_sess_key(sid))
+    if sess is None or sess.get("revoked"):
+        return None, sess
+    return _backend.get(_user_key(sess["user_id"])), sess
+
+
+def store(user: User, sess: UserSession, *, last_seen_at=None) -> None:
+    _backend.set(_user_key(user.id), _columns(user), SESSION_CACHE_TTL_SECONDS)
+    _backend.set(
+        _sess_key(sess.id),
+        {
+            "user_id": str(user.id),
+            "created_at": sess.created_at,
+            "last_seen_at": last_seen_at or sess.last_seen_at or sess.created_at,
+        },
+        SESSION_CACHE_TTL_SECONDS,
+    )
+
+
+def note_touch(sid, sess_entry: dict, when) -> None:
+    """Record a persisted last_seen_at write on the cached entry."""
+    _backend.set(_sess_key(sid), {**sess_entry, "last_seen_at": when}, SESSION_CACHE_TTL_SECONDS)
+
+
+def mark_revoked(sid) -> None:
+    _backend.set(_sess_key(sid), {"revoked": True}, REVOKED_TTL_SECONDS)
+    revocations.add(sid)  # stateless tokens: effective on this worker now, on the others at their next sync
+
+
+def invalidate_session(sid) -> None:
+    _backend.delete(_sess_key(sid))
+
+
+def invalidate_user(user_id) -> None:
+    """Drop the user entry; every session of that user is re-verified against the DB next time."""
+    _backend.delete(_user_key(user_id))
+
+
+# materialize cached rows into the request's Session without a query
+
+def _attach(db: Session, cls, values: dict):
+    obj = cls(**copy.deepcopy(values))
+    make_transient_to_detached(obj)
+    return db.merge(obj, load=False)
+
+
+def attach_user(db: Session, values: dict) -> User:
+    return _attach(db, User, values)
+
+
+def attach_session(db: Session, sid, user_id, sess_entry: dict, last_seen_at) -> UserSession:
+    return _attach(db, UserSession, {
+        "id": sid,
+        "user_id": user_id,
+        "created_at": sess_entry["created_at"],
+        "last_seen_at": last_seen_at,
+        "revoked_at": None,
+    })
+
+
+# invalidate on ORM writes (applied after commit so readers never re-cache uncommitted state)
+
+_PENDING = "_session_cache_pending"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(db: Session, flush_context) -> None:
+    pending = db.info.setdefault(_PENDING, {"users": set(), "revoked": set(), "sessions": set()})
+    for obj in list(db.dirty) + list(db.deleted):
+        if isinstance(obj, User):
+            pending["users"].add(obj.id)
+        elif isinstance(obj, UserSession):
+            state = sa_inspect(obj)
+            if obj in db.deleted or state.attrs.revoked_at.history.has_changes():
+                pending["revoked"].add(obj.id)
+            elif any(
+                state.attrs[key].history.has_changes()
+                for key in ("user_id", "created_at")
+            ):
+                pending["sessions"].add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(db: Session) -> None:
+    pending = db.info.pop(_PENDING, None)
+    if not pending:
+        return
+    for uid in pending["users"]:
+        invalidate_user(uid)
+    for sid in pending["revoked"]:
+        mark_revoked(sid)
+    for sid in pending["sessions"]:
+        invalidate_session(sid)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(db: Session) -> None:
+    db.info.pop(_PENDING, None)
@@ -1,6 +1,7 @@
 # app/services/sms_service.py
 from __future__ import annotations
 import re
+import time
 import requests
 from typing import Tuple
 
@@ -10,12 +11,27 @@ from app.config import (
     TWILIO_VERIFY_SERVICE_SID,
     DEFAULT_PHONE_COUNTRY,
 )
+from app.observability.metrics import observe_external
 
 _TWILIO_BASE = "https://verify.twilio.com/v2"
 
+# keep-alive connection pool shared by all Twilio calls in this process
+_http = requests.Session()
+_TIMEOUT = (5, 15)  # connect, read
+
 class SmsConfigError(RuntimeError):
     pass
 
+class SmsSendError(ValueError):
+    """Twilio rejected the request; `status_code` tells retryable (429/5xx) from permanent (4xx)."""
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code == 429 or self.status_code >= 500
+
 def _assert_config():
     if not (TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_VERIFY_SERVICE_SID):
         raise SmsConfigError("Twilio Verify not configured: set TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_VERIFY_SERVICE_SID")
@@ -44,6 +60,16 @@ def _to_e164(phone: str) -> str:
     # last resort: assume it's already international missing '+'
     return "+" + p
 
+def _post(operation: str, url: str, auth, data) -> requests.Response:
+    t0 = time.perf_counter()
+    try:
+        r = _http.post(url, auth=auth, data=data, timeout=_TIMEOUT)
+    except requests.RequestException:
+        observe_external("twilio", operation, t0, "error")
+        raise
+    observe_external("twilio", operation, t0, "ok" if r.status_code < 300 else "error")
+    return r
+
 def send_phone_code(phone: str) -> str:
     """
     Trigger Twilio Verify to send a 6-digit SMS to the phone.
@@ -56,13 +82,13 @@ def send_phone_code(phone: str) -> str:
     auth = (TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
     data = {"To": to, "Channel": "sms"}
 
-    r = requests.post(url, auth=auth, data=data, timeout=15)
+    r = _post("verifications", url, auth, data)
     if r.status_code >= 300:
         try:
             detail = r.json()
         except Exception:
             detail = r.text
-        raise ValueError(f"Twilio send failed: {detail}")
+        raise SmsSendError(f"Twilio send failed: {detail}", r.status_code)
 
     body = r.json()
     return body.get("sid", "")
@@ -79,13 +105,13 @@ def check_phone_code(phone: str, code: str) -> bool:
     auth = (TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
     data = {"To": to, "Code": code}
 
-    r = requests.post(url, auth=auth, data=data, timeout=15)
+    r = _post("verification_check", url, auth, data)
     if r.status_code >= 300:
         try:
             detail = r.json()
         except Exception:
             detail = r.text
-        raise ValueError(f"Twilio check failed: {detail}")
+        raise SmsSendError(f"Twilio check failed: {detail}", r.status_code)
 
     body = r.json()
     return (body.get("status") == "approved")
@@ -0,0 +1,157 @@
+# app/services/upload_service.py
+"""
+Streaming upload storage shared by artisan documents and job photos.
+
+An UploadFile is copied to disk one UPLOAD_CHUNK_KB chunk at a time, so the
+memory held per upload is one chunk however large the file is:
+
+- extension and (advisory) Content-Type are checked before reading
+- the first chunk is sniffed for the magic bytes of the claimed type
+- the size limit is enforced as bytes arrive; an oversized file is cut off at
+  limit + 1 byte with a 413
+- a SHA-256 is computed along the way; the stored name is <sha256><ext>, so
+  an identical file uploaded again to the same directory is not written twice
+  (StoredUpload.duplicate tells the caller)
+- chunks go to a hidden temp file in the destination directory (file IO runs
+  in the threadpool, never on the event loop) which is fsync'ed and then
+  atomically renamed into place; on any error it is removed
+
+Starlette has already spooled the multipart body (in memory up to 1MB per
+file, then to a temp file) by the time a route runs; this module bounds
+everything after that.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import UPLOAD_CHUNK_KB, UPLOAD_DOCUMENT_MAX_MB, UPLOAD_PHOTO_MAX_MB
+
+CHUNK_SIZE = UPLOAD_CHUNK_KB * 1024
+
+# extension -> magic-byte prefixes
+_SIGNATURES = {
+    ".pdf": (b"%PDF-",),
+    ".jpg": (b"\xff\xd8\xff",),
+    ".jpeg": (b"\xff\xd8\xff",),
+    ".png": (b"\x89PNG\r\n\x1a\n",),
+}
+
+
+def sniff(head: bytes, ext: str) -> bool:
+    """True if `head` (the first bytes of the file) matches the signature of `ext`."""
+    return any(head.startswith(sig) for sig in _SIGNATURES.get(ext.lower(), ()))
+
+
+@dataclass(frozen=True)
+class UploadPolicy:
+    exts: frozenset
+    mime_prefixes: tuple
+    max_bytes: int
+    label: str  # for error messages, e.g. "PDF/JPG/PNG"
+
+
+DOCUMENTS = UploadPolicy(
+    exts=frozenset({".pdf", ".jpg", ".jpeg", ".png"}),
+    mime_prefixes=("image/", "application/pdf"),
+    max_bytes=UPLOAD_DOCUMENT_MAX_MB * 1024 * 1024,
+    label="PDF/JPG/PNG",
+)
+PHOTOS = UploadPolicy(
+    exts=frozenset({".jpg", ".jpeg", ".png"}),
+    mime_prefixes=("image/",),
+    max_bytes=UPLOAD_PHOTO_MAX_MB * 1024 * 1024,
+    label="JPG/PNG",
+)
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    path: str          # absolute path of the stored file
+    stored_name: str   # <sha256><ext>, no part of the client filename
+    size: int
+    sha256: str
+    duplicate: bool    # the same content was already stored in this directory
+
+
+def _check_declared(f: UploadFile, policy: UploadPolicy) -> str:
+    ext = os.path.splitext(f.filename or "")[1].lower()
+    if ext not in policy.exts:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {policy.label}")
+    ctype = (f.content_type or "").lower()
+    if not any(ctype.startswith(p) for p in policy.mime_prefixes):
+        raise HTTPException(status_code=400, detail="Invalid content-type")
+    return ext
+
+
+def _open_temp(dest_dir: str) -> tuple[BinaryIO, str]:
+    os.makedirs(dest_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dest_dir, prefix=".upload-", suffix=".part")
+    return os.fdopen(fd, "wb", buffering=0), tmp
+
+
+def _finish(out: BinaryIO, tmp: str, final: str) -> bool:
+    """fsync + close the temp file and rename it into place; False if `final` already existed."""
+    os.fsync(out.fileno())
+    out.close()
+    if os.path.exists(final):
+        os.unlink(tmp)
+        return False
+    os.replace(tmp, final)
+    return True
+
+
+def _discard(out: BinaryIO, tmp: str) -> None:
+    out.close()
+    try:
+        os.unlink(tmp)
+    except FileNotFoundError:
+        pass
+
+
+def _write_all(out: BinaryIO, chunk: bytes) -> None:
+    view = memoryview(chunk)
+    while view:
+        view = view[out.write(view):]
+
+
+async def store_upload(f: UploadFile, dest_dir: str, policy: UploadPolicy = DOCUMENTS) -> StoredUpload:
+    """Validate and stream `f` into `dest_dir`; raises HTTPException (400/413) on bad input."""
+    ext = _check_declared(f, policy)
+    dest_dir = os.path.abspath(dest_dir)
+
+    first = await f.read(CHUNK_SIZE)
+    if not first:
+        raise HTTPException(status_code=400, detail="Empty file")
+    if not sniff(first, ext):
+        raise HTTPException(status_code=400, detail="File signature does not match extension")
+
+    out, tmp = await run_in_threadpool(_open_temp, dest_dir)
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        chunk = first
+        while chunk:
+            size += len(chunk)
+            if size > policy.max_bytes:
+                raise HTTPException(
+                    status_code=413, detail=f"File too large (>{policy.max_bytes // (1024 * 1024)}MB)"
+                )
+            digest.update(chunk)
+            await run_in_threadpool(_write_all, out, chunk)
+            chunk = await f.read(min(CHUNK_SIZE, policy.max_bytes + 1 - size))
+        sha = digest.hexdigest()
+        stored_name = f"{sha}{ext}"
+        final = os.path.join(dest_dir, stored_name)
+        created = await run_in_threadpool(_finish, out, tmp, final)
+    except BaseException:
+        await run_in_threadpool(_discard, out, tmp)
+        raise
+    return StoredUpload(path=final, stored_name=stored_name, size=size, sha256=sha, duplicate=not created)
@@ -6,11 +6,12 @@ from datetime import timedelta
 
 from sqlalchemy.orm import Session
 
-from app.services.sms_service import send_phone_code, check_phone_code
+from app.services.sms_service import check_phone_code, _assert_config, _to_e164
 from app.models import User, EmailPhoneToken
 from app.models.enums import TokenPurpose
-from app.services.auth_service import _now
-from app.services.email_service import send_email 
+from app.services.auth_service import _now, phone_in_use
+from app.security.pii import set_phone
+from app.services.outbound_queue import enqueue_email, enqueue_sms_code
 from app.config import ENV
 
 OTP_LENGTH = 6
@@ -75,7 +76,7 @@ def _consume_token(db: Session, user: User, purpose: TokenPurpose, target: str,
 # public helpers used by routers 
 
 def issue_email_verification(db: Session, user: User) -> str:
-    """Creates an email verification token and SENDS it via Gmail SMTP."""
+    """Creates an email verification token and queues the email (sent by the outbound worker)."""
     token = _issue_token(db, user, TokenPurpose.email_verify, target=user.email, ttl_minutes=30)
 
     subject = "Verify your email for Fixion"
@@ -93,8 +94,8 @@ def issue_email_verification(db: Session, user: User) -> str:
     """
     text = f"Your Fixion email verification token is: {token}\nThis token expires in 30 minutes."
 
-    # Send, if it fails, raise to surface the issue (so you fix SMTP early)
-    send_email(user.email, subject, html, text)
+    # Delivery (and retries) happen in the outbound worker; failures end up as dead messages
+    enqueue_email(db, user.email, subject, html, text, kind="email_verify")
 
     return token  # Keep returning for dev/testing responses if you want to show it
 
@@ -106,18 +107,20 @@ def confirm_email_verification(db: Session, user: User, token: str) -> None:
 
 def issue_phone_verification(db: Session, user: User, phone: str) -> str:
     """
-    Sends a 6-digit code via Twilio Verify SMS to the target phone.
-    We no longer insert an OTP row in email_phone_tokens for phone.
+    Queues a Twilio Verify SMS (6-digit code) to the target phone; the outbound
+    worker sends it. We no longer insert an OTP row in email_phone_tokens for phone.
     Returns an empty string (do not expose OTP).
     """
     if not phone:
         raise ValueError("Phone number required")
 
     try:
-        # Fire SMS via Twilio Verify
-        send_phone_code(phone)
+        # fail fast on bad input/config; the send itself is queued
+        _assert_config()
+        _to_e164(phone)
     except Exception as e:
         raise ValueError(str(e))
+    enqueue_sms_code(db, phone, kind="phone_verify")
 
     # For production, DO NOT return the OTP
     return ""  # keeps your router response shape: {"message": "OTP sent", "otp_for_testing": ""}
@@ -138,9 +141,11 @@ def confirm_phone_verification(db: Session, user: User, phone: str, otp: str) ->
     if not ok:
         raise ValueError("Invalid or expired OTP")
 
-    # success — persist on the user
+    # success — persist on the user (encrypted, with its blind index)
     if not user.phone_number:
-        user.phone_number = phone
+        if phone_in_use(db, phone, exclude_user_id=user.id):
+            raise ValueError("Phone number already in use")
+        set_phone(user, phone)
     user.phone_verified = True
     db.add(user)
     db.commit()
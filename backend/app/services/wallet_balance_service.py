@@ -0,0 +1,200 @@
+# app/services/wallet_balance_service.py
+"""
+Materialized wallet balances.
+
+`wallet_balances` holds one row per (user, currency) so balance checks are a
+primary-key lookup instead of a SUM over the user's whole ledger.
+
+- Every flush that inserts WalletLedger rows applies the signed deltas to the
+  snapshot with an atomic UPSERT on the same connection, so the snapshot
+  commits (or rolls back) together with the ledger rows.
+- `reconcile_wallet_balances` re-derives balances from the ledger, reports
+  drift and optionally repairs it (run it periodically, see
+  scripts/reconcile_wallet_balances.py).
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+from sqlalchemy import event, func, literal_column, select, case
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.payments import WalletLedger, WalletBalance
+from app.models.enums import LedgerEntryType
+
+log = logging.getLogger(__name__)
+
+# Credits are added to the balance, debits subtracted (amounts are stored positive)
+CREDIT_TYPES = (LedgerEntryType.deposit, LedgerEntryType.payout, LedgerEntryType.refund, LedgerEntryType.adjust)
+DEBIT_TYPES = (LedgerEntryType.charge, LedgerEntryType.withdrawal)
+
+ZERO = Decimal("0.00")
+
+
+def _quant(v) -> Decimal:
+    return Decimal(str(v or 0)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def signed_amount(entry_type, amount) -> Decimal:
+    """Signed contribution of one ledger entry; mirrors the CASE used by ledger_balance()."""
+    et = LedgerEntryType(entry_type)
+    if et in CREDIT_TYPES:
+        return _quant(amount)
+    if et in DEBIT_TYPES:
+        return -_quant(amount)
+    return ZERO
+
+
+def _signed_ledger_sum():
+    return func.coalesce(
+        func.sum(
+            case(
+                (WalletLedger.entry_type.in_(CREDIT_TYPES), WalletLedger.amount),
+                (WalletLedger.entry_type.in_(DEBIT_TYPES), -WalletLedger.amount),
+                else_=ZERO,
+            )
+        ),
+        ZERO,
+    )
+
+
+def _ledger_currency():
+    # same normalisation as the write path and the migration backfill; a literal, not a
+    # bound parameter, so the GROUP BY expression matches the selected one
+    return func.upper(func.coalesce(WalletLedger.currency, literal_column("'NGN'")))
+
+
+# reads
+
+def snapshot_balance(db: Session, user_id, currency: str = "NGN", *, for_update: bool = False) -> Decimal:
+    """
+    O(1) balance read from the snapshot.
+    With for_update=True the row is locked until commit, which serializes
+    concurrent debits against the same wallet.
+    """
+    stmt = select(WalletBalance.balance).where(
+        WalletBalance.user_id == user_id,
+        WalletBalance.currency == currency,
+    )
+    if for_update:
+        stmt = stmt.with_for_update()
+    bal = db.execute(stmt).scalar_one_or_none()
+    return _quant(bal)
+
+
+def ledger_balance(db: Session, user_id, currency: str = "NGN") -> Decimal:
+    """Authoritative balance derived from every ledger row (slow path, used by reconciliation)."""
+    stmt = select(_signed_ledger_sum()).where(
+        WalletLedger.user_id == user_id,
+        _ledger_currency() == currency.upper(),
+    )
+    return _quant(db.execute(stmt).scalar())
+
+
+# write path: keep the snapshot in step with ledger inserts
+
+def _apply_deltas(db: Session, deltas: dict) -> None:
+    conn = db.connection()
+    # stable order so two transactions touching the same wallets lock rows in the same order
+    for (user_id, currency) in sorted(deltas, key=lambda k: (str(k[0]), k[1])):
+        delta = deltas[(user_id, currency)]
+        if delta == 0:
+            continue
+        stmt = pg_insert(WalletBalance.__table__).values(
+            user_id=user_id, currency=currency, balance=delta,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "currency"],
+            set_={
+                "balance": WalletBalance.__table__.c.balance + stmt.excluded.balance,
+                "updated_at": func.now(),
+            },
+        )
+        conn.execute(stmt)
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_wallet_balances(db: Session, flush_context) -> None:
+    deltas: dict = defaultdict(lambda: ZERO)
+    for obj in db.new:
+        if isinstance(obj, WalletLedger):
+            key = (obj.user_id, (obj.currency or "NGN").upper())
+            deltas[key] += signed_amount(obj.entry_type, obj.amount)
+    if deltas:
+        _apply_deltas(db, deltas)
+
+
+# reconciliation
+
+def reconcile_wallet_balances(db: Session, *, fix: bool = False) -> list[dict]:
+    """
+    Compare every snapshot row with the balance re-derived from the ledger.
+    Returns one dict per drifted (user, currency). With fix=True each drifted
+    row is locked, recomputed and overwritten; the caller commits.
+    """
+    currency = _ledger_currency()
+    ledger = {
+        (uid, cur): _quant(total)
+        for uid, cur, total in db.execute(
+            select(WalletLedger.user_id, currency, _signed_ledger_sum())
+            .group_by(WalletLedger.user_id, currency)
+        ).all()
+    }
+    snapshot = {
+        (uid, cur): _quant(bal)
+        for uid, cur, bal in db.execute(
+            select(WalletBalance.user_id, WalletBalance.currency, WalletBalance.balance)
+        ).all()
+    }
+
+    drift: list[dict] = []
+    for key in set(ledger) | set(snapshot):
+        expected = ledger.get(key, ZERO)
+        actual = snapshot.get(key)
+        if actual is not None and actual == expected:
+            continue
+        user_id, currency = key
+        drift.append({
+            "user_id": str(user_id),
+            "currency": currency,
+            "snapshot": actual,
+            "ledger": expected,
+            "diff": (actual or ZERO) - expected,
+        })
+        log.warning(
+            "wallet balance drift user_id=%s currency=%s snapshot=%s ledger=%s",
+            user_id, currency, actual, expected,
+        )
+        if fix:
+            _repair(db, user_id, currency)
+    return drift
+
+
+def _repair(db: Session, user_id, currency: str) -> None:
+    conn = db.connection()
+    conn.execute(
+        pg_insert(WalletBalance.__table__)
+        .values(user_id=user_id, currency=currency, balance=ZERO)
+        .on_conflict_do_nothing(index_elements=["user_id", "currency"])
+    )
+    # lock first, then recompute, so ledger inserts racing with us queue behind the lock
+    snapshot_balance(db, user_id, currency, for_update=True)
+    exact = ledger_balance(db, user_id, currency)
+    conn.execute(
+        WalletBalance.__table__.update()
+        .where(WalletBalance.user_id == user_id, WalletBalance.currency == currency)
+        .values(balance=exact, updated_at=func.now())
+    )
+
+
+def total_balance(db: Session, user_id, currency: Optional[str] = None) -> Decimal:
+    """Sum of the user's snapshot rows (all currencies unless one is given)."""
+    stmt = select(func.coalesce(func.sum(WalletBalance.balance), ZERO)).where(WalletBalance.user_id == user_id)
+    if currency:
+        stmt = stmt.where(WalletBalance.currency == currency)
+    return _quant(db.execute(stmt).scalar())
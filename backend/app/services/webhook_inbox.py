@@ -0,0 +1,255 @@
+# app/services/webhook_inbox.py
+"""
+Durable webhook inbox (table webhook_inbox).
+
+The webhook route only verifies the signature and calls store_event() (one
+INSERT ... ON CONFLICT DO NOTHING keyed by provider + dedupe key), then acks.
+Workers apply stored events:
+
+- one transaction per event: the row is claimed with FOR UPDATE SKIP LOCKED,
+  the ledger work runs (paystack_events.apply_paystack_event) and the row is
+  marked done in the same commit; a crash rolls everything back and the event
+  stays pending
+- per-reference ordering: an event is only claimable when no earlier
+  (lower seq) unfinished event exists for the same reference
+- failures: the transaction is rolled back and the row is rescheduled with
+  jittered exponential backoff; after WEBHOOK_MAX_ATTEMPTS it becomes 'dead'
+- replay(): puts done/dead events back to pending (handlers are idempotent)
+
+Workers run in-process (WEBHOOK_WORKER_IN_PROCESS) and/or via
+scripts/run_webhook_worker.py; any number can run side by side.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from app.config import (
+    WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_BACKOFF_BASE_SECONDS,
+    WEBHOOK_BACKOFF_MAX_SECONDS,
+)
+from app.models.webhook_inbox import (
+    WebhookInboxEvent,
+    WEBHOOK_PENDING,
+    WEBHOOK_DONE,
+    WEBHOOK_DEAD,
+)
+from app.observability.metrics import WEBHOOK_EVENTS, WEBHOOK_LAG
+from app.services.auth_service import _now
+from app.services.paystack_events import apply_paystack_event
+
+log = logging.getLogger(__name__)
+
+PROVIDER_PAYSTACK = "paystack"
+
+# provider -> function(db, payload) -> result dict (must not commit)
+HANDLERS = {
+    PROVIDER_PAYSTACK: apply_paystack_event,
+}
+
+# set by store_event() so in-process workers pick new events up without waiting for the poll
+_wake = threading.Event()
+
+
+# receive side
+
+def dedupe_key(payload: dict, raw: bytes) -> str:
+    """Provider retries of the same event map to the same key."""
+    event = str(payload.get("event") or "")
+    data = payload.get("data") if isinstance(payload.get("data"), dict) else {}
+    ident = data.get("id") or data.get("reference")
+    if ident:
+        return f"{event}:{ident}"[:160]
+    return "sha256:" + hashlib.sha256(raw).hexdigest()
+
+
+async def store_event(db: AsyncSession, provider: str, payload: dict, raw: bytes) -> bool:
+    """Persist a verified event. Returns False if it was already in the inbox."""
+    data = payload.get("data") if isinstance(payload.get("data"), dict) else {}
+    reference = data.get("reference")
+    stmt = (
+        pg_insert(WebhookInboxEvent)
+        .values(
+            provider=provider,
+            dedupe_key=dedupe_key(payload, raw),
+            event=str(payload.get("event") or "")[:64],
+            reference=str(reference)[:64] if reference else None,
+            payload=payload,
+        )
+        .on_conflict_do_nothing(constraint="uq_webhook_inbox_provider_dedupe")
+        .returning(WebhookInboxEvent.id)
+    )
+    inserted = (await db.execute(stmt)).first() is not None
+    await db.commit()
+    if inserted:
+        _wake.set()
+    return inserted
+
+
+# worker side
+
+def _backoff_seconds(attempts: int) -> float:
+    ceiling = min(WEBHOOK_BACKOFF_MAX_SECONDS, WEBHOOK_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def _claimable(now: datetime):
+    earlier = aliased(WebhookInboxEvent)
+    blocked = exists().where(
+        earlier.reference == WebhookInboxEvent.reference,
+        earlier.seq < WebhookInboxEvent.seq,
+        earlier.status == WEBHOOK_PENDING,
+    )
+    # seconds since receipt, computed by the DB: created_at is a naive column in the session's time zone
+    waited = func.extract("epoch", func.clock_timestamp() - WebhookInboxEvent.created_at)
+    return (
+        select(WebhookInboxEvent, waited)
+        .where(
+            WebhookInboxEvent.status == WEBHOOK_PENDING,
+            WebhookInboxEvent.next_attempt_at <= now,
+            ~blocked,
+        )
+        .order_by(WebhookInboxEvent.seq)
+        .limit(1)
+        .with_for_update(skip_locked=True, of=WebhookInboxEvent)
+    )
+
+
+def process_one(db: Session) -> bool:
+    """Claim and apply one due event in a single transaction. Returns False when nothing is due."""
+    claimed = db.execute(_claimable(_now())).first()
+    if claimed is None:
+        db.rollback()
+        return False
+
+    row, waited = claimed
+    claimed_at = time.perf_counter()
+    row_id, provider = row.id, row.provider
+    try:
+        handler = HANDLERS[provider]
+        result = handler(db, row.payload)
+        row.status = WEBHOOK_DONE
+        row.attempts += 1
+        row.result = result
+        row.last_error = None
+        row.processed_at = _now()
+        db.commit()
+        WEBHOOK_EVENTS.inc(provider=provider, outcome="done")
+        if waited is not None:
+            WEBHOOK_LAG.observe(float(waited) + time.perf_counter() - claimed_at, provider=provider)
+        return True
+    except Exception as e:
+        db.rollback()
+        error = f"{type(e).__name__}: {e}"[:2000]
+        _record_failure(db, row_id, error)
+        return True
+
+
+def _record_failure(db: Session, row_id, error: str) -> None:
+    row = db.get(WebhookInboxEvent, row_id, with_for_update=True)
+    if row is None:
+        return
+    row.attempts += 1
+    row.last_error = error
+    WEBHOOK_EVENTS.inc(provider=row.provider, outcome="dead" if row.attempts >= WEBHOOK_MAX_ATTEMPTS else "failed")
+    if row.attempts >= WEBHOOK_MAX_ATTEMPTS:
+        row.status = WEBHOOK_DEAD
+        log.warning("webhook %s (%s %s) dead after %d attempt(s): %s", row.id, row.provider, row.event, row.attempts, error)
+    else:
+        row.next_attempt_at = _now() + timedelta(seconds=_backoff_seconds(row.attempts))
+        log.info("webhook %s (%s) failed, attempt %d: %s", row.id, row.event, row.attempts, error)
+    db.commit()
+
+
+def run_worker(
+    session_factory,
+    *,
+    poll_interval: float = 1.0,
+    stop: Optional[threading.Event] = None,
+    once: bool = False,
+) -> None:
+    """Apply events until `stop` is set (or nothing is due, with once=True)."""
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        db = session_factory()
+        try:
+            handled = process_one(db)
+        except Exception:
+            db.rollback()
+            log.exception("webhook worker failed")
+            handled = False
+        finally:
+            db.close()
+        if handled:
+            continue
+        if once:
+            return
+        _wake.wait(poll_interval)
+        _wake.clear()
+
+
+def start_worker_threads(session_factory, count: int, **kwargs) -> threading.Event:
+    """Start `count` worker threads (in-process mode); set the returned event to stop them."""
+    stop = threading.Event()
+    for i in range(max(1, count)):
+        threading.Thread(
+            target=run_worker, args=(session_factory,), kwargs={**kwargs, "stop": stop},
+            name=f"webhook-worker-{i}", daemon=True,
+        ).start()
+    return stop
+
+
+# inspection / replay
+
+def inbox_stats(db: Session) -> dict:
+    rows = db.execute(
+        select(WebhookInboxEvent.status, func.count()).group_by(WebhookInboxEvent.status)
+    ).all()
+    lag = db.execute(
+        select(func.min(WebhookInboxEvent.created_at)).where(WebhookInboxEvent.status == WEBHOOK_PENDING)
+    ).scalar()
+    return {"by_status": {s: n for s, n in rows}, "oldest_pending_created_at": lag}
+
+
+def list_events(db: Session, status: str = WEBHOOK_DEAD, limit: int = 50) -> list[WebhookInboxEvent]:
+    return db.execute(
+        select(WebhookInboxEvent)
+        .where(WebhookInboxEvent.status == status)
+        .order_by(WebhookInboxEvent.seq.desc())
+        .limit(limit)
+    ).scalars().all()
+
+
+def replay(
+    db: Session,
+    *,
+    ids: Optional[Sequence] = None,
+    statuses: Sequence[str] = (WEBHOOK_DEAD,),
+    since: Optional[datetime] = None,
+) -> int:
+    """Reset matching events to pending with fresh attempts; workers apply them again in seq order."""
+    stmt = (
+        update(WebhookInboxEvent)
+        .where(WebhookInboxEvent.status.in_(list(statuses)))
+        .values(status=WEBHOOK_PENDING, attempts=0, next_attempt_at=_now(), last_error=None)
+    )
+    if ids:
+        stmt = stmt.where(WebhookInboxEvent.id.in_(list(ids)))
+    if since is not None:
+        stmt = stmt.where(WebhookInboxEvent.created_at >= since)
+    n = db.execute(stmt).rowcount
+    db.commit()
+    _wake.set()
+    return n
@@ -0,0 +1,53 @@
+"""add wallet_balances snapshot table
+
+Revision ID: 050245307e56
+Revises: 4e5fcca9d92b
+Create Date: 2025-10-20 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '050245307e56'
+down_revision: Union[str, Sequence[str], None] = '4e5fcca9d92b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "wallet_balances",
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("balance", sa.Numeric(18, 2), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "currency"),
+    )
+
+    # Backfill from the ledger (same sign rules as wallet_balance_service)
+    op.execute(
+        """
+        INSERT INTO wallet_balances (user_id, currency, balance)
+        SELECT user_id,
+               UPPER(COALESCE(currency, 'NGN')),
+               COALESCE(SUM(CASE
+                   WHEN entry_type::text IN ('deposit', 'payout', 'refund', 'adjust') THEN amount
+                   WHEN entry_type::text IN ('charge', 'withdrawal') THEN -amount
+                   ELSE 0
+               END), 0)
+        FROM wallet_ledger
+        GROUP BY user_id, UPPER(COALESCE(currency, 'NGN'))
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("wallet_balances")
@@ -0,0 +1,70 @@
+"""add artisan search document, full-text and trigram indexes
+
+Revision ID: 57abba472e6f
+Revises: 050245307e56
+Create Date: 2025-10-21 10:04:17.552910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '57abba472e6f'
+down_revision: Union[str, Sequence[str], None] = '050245307e56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column("artisan_profiles", sa.Column("search_document", sa.Text(), nullable=True))
+    op.add_column("artisan_profiles", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True))
+
+    # Backfill (same expressions as artisan_search_service.refresh_search_documents)
+    op.execute(
+        """
+        UPDATE artisan_profiles AS ap
+        SET search_document = lower(concat_ws(' ',
+                u.full_name, ap.service_category, ap.service_location, ap.service_description)),
+            search_vector =
+                setweight(to_tsvector('simple', coalesce(u.full_name, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(ap.service_category, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(ap.service_location, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(ap.service_description, '')), 'C')
+        FROM users AS u
+        WHERE u.id = ap.user_id
+        """
+    )
+
+    op.create_index(
+        "ix_artisan_profiles_search_vector", "artisan_profiles", ["search_vector"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_artisan_profiles_search_document_trgm", "artisan_profiles", ["search_document"],
+        postgresql_using="gin", postgresql_ops={"search_document": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_artisan_profiles_service_location_trgm", "artisan_profiles", ["service_location"],
+        postgresql_using="gin", postgresql_ops={"service_location": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_artisan_profiles_status_created", "artisan_profiles",
+        ["verification_status", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_artisan_profiles_status_created", table_name="artisan_profiles")
+    op.drop_index("ix_artisan_profiles_service_location_trgm", table_name="artisan_profiles")
+    op.drop_index("ix_artisan_profiles_search_document_trgm", table_name="artisan_profiles")
+    op.drop_index("ix_artisan_profiles_search_vector", table_name="artisan_profiles")
+    op.drop_column("artisan_profiles", "search_vector")
+    op.drop_column("artisan_profiles", "search_document")
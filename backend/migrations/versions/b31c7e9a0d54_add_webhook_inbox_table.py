@@ -0,0 +1,53 @@
+"""add webhook_inbox table
+
+Revision ID: b31c7e9a0d54
+Revises: d82990214f35
+Create Date: 2025-10-23 15:41:27.803316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b31c7e9a0d54'
+down_revision: Union[str, Sequence[str], None] = 'd82990214f35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "webhook_inbox",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("seq", sa.BigInteger(), sa.Identity(always=False), nullable=False),
+        sa.Column("provider", sa.String(length=32), nullable=False),
+        sa.Column("dedupe_key", sa.String(length=160), nullable=False),
+        sa.Column("event", sa.String(length=64), nullable=False),
+        sa.Column("reference", sa.String(length=64), nullable=True),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("status", sa.String(length=16), server_default="pending", nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("result", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("seq"),
+        sa.UniqueConstraint("provider", "dedupe_key", name="uq_webhook_inbox_provider_dedupe"),
+    )
+    op.create_index("ix_webhook_inbox_status_next", "webhook_inbox", ["status", "next_attempt_at"])
+    op.create_index("ix_webhook_inbox_reference_seq", "webhook_inbox", ["reference", "seq"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_webhook_inbox_reference_seq", table_name="webhook_inbox")
+    op.drop_index("ix_webhook_inbox_status_next", table_name="webhook_inbox")
+    op.drop_table("webhook_inbox")
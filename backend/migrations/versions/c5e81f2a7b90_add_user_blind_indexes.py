@@ -0,0 +1,154 @@
+"""add phone/nin blind indexes to users
+
+Revision ID: c5e81f2a7b90
+Revises: b31c7e9a0d54
+Create Date: 2025-10-24 10:12:05.418233
+
+"""
+import hashlib
+import hmac
+import logging
+import os
+import re
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+log = logging.getLogger("alembic.runtime.migration")
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e81f2a7b90'
+down_revision: Union[str, Sequence[str], None] = 'b31c7e9a0d54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copy of app.security.pii as of this revision (blind index v1), so
+# replaying the migration does not depend on later app code. Keys come from
+# the same environment as the app (FERNET_KEY, BLIND_INDEX_KEY, SECRET_KEY).
+
+_FERNET_PREFIX = "gAAAAA"  # version byte 0x80, base64url
+
+
+def _fernet():
+    key = os.getenv("FERNET_KEY", "").strip()
+    if not key:
+        return None
+    try:
+        from cryptography.fernet import Fernet
+        return Fernet(key.encode())
+    except (ImportError, ValueError):
+        return None  # plaintext fallback, as the app does
+
+
+def _blind_key() -> bytes:
+    key = os.getenv("BLIND_INDEX_KEY", "").strip()
+    if key:
+        return key.encode()
+    secret = os.getenv("FERNET_KEY", "").strip() or os.getenv("SECRET_KEY", "change-me")
+    return hmac.new(secret.encode(), b"fixion-blind-index-v1", hashlib.sha256).digest()
+
+
+def _normalize_phone(phone: str) -> str:
+    digits = re.sub(r"\D+", "", phone)
+    if digits.startswith("0") and len(digits) == 11:
+        return "234" + digits[1:]
+    return digits
+
+
+def _normalize_nin(nin: str) -> str:
+    return re.sub(r"[^0-9A-Za-z]+", "", nin).upper()
+
+
+def _bidx(key: bytes, normalized: str, field: str) -> Optional[str]:
+    if not normalized:
+        return None
+    return hmac.new(key, f"{field}:{normalized}".encode(), hashlib.sha256).hexdigest()
+
+
+def _backfill(conn, batch_size: int = 1000) -> dict:
+    """
+    Index existing users. Values Fernet rejects are legacy plaintext (written
+    before FERNET_KEY was set) unless they look like a token: those are indexed
+    as they are and encrypted in the same UPDATE. When two accounts share a
+    phone number only the oldest keeps phone_bidx, so the unique index holds.
+    """
+    fernet, key = _fernet(), _blind_key()
+    stats = {"users": 0, "phones": 0, "nins": 0, "duplicate_phones": 0, "legacy_plaintext": 0, "undecryptable": 0}
+
+    def read(stored):
+        # (plaintext, ciphertext to write back or None)
+        if not stored:
+            return None, None
+        if fernet is None:
+            return stored, None
+        try:
+            return fernet.decrypt(stored.encode()).decode(), None
+        except Exception:
+            if stored.startswith(_FERNET_PREFIX):
+                return None, None  # encrypted under another key
+            return stored, fernet.encrypt(stored.encode()).decode()
+
+    seen_phones: set[str] = set()
+    last = None
+    while True:
+        after = "WHERE (created_at, id) > (:c, :i) " if last else ""
+        rows = conn.execute(
+            sa.text(f"SELECT id, created_at, phone_number, nin FROM users {after}ORDER BY created_at, id LIMIT :n"),
+            {"c": last[0], "i": last[1], "n": batch_size} if last else {"n": batch_size},
+        ).all()
+        if not rows:
+            return stats
+        updates = []
+        for r in rows:
+            phone, phone_ct = read(r.phone_number)
+            nin, nin_ct = read(r.nin)
+            if phone_ct or nin_ct:
+                stats["legacy_plaintext"] += 1
+            if (r.phone_number and phone is None) or (r.nin and nin is None):
+                stats["undecryptable"] += 1
+            p_idx = _bidx(key, _normalize_phone(phone or ""), "phone")
+            n_idx = _bidx(key, _normalize_nin(nin or ""), "nin")
+            if p_idx and p_idx in seen_phones:
+                stats["duplicate_phones"] += 1
+                p_idx = None
+            elif p_idx:
+                seen_phones.add(p_idx)
+                stats["phones"] += 1
+            if n_idx:
+                stats["nins"] += 1
+            if p_idx or n_idx or phone_ct or nin_ct:
+                updates.append({"id": r.id, "p": p_idx, "n": n_idx, "pc": phone_ct, "nc": nin_ct})
+        if updates:
+            conn.execute(
+                sa.text(
+                    "UPDATE users SET phone_bidx = :p, nin_bidx = :n, "
+                    "phone_number = COALESCE(:pc, phone_number), nin = COALESCE(:nc, nin) WHERE id = :id"
+                ),
+                updates,
+            )
+        stats["users"] += len(rows)
+        last = (rows[-1].created_at, rows[-1].id)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("users", sa.Column("phone_bidx", sa.String(length=64), nullable=True))
+    op.add_column("users", sa.Column("nin_bidx", sa.String(length=64), nullable=True))
+
+    # existing rows: decrypt and index (needs the same FERNET_KEY / BLIND_INDEX_KEY as the app)
+    stats = _backfill(op.get_bind())
+    log.info("blind index backfill: %s", stats)
+
+    op.create_index(op.f("ix_users_phone_bidx"), "users", ["phone_bidx"], unique=True)
+    op.create_index(op.f("ix_users_nin_bidx"), "users", ["nin_bidx"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_users_nin_bidx"), table_name="users")
+    op.drop_index(op.f("ix_users_phone_bidx"), table_name="users")
+    op.drop_column("users", "nin_bidx")
+    op.drop_column("users", "phone_bidx")
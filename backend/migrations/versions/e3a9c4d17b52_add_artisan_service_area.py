@@ -0,0 +1,48 @@
+"""add artisan service area (latitude, longitude, radius) and coverage index
+
+Revision ID: e3a9c4d17b52
+Revises: c5e81f2a7b90
+Create Date: 2025-10-25 09:31:44.106528
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a9c4d17b52'
+down_revision: Union[str, Sequence[str], None] = 'c5e81f2a7b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("artisan_profiles", sa.Column("latitude", sa.Float(), nullable=True))
+    op.add_column("artisan_profiles", sa.Column("longitude", sa.Float(), nullable=True))
+    op.add_column("artisan_profiles", sa.Column("service_radius_km", sa.Float(), nullable=True))
+
+    # Same expression as app.models.artisan.coverage_box(); queries only use the index
+    # if they build the identical expression.
+    op.execute(
+        """
+        CREATE INDEX ix_artisan_profiles_coverage ON artisan_profiles USING gist (
+            box(
+                point(longitude - service_radius_km / CAST((111.32 * greatest(cos(radians(latitude)), 0.01)) AS FLOAT),
+                      latitude - service_radius_km / CAST(111.32 AS FLOAT)),
+                point(longitude + service_radius_km / CAST((111.32 * greatest(cos(radians(latitude)), 0.01)) AS FLOAT),
+                      latitude + service_radius_km / CAST(111.32 AS FLOAT))
+            )
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_artisan_profiles_coverage", table_name="artisan_profiles")
+    op.drop_column("artisan_profiles", "service_radius_km")
+    op.drop_column("artisan_profiles", "longitude")
+    op.drop_column("artisan_profiles", "latitude")
@@ -0,0 +1,80 @@
+"""add artisan rating aggregates
+
+Revision ID: f1d2b8e6a4c3
+Revises: e3a9c4d17b52
+Create Date: 2025-10-25 15:02:37.884190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1d2b8e6a4c3'
+down_revision: Union[str, Sequence[str], None] = 'e3a9c4d17b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Bayesian prior as of this revision (config defaults). A different
+# RATING_PRIOR_MEAN / RATING_PRIOR_WEIGHT is applied afterwards with
+# scripts/rebuild_artisan_ratings.py --fix.
+PRIOR_MEAN = 4.0
+PRIOR_WEIGHT = 5.0
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("artisan_profiles", sa.Column("rating_count", sa.Integer(), server_default=sa.text("0"), nullable=False))
+    op.add_column("artisan_profiles", sa.Column("rating_sum", sa.Integer(), server_default=sa.text("0"), nullable=False))
+    op.add_column(
+        "artisan_profiles",
+        sa.Column("rating_histogram", postgresql.ARRAY(sa.Integer()), server_default=sa.text("'{0,0,0,0,0}'"), nullable=False),
+    )
+    op.add_column(
+        "artisan_profiles",
+        sa.Column("rating_score", sa.Float(), server_default=sa.text(repr(PRIOR_MEAN)), nullable=False),
+    )
+
+    # Backfill (same aggregates as rating_service.rebuild_ratings)
+    op.execute(
+        sa.text(
+            """
+            UPDATE artisan_profiles AS ap
+            SET rating_count = r.n,
+                rating_sum = r.total,
+                rating_histogram = ARRAY[r.s1, r.s2, r.s3, r.s4, r.s5],
+                rating_score = (:w * :m + r.total) / (:w + r.n)
+            FROM (
+                SELECT artisan_id,
+                       count(*) AS n,
+                       sum(rating) AS total,
+                       count(*) FILTER (WHERE rating = 1) AS s1,
+                       count(*) FILTER (WHERE rating = 2) AS s2,
+                       count(*) FILTER (WHERE rating = 3) AS s3,
+                       count(*) FILTER (WHERE rating = 4) AS s4,
+                       count(*) FILTER (WHERE rating = 5) AS s5
+                FROM reviews
+                WHERE artisan_id IS NOT NULL AND rating BETWEEN 1 AND 5
+                GROUP BY artisan_id
+            ) AS r
+            WHERE r.artisan_id = ap.user_id
+            """
+        ).bindparams(w=PRIOR_WEIGHT, m=PRIOR_MEAN)
+    )
+
+    op.create_index(
+        "ix_artisan_profiles_status_rating", "artisan_profiles",
+        ["verification_status", "rating_score", "id"], unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_artisan_profiles_status_rating", table_name="artisan_profiles")
+    op.drop_column("artisan_profiles", "rating_score")
+    op.drop_column("artisan_profiles", "rating_histogram")
+    op.drop_column("artisan_profiles", "rating_sum")
+    op.drop_column("artisan_profiles", "rating_count")
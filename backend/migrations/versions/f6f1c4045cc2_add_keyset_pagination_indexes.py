@@ -0,0 +1,45 @@
+"""add (created_at, id) indexes for keyset pagination
+
+Revision ID: f6f1c4045cc2
+Revises: 57abba472e6f
+Create Date: 2025-10-22 14:37:09.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6f1c4045cc2'
+down_revision: Union[str, Sequence[str], None] = '57abba472e6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_INDEXES = [
+    ("ix_users_created_id", "users", ["created_at", "id"]),
+    ("ix_jobs_created_id", "jobs", ["created_at", "id"]),
+    ("ix_jobs_customer_created_id", "jobs", ["customer_id", "created_at", "id"]),
+    ("ix_jobs_artisan_status_created_id", "jobs", ["artisan_id", "status", "created_at", "id"]),
+    ("ix_payments_created_id", "payments", ["created_at", "id"]),
+    ("ix_payments_customer_created_id", "payments", ["customer_id", "created_at", "id"]),
+    ("ix_payout_user_created_id", "payouts", ["user_id", "created_at", "id"]),
+    ("ix_reviews_created_id", "reviews", ["created_at", "id"]),
+    ("ix_complaints_created_id", "complaints", ["created_at", "id"]),
+    ("ix_disputes_created_id", "disputes", ["created_at", "id"]),
+    ("ix_announcements_active_created_id", "announcements", ["is_active", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in _INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,36 @@
+# scripts/backfill_blind_indexes.py
+"""
+Recompute users.phone_bidx / users.nin_bidx from the encrypted columns.
+
+    python scripts/backfill_blind_indexes.py
+    python scripts/backfill_blind_indexes.py --batch-size 5000
+
+Run after changing BLIND_INDEX_KEY (or FERNET_KEY when BLIND_INDEX_KEY is
+unset); the migration that adds the columns does the first fill itself. One
+transaction: lookups see either the old or the new indexes, never a mix.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.db.database import engine
+from app.security.pii import backfill_blind_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        stats = backfill_blind_indexes(conn, batch_size=args.batch_size)
+    print(f"[ok] {stats['users']} user(s): {stats['phones']} phone index(es), {stats['nins']} NIN index(es)")
+    if stats["duplicate_phones"]:
+        print(f"[warn] {stats['duplicate_phones']} account(s) share a phone number with an older account; "
+              "their phone_bidx was left empty")
+
+
+if __name__ == "__main__":
+    main()
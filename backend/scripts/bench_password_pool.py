@@ -0,0 +1,91 @@
+# scripts/bench_password_pool.py
+"""
+Event-loop stall caused by bcrypt verification (app/security/passwords.py).
+
+    python scripts/bench_password_pool.py                  # 16 logins, cost BCRYPT_ROUNDS
+    python scripts/bench_password_pool.py --logins 64 --rounds 10
+
+No database needed. Runs the same batch of concurrent password checks twice,
+inline on the event loop (what async /auth/login did) and on the password
+pool, while a heartbeat task ticks every 10ms. Reports wall time and the
+worst heartbeat delay, i.e. how long any other request on that worker would
+have waited. Also shows how many checks the pool refuses when --max-pending
+is smaller than the batch.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list[float], interval: float = 0.01):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - t0 - interval)
+
+
+async def _measure(label: str, checks):
+    stop, lags = asyncio.Event(), []
+    hb = asyncio.create_task(_heartbeat(stop, lags))
+    await asyncio.sleep(0.02)
+    t0 = time.perf_counter()
+    results = await checks()
+    wall = time.perf_counter() - t0
+    stop.set()
+    await hb
+    print(f"  {label:8s} wall={wall * 1000:8.1f} ms  worst loop stall={max(lags) * 1000:8.1f} ms")
+    return results
+
+
+async def main_async(args):
+    from fastapi import HTTPException
+    from app.security import passwords
+
+    stored = passwords.pwd_context.hash("correct horse")
+
+    async def inline():
+        out = []
+        for _ in range(args.logins):
+            out.append(passwords.pwd_context.verify("correct horse", stored))
+            await asyncio.sleep(0)
+        return out
+
+    async def pooled():
+        return await asyncio.gather(
+            *(passwords.verify_and_update_async("correct horse", stored) for _ in range(args.logins)),
+            return_exceptions=True,
+        )
+
+    print(f"{args.logins} concurrent checks, cost {args.rounds}, "
+          f"pool workers={passwords.pool.workers} max_pending={passwords.pool.max_pending}")
+    await _measure("inline", inline)
+    results = await _measure("pool", pooled)
+    refused = sum(1 for r in results if isinstance(r, HTTPException))
+    print(f"  pool refused {refused} check(s) with 503; metrics: {passwords.metrics_snapshot()}")
+    passwords.pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=int(os.getenv("BCRYPT_ROUNDS", "12")))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-pending", type=int, default=None)
+    args = parser.parse_args()
+
+    # the pool reads its settings at import time
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    if args.workers:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    if args.max_pending:
+        os.environ["PASSWORD_HASH_MAX_PENDING"] = str(args.max_pending)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# scripts/bench_pii.py
+"""
+CPU cost of decrypting phone numbers for one list page (app/security/pii.py).
+
+    python scripts/bench_pii.py                    # page of 200, 200 pages
+    python scripts/bench_pii.py --page 50 --pages 1000 --distinct 5000
+
+No database needed: synthetic ciphertexts are generated with FERNET_KEY (a
+throwaway key when unset). Compares, per page:
+  serial   - one Fernet decrypt per row, no cache (what every list page did before)
+  cold     - decrypt_many, nothing cached yet
+  warm     - decrypt_many, rows seen before (steady state for popular pages)
+  skip     - decrypt_many(skip=True), for responses without the phone
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+if not os.getenv("FERNET_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["FERNET_KEY"] = Fernet.generate_key().decode()
+
+from app.config import FERNET_KEY
+from app.security.pii import PIICodec
+
+
+def _cpu_ms(fn) -> float:
+    t0 = time.process_time()
+    fn()
+    return (time.process_time() - t0) * 1000
+
+
+def _summary(samples: list[float]) -> str:
+    s = sorted(samples)
+    return (f"mean={statistics.fmean(s):7.3f} ms  p50={statistics.median(s):7.3f} ms  "
+            f"p99={s[min(len(s) - 1, int(len(s) * 0.99))]:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--page", type=int, default=200, help="rows per page")
+    parser.add_argument("--pages", type=int, default=200, help="pages per scenario")
+    parser.add_argument("--distinct", type=int, default=2000, help="distinct phone numbers in the table")
+    parser.add_argument("--cache-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    writer = PIICodec(FERNET_KEY)
+    tokens = [writer.encrypt(f"080{random.randrange(10**8):08d}") for _ in range(args.distinct)]
+    pages = [random.sample(tokens, min(args.page, len(tokens))) for _ in range(args.pages)]
+
+    uncached = PIICodec(FERNET_KEY, cache_size=0)
+    serial = [_cpu_ms(lambda p=p: [uncached.decrypt(t) for t in p]) for p in pages]
+
+    cold_codec = PIICodec(FERNET_KEY, cache_size=args.cache_size)
+    cold = []
+    for p in pages:
+        cold_codec.clear()
+        cold.append(_cpu_ms(lambda p=p: cold_codec.decrypt_many(p)))
+
+    warm_codec = PIICodec(FERNET_KEY, cache_size=args.cache_size)
+    warm_codec.decrypt_many(tokens)  # prime
+    warm = [_cpu_ms(lambda p=p: warm_codec.decrypt_many(p)) for p in pages]
+
+    skip = [_cpu_ms(lambda p=p: warm_codec.decrypt_many(p, skip=True)) for p in pages]
+
+    print(f"page={args.page} rows, {args.pages} pages, {args.distinct} distinct phones, CPU time per page:")
+    print(f"  serial  {_summary(serial)}")
+    print(f"  cold    {_summary(cold)}")
+    print(f"  warm    {_summary(warm)}")
+    print(f"  skip    {_summary(skip)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# scripts/bench_request_logging.py
+"""
+Throughput of the request logging middleware: old BaseHTTPMiddleware vs pure ASGI.
+
+    python scripts/bench_request_logging.py
+    python scripts/bench_request_logging.py --requests 20000 --concurrency 64 --sample 0.1
+
+In-process (httpx ASGITransport, no sockets), against a tiny FastAPI app with
+one JSON route, so the numbers are dominated by middleware + logging cost.
+Logs go to /dev/null in both cases. Variants:
+  legacy   - the previous main.RequestLogMiddleware (BaseHTTPMiddleware,
+             f-string through the root logger's StreamHandler, synchronous)
+  asgi     - app/observability/middleware.py + queue handler, every request logged
+  sampled  - same, success logs sampled at --sample
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httpx
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.observability import logs
+from app.observability.middleware import RequestLogMiddleware
+
+
+class LegacyRequestLogMiddleware(BaseHTTPMiddleware):
+    """Verbatim copy of the middleware main.py used before."""
+
+    async def dispatch(self, request, call_next):
+        start = time.time()
+        req_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+        request.state.request_id = req_id
+        try:
+            response = await call_next(request)
+        except Exception:
+            dur_ms = int((time.time() - start) * 1000)
+            logging.exception(f"req_id={req_id} path={request.url.path} method={request.method} dur_ms={dur_ms}")
+            raise
+        dur_ms = int((time.time() - start) * 1000)
+        logging.info(f"req_id={req_id} path={request.url.path} method={request.method} status={response.status_code} dur_ms={dur_ms}")
+        response.headers["X-Request-ID"] = req_id
+        return response
+
+
+def build_app(middleware, **kwargs) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.add_middleware(middleware, **kwargs)
+    return app
+
+
+async def drive(app, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(n):
+            for _ in range(n):
+                r = await client.get("/ping")
+                assert r.status_code == 200 and r.headers.get("x-request-id")
+
+        per = requests // concurrency
+        for _ in range(50):  # warm-up
+            await client.get("/ping")
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(per) for _ in range(concurrency)))
+        return per * concurrency / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--sample", type=float, default=0.1)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    root = logging.getLogger()
+    for name in ("httpx", "httpcore"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    # legacy: basicConfig-style synchronous StreamHandler
+    legacy_handler = logging.StreamHandler(devnull)
+    legacy_handler.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
+    root.handlers[:] = [legacy_handler]
+    root.setLevel(logging.INFO)
+    legacy = asyncio.run(drive(build_app(LegacyRequestLogMiddleware), args.requests, args.concurrency))
+
+    # new: queue handler + JSON formatter
+    logs.setup_logging(level="INFO", fmt="json", stream=devnull)
+    asgi = asyncio.run(drive(build_app(RequestLogMiddleware, sample_rate=1.0), args.requests, args.concurrency))
+    sampled = asyncio.run(drive(build_app(RequestLogMiddleware, sample_rate=args.sample), args.requests, args.concurrency))
+    logs.shutdown_logging()
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}:")
+    print(f"  legacy   {legacy:9.0f} req/s")
+    print(f"  asgi     {asgi:9.0f} req/s  ({asgi / legacy:.2f}x)")
+    print(f"  sampled  {sampled:9.0f} req/s  ({sampled / legacy:.2f}x, sample={args.sample})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# scripts/bench_search.py
+"""
+Latency benchmark for /search/artisans and /search/artisans/nearby (service layer, no HTTP).
+
+    python scripts/bench_search.py --seed 100000      # seed synthetic artisans, then benchmark
+    python scripts/bench_search.py --runs 500         # benchmark against existing data
+    python scripts/bench_search.py --cleanup          # delete the synthetic artisans
+
+Run against a disposable database: seeded users use @bench.fixion.test emails.
+Prints p50/p99 per query shape (ranked text, typo, location, keyset page 2, browse,
+best rated, nearby point, nearby + category). Seeded artisans get a service area of 2-30 km around
+a point scattered over a few Nigerian cities.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import delete, insert, text
+
+from app.db.database import SessionLocal
+from app.models import *  # noqa: F401,F403 (register all mappers)
+from app.models import User
+from app.models.artisan import ArtisanProfile
+from app.models.enums import UserRole, VerificationStatus
+from app.services.artisan_search_service import nearby_artisans, refresh_search_documents, search_artisans
+
+BENCH_DOMAIN = "bench.fixion.test"
+
+FIRST = ["Ade", "Bola", "Chinedu", "Damilola", "Emeka", "Funke", "Gbenga", "Halima", "Ifeoma", "Jide",
+         "Kunle", "Lola", "Musa", "Ngozi", "Olu", "Sade", "Tunde", "Uche", "Yemi", "Zainab"]
+LAST = ["Adeyemi", "Bello", "Okafor", "Eze", "Balogun", "Ibrahim", "Okonkwo", "Adebayo", "Nwosu", "Lawal"]
+CATEGORIES = ["plumbing", "electrical", "carpentry", "painting", "cleaning", "tailoring", "welding",
+              "hairdressing", "mechanic", "tiling"]
+LOCATIONS = ["Yaba", "Ikeja", "Lekki", "Surulere", "Ajah", "Ikorodu", "Maryland", "Gbagada", "Victoria Island",
+             "Abuja", "Port Harcourt", "Ibadan"]
+DESCRIPTIONS = [
+    "Fixing leaking pipes, installing water heaters and bathroom fittings",
+    "House wiring, inverter installation and fault finding",
+    "Custom furniture, wardrobes, doors and roofing work",
+    "Interior and exterior painting, screeding and POP ceilings",
+    "Deep cleaning for homes and offices, post-construction cleaning",
+    "Native and corporate wear, alterations and bridal fittings",
+    "Gates, burglary proofs and metal fabrication",
+    "Braiding, weaving and home-service hair styling",
+    "Car servicing, diagnostics and brake repairs",
+    "Floor and wall tiling, marble and granite installation",
+]
+
+# (lat, lon) of city centres; seeded service areas are scattered ~25 km around them
+CITIES = [(6.5244, 3.3792), (9.0765, 7.3986), (4.8156, 7.0498), (7.3775, 3.9470), (12.0022, 8.5920)]
+
+QUERIES = {
+    "ranked": ["plumber yaba", "electrical ikeja", "Ade", "tiling lekki", "wardrobes", "inverter installation"],
+    "typo": ["plumbng", "electrcal", "carpntry", "Chinedo", "hairdresing", "Okonkow"],
+}
+
+
+def seed(n: int, batch: int = 5000) -> None:
+    db = SessionLocal()
+    rnd = random.Random(42)
+    try:
+        for start in range(0, n, batch):
+            users, profiles = [], []
+            for i in range(start, min(n, start + batch)):
+                uid = uuid.uuid4()
+                c = rnd.randrange(len(CATEGORIES))
+                lat, lon = rnd.choice(CITIES)
+                users.append({
+                    "id": uid,
+                    "full_name": f"{rnd.choice(FIRST)} {rnd.choice(LAST)}",
+                    "email": f"artisan{i}@{BENCH_DOMAIN}",
+                    "password_hash": "!",
+                    "role": UserRole.artisan,
+                    "is_active": True,
+                    "is_blocked": False,
+                })
+                profiles.append({
+                    "id": uuid.uuid4(),
+                    "user_id": uid,
+                    "service_category": CATEGORIES[c],
+                    "service_description": DESCRIPTIONS[c],
+                    "service_location": rnd.choice(LOCATIONS),
+                    "base_price_kobo": rnd.randrange(2_000, 50_000) * 100,
+                    "latitude": lat + rnd.uniform(-0.25, 0.25),
+                    "longitude": lon + rnd.uniform(-0.25, 0.25),
+                    "service_radius_km": rnd.uniform(2, 30),
+                    "verification_status": rnd.choice(
+                        [VerificationStatus.verified] * 8 + [VerificationStatus.pending, VerificationStatus.rejected]
+                    ),
+                })
+            db.execute(insert(User), users)
+            db.execute(insert(ArtisanProfile), profiles)
+            refresh_search_documents(db, [u["id"] for u in users])
+            db.commit()
+            print(f"[seed] {min(n, start + batch)}/{n}")
+        db.execute(text("ANALYZE users"))
+        db.execute(text("ANALYZE artisan_profiles"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def cleanup() -> None:
+    db = SessionLocal()
+    try:
+        ids = db.query(User.id).filter(User.email.like(f"%@{BENCH_DOMAIN}")).subquery()
+        db.execute(delete(ArtisanProfile).where(ArtisanProfile.user_id.in_(ids.select())))
+        res = db.execute(delete(User).where(User.email.like(f"%@{BENCH_DOMAIN}")))
+        db.commit()
+        print(f"[cleanup] removed {res.rowcount} synthetic artisans")
+    finally:
+        db.close()
+
+
+def _timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def _near(rnd: random.Random) -> dict:
+    lat, lon = rnd.choice(CITIES)
+    return {"lat": lat + rnd.uniform(-0.2, 0.2), "lon": lon + rnd.uniform(-0.2, 0.2)}
+
+
+def bench(runs: int) -> None:
+    rnd = random.Random(7)
+    shapes = {
+        "ranked": lambda db: search_artisans(db, q=rnd.choice(QUERIES["ranked"]), limit=20),
+        "typo": lambda db: search_artisans(db, q=rnd.choice(QUERIES["typo"]), limit=20),
+        "location": lambda db: search_artisans(db, location=rnd.choice(LOCATIONS)[:4], limit=20),
+        "browse": lambda db: search_artisans(db, category=rnd.choice(CATEGORIES), limit=20),
+        "best rated": lambda db: search_artisans(db, category=rnd.choice(CATEGORIES), sort="rating", limit=20),
+        "nearby": lambda db: nearby_artisans(db, **_near(rnd), limit=20),
+        "nearby + category": lambda db: nearby_artisans(db, **_near(rnd), category=rnd.choice(CATEGORIES), limit=20),
+    }
+
+    def page2(db):
+        _, last = search_artisans(db, q=rnd.choice(QUERIES["ranked"]), limit=20)
+        if last:
+            search_artisans(db, q=rnd.choice(QUERIES["ranked"]), limit=20, after=last)
+
+    db = SessionLocal()
+    try:
+        total = db.query(ArtisanProfile).count()
+        print(f"[bench] {total} artisan profiles, {runs} runs per shape")
+        for name, fn in list(shapes.items()) + [("keyset page 2 (x2)", page2)]:
+            fn(db)  # warm up
+            samples = []
+            for _ in range(runs):
+                samples.append(_timed(lambda: fn(db)))
+                db.rollback()
+            samples.sort()
+            p50 = statistics.median(samples)
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+            print(f"  {name:<20} p50={p50:7.2f} ms   p99={p99:7.2f} ms")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", type=int, default=0, help="insert N synthetic artisans before benchmarking")
+    parser.add_argument("--runs", type=int, default=200, help="queries per shape")
+    parser.add_argument("--cleanup", action="store_true", help="delete synthetic artisans and exit")
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup()
+        return
+    if args.seed:
+        seed(args.seed)
+    bench(args.runs)
+
+
+if __name__ == "__main__":
+    main()
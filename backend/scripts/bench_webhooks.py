@@ -0,0 +1,156 @@
+# scripts/bench_webhooks.py
+"""
+Burst benchmark for POST /payments/webhook and the webhook inbox workers.
+
+    # API with the inbox workers (in-process, or run scripts/run_webhook_worker.py alongside):
+    PAYSTACK_SECRET=sk_test_x uvicorn app.main:app --port 8000
+    python scripts/bench_webhooks.py --secret sk_test_x --count 20000 --rate 1000 --concurrency 128
+    python scripts/bench_webhooks.py --cleanup
+
+Replays signed Paystack-shaped events (transfer.failed / charge.success for
+references that match no payout or payment, so no ledger rows are written)
+at a fixed rate, spread over --refs references to exercise per-reference
+ordering. Reports ack latency (p50/p99), achieved ingest rate, and how long
+the workers took to drain the inbox. Run against a disposable database.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httpx
+from sqlalchemy import delete, func, select
+
+from app.db.database import SessionLocal
+from app.models import *  # noqa: F401,F403 (register all mappers)
+from app.models.webhook_inbox import WebhookInboxEvent, WEBHOOK_PENDING
+
+BENCH_PREFIX = "BENCH-WH-"
+
+
+def _events(count: int, refs: int, run_id: str):
+    kinds = ("transfer.failed", "charge.success")
+    for i in range(count):
+        ref = f"{BENCH_PREFIX}{run_id}-{i % refs}"
+        yield {"event": kinds[i % 2], "data": {"id": f"{run_id}-{i}", "reference": ref, "status": "failed"}}
+
+
+async def send_burst(api_url: str, secret: str, count: int, rate: int, concurrency: int, refs: int, run_id: str) -> dict:
+    bodies = [json.dumps(e, separators=(",", ":")).encode() for e in _events(count, refs, run_id)]
+    latencies: list[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=api_url, limits=limits, timeout=30.0) as client:
+        async def worker():
+            nonlocal errors
+            while True:
+                body = await queue.get()
+                if body is None:
+                    return
+                sig = hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+                t0 = time.perf_counter()
+                try:
+                    rsp = await client.post("/payments/webhook", content=body, headers={
+                        "x-paystack-signature": sig, "content-type": "application/json",
+                    })
+                    if rsp.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for i, body in enumerate(bodies):
+            # pace the producer to the target rate
+            due = started + i / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await queue.put(body)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        elapsed = time.perf_counter() - started
+
+    s = sorted(latencies)
+    return {
+        "sent": count,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "ingest_rps": round(count / elapsed, 1),
+        "ack_p50_ms": round(statistics.median(s), 2) if s else None,
+        "ack_p99_ms": round(s[min(len(s) - 1, int(len(s) * 0.99))], 2) if s else None,
+    }
+
+
+def wait_drained(run_id: str, timeout: float) -> float:
+    """Seconds until no pending bench event of this run is left (polls the DB)."""
+    started = time.perf_counter()
+    pattern = f"{BENCH_PREFIX}{run_id}-%"
+    while time.perf_counter() - started < timeout:
+        db = SessionLocal()
+        try:
+            pending = db.execute(
+                select(func.count()).select_from(WebhookInboxEvent).where(
+                    WebhookInboxEvent.reference.like(pattern),
+                    WebhookInboxEvent.status == WEBHOOK_PENDING,
+                )
+            ).scalar()
+        finally:
+            db.close()
+        if not pending:
+            return time.perf_counter() - started
+        time.sleep(0.25)
+    return float("nan")
+
+
+def cleanup() -> None:
+    db = SessionLocal()
+    try:
+        n = db.execute(delete(WebhookInboxEvent).where(WebhookInboxEvent.reference.like(f"{BENCH_PREFIX}%"))).rowcount
+        db.commit()
+        print(f"[ok] deleted {n} bench inbox row(s)")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--secret", help="PAYSTACK_SECRET the API runs with")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--rate", type=int, default=1000, help="events per second")
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--refs", type=int, default=500, help="distinct references the events are spread over")
+    parser.add_argument("--drain-timeout", type=float, default=300.0)
+    parser.add_argument("--cleanup", action="store_true", help="delete bench rows from webhook_inbox")
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup()
+        return
+    if not args.secret:
+        parser.error("--secret is required")
+
+    run_id = uuid.uuid4().hex[:8]
+    r = asyncio.run(send_burst(args.api_url, args.secret, args.count, args.rate, args.concurrency, args.refs, run_id))
+    print(f"[ingest] sent={r['sent']} errors={r['errors']} in {r['elapsed_s']}s -> {r['ingest_rps']} events/s "
+          f"ack p50={r['ack_p50_ms']} ms p99={r['ack_p99_ms']} ms")
+    drained = wait_drained(run_id, args.drain_timeout)
+    total = r["elapsed_s"] + drained
+    print(f"[workers] inbox drained {drained:.2f}s after the burst; end-to-end {args.count / total:.1f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 # scripts/create_admin.py
 from app.db.database import SessionLocal
 from app.models.user import User
-from app.utils import get_password_hash, encrypt_str
+from app.utils import get_password_hash
+from app.security.pii import set_phone
+from app.services.auth_service import phone_in_use
 from app.config import PLATFORM_FEE_USER_EMAIL
 import os, sys
 
@@ -28,12 +30,15 @@ def main():
         u = User(
             email=email,
             full_name=full_name,
-            phone_number=encrypt_str(phone),
             role="admin",
             is_active=True,
             email_verified=True,
             phone_verified=True,
         )
+        if phone_in_use(db, phone):
+            print(f"[warn] Phone {phone} already belongs to another user; admin created without a phone")
+        else:
+            set_phone(u, phone)
         if hasattr(User, "password_hash"):
             u.password_hash = get_password_hash(password)
         elif hasattr(User, "hashed_password"):
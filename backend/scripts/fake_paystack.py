@@ -0,0 +1,137 @@
+# scripts/fake_paystack.py
+"""
+Local fake of the Paystack endpoints Fixion uses, for manual testing and load tests.
+
+    python scripts/fake_paystack.py --port 9009 --latency 100 --fail-rate 0.1
+    PAYSTACK_BASE_URL=http://127.0.0.1:9009 PAYSTACK_SECRET=sk_test_x uvicorn app.main:app
+
+Endpoints: POST /transaction/initialize, GET /transaction/verify/{reference},
+POST /transferrecipient, POST /transfer, GET /bank.
+--fail-rate makes that share of requests return 503 (exercises retries and the
+circuit breaker in app/services/paystack_client.py). Requires a Bearer token.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+BANKS = [
+    {"id": 1, "name": "Access Bank", "slug": "access-bank", "code": "044", "longcode": "044150149",
+     "country": "Nigeria", "currency": "NGN", "type": "nuban", "active": True},
+    {"id": 2, "name": "Guaranty Trust Bank", "slug": "guaranty-trust-bank", "code": "058", "longcode": "058152036",
+     "country": "Nigeria", "currency": "NGN", "type": "nuban", "active": True},
+    {"id": 3, "name": "Zenith Bank", "slug": "zenith-bank", "code": "057", "longcode": "057150013",
+     "country": "Nigeria", "currency": "NGN", "type": "nuban", "active": True},
+    {"id": 4, "name": "First Bank of Nigeria", "slug": "first-bank-of-nigeria", "code": "011", "longcode": "011151003",
+     "country": "Nigeria", "currency": "NGN", "type": "nuban", "active": True},
+]
+
+
+def create_app(latency_ms: int = 0, fail_rate: float = 0.0, verify_status: str = "success") -> Starlette:
+    delay = latency_ms / 1000.0
+    transactions: dict[str, dict] = {}
+
+    async def _gate(request):
+        if delay:
+            await asyncio.sleep(delay)
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            return JSONResponse({"status": False, "message": "No Authorization header"}, status_code=401)
+        if fail_rate and random.random() < fail_rate:
+            return JSONResponse({"status": False, "message": "Service unavailable (fake)"}, status_code=503)
+        return None
+
+    async def initialize(request):
+        if (err := await _gate(request)) is not None:
+            return err
+        body = await request.json()
+        ref = body.get("reference") or uuid.uuid4().hex
+        transactions[ref] = {"amount": body.get("amount"), "metadata": body.get("metadata") or {}}
+        return JSONResponse({"status": True, "message": "Authorization URL created", "data": {
+            "authorization_url": f"https://checkout.paystack.invalid/{ref}",
+            "access_code": uuid.uuid4().hex[:12],
+            "reference": ref,
+        }})
+
+    async def verify(request):
+        if (err := await _gate(request)) is not None:
+            return err
+        ref = request.path_params["reference"]
+        tx = transactions.get(ref, {"amount": 0, "metadata": {}})
+        return JSONResponse({"status": True, "message": "Verification successful", "data": {
+            "reference": ref, "status": verify_status, "amount": tx["amount"], "metadata": tx["metadata"],
+        }})
+
+    async def transferrecipient(request):
+        if (err := await _gate(request)) is not None:
+            return err
+        body = await request.json()
+        bank = next((b for b in BANKS if b["code"] == body.get("bank_code")), None)
+        if bank is None:
+            return JSONResponse({"status": False, "message": "Invalid bank code"}, status_code=400)
+        return JSONResponse({"status": True, "data": {
+            "recipient_code": f"RCP_{uuid.uuid4().hex[:12]}",
+            "name": body.get("name"),
+            "details": {"bank_code": bank["code"], "bank_name": bank["name"],
+                        "account_number": body.get("account_number")},
+        }}, status_code=201)
+
+    async def transfer(request):
+        if (err := await _gate(request)) is not None:
+            return err
+        body = await request.json()
+        return JSONResponse({"status": True, "message": "Transfer has been queued", "data": {
+            "reference": body.get("reference"),
+            "transfer_code": f"TRF_{uuid.uuid4().hex[:12]}",
+            "status": "pending",
+            "amount": body.get("amount"),
+        }})
+
+    async def banks(request):
+        if (err := await _gate(request)) is not None:
+            return err
+        return JSONResponse({"status": True, "message": "Banks retrieved", "data": BANKS})
+
+    return Starlette(routes=[
+        Route("/transaction/initialize", initialize, methods=["POST"]),
+        Route("/transaction/verify/{reference}", verify),
+        Route("/transferrecipient", transferrecipient, methods=["POST"]),
+        Route("/transfer", transfer, methods=["POST"]),
+        Route("/bank", banks),
+    ])
+
+
+def start_in_thread(port: int, **kwargs) -> None:
+    """Serve the fake on 127.0.0.1:<port> from a daemon thread (for scripts)."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_app(**kwargs), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=9009)
+    parser.add_argument("--latency", type=int, default=0, help="added latency per request in ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--verify-status", default="success", help="status returned by /transaction/verify")
+    args = parser.parse_args()
+    app = create_app(args.latency, args.fail_rate, args.verify_status)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# scripts/fake_redis.py
+"""
+Local stand-in for Redis, speaking enough RESP for the rate limiter.
+
+    python scripts/fake_redis.py --port 6390
+    RATE_LIMIT_BACKEND=redis RATE_LIMIT_REDIS_URL=redis://127.0.0.1:6390/0 uvicorn app.main:app
+    python scripts/fake_redis.py --port 6390 --self-test   # start, run the limiter against it, exit
+
+Commands: PING, AUTH, SELECT, GET, SET (PX), DEL, TIME, SCRIPT LOAD, EVAL and
+EVALSHA. Lua is not interpreted: only the limiter's GCRA script is known and
+it is run with the same Python gcra() the memory backend uses. Keys expire
+like in Redis. Single process, no persistence. For real deployments point
+RATE_LIMIT_REDIS_URL at Redis/Valkey instead.
+"""
+import argparse
+import asyncio
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.security.rate_limit import GCRA_SCRIPT, GCRA_SCRIPT_SHA, RedisBackend, _RespConnection, gcra
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}  # key -> (value, expires_at)
+        self.scripts = {GCRA_SCRIPT_SHA: GCRA_SCRIPT}
+
+    def _get(self, key: bytes):
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+    def _gcra(self, keys, argv):
+        emission, period, cost = (int(a) for a in argv[:3])
+        now = int(time.time() * 1000)
+        raw = self._get(keys[0])
+        tat = int(raw) if raw is not None else None
+        # limit = period / emission reproduces the script's arithmetic exactly
+        allowed, new_tat, retry = gcra(tat, now, period / emission, period, cost)
+        new_tat = int(new_tat)
+        if not allowed:
+            return [0, int(retry), new_tat - now]
+        self.data[keys[0]] = (str(new_tat).encode(), time.time() + max(1, new_tat - now) / 1000)
+        return [1, 0, new_tat - now]
+
+    def command(self, args: list[bytes]):
+        name = args[0].upper().decode()
+        if name == "PING":
+            return "PONG"
+        if name in ("AUTH", "SELECT"):
+            return "OK"
+        if name == "TIME":
+            t = time.time()
+            return [str(int(t)).encode(), str(int((t % 1) * 1_000_000)).encode()]
+        if name == "GET":
+            return self._get(args[1])
+        if name == "SET":
+            expires_at = None
+            opts = [a.upper() for a in args[3:]]
+            if b"PX" in opts:
+                expires_at = time.time() + int(args[3 + opts.index(b"PX") + 1]) / 1000
+            self.data[args[1]] = (args[2], expires_at)
+            return "OK"
+        if name == "DEL":
+            return sum(1 for k in args[1:] if self.data.pop(k, None) is not None)
+        if name == "SCRIPT" and args[1].upper() == b"LOAD":
+            sha = hashlib.sha1(args[2]).hexdigest()
+            self.scripts[sha] = args[2].decode()
+            return sha
+        if name in ("EVAL", "EVALSHA"):
+            ident = args[1].decode()
+            sha = hashlib.sha1(args[1]).hexdigest() if name == "EVAL" else ident
+            if sha not in self.scripts:
+                return RuntimeError("NOSCRIPT No matching script. Please use EVAL.")
+            if sha != GCRA_SCRIPT_SHA:
+                return RuntimeError("ERR fake_redis only runs the rate limiter script")
+            nkeys = int(args[2])
+            return self._gcra(args[3:3 + nkeys], args[3 + nkeys:])
+        return RuntimeError(f"ERR unknown command '{name}'")
+
+
+def _encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, RuntimeError):
+        return b"-%s\r\n" % str(reply).encode()
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(_encode(r) for r in reply)
+
+
+async def _read_command(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()  # inline command (e.g. from telnet)
+    args = []
+    for _ in range(int(line[1:-2])):
+        n = int((await reader.readline())[1:-2])
+        args.append((await reader.readexactly(n + 2))[:-2])
+    return args
+
+
+async def serve(host: str, port: int, store: FakeRedis):
+    async def handle(reader, writer):
+        try:
+            while (args := await _read_command(reader)) is not None:
+                if args:
+                    writer.write(_encode(store.command(args)))
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # client went away or the server is shutting down
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def self_test(host: str, port: int) -> None:
+    backend = RedisBackend(f"redis://{host}:{port}/0")
+    allowed = [(await backend.hit("selftest", 5, 60)).allowed for _ in range(7)]
+    assert allowed == [True] * 5 + [False] * 2, allowed
+    await backend.reset("selftest")
+    assert (await backend.hit("selftest", 5, 60)).allowed
+    assert _RespConnection.encode("PING") == b"*1\r\n$4\r\nPING\r\n"
+    await backend.aclose()
+    print("[ok] GCRA over RESP: 5 allowed, 6th and 7th denied, reset clears the bucket")
+
+
+async def main_async(args):
+    server = await serve(args.host, args.port, FakeRedis())
+    print(f"fake redis listening on {args.host}:{args.port}")
+    if args.self_test:
+        try:
+            await self_test(args.host, args.port)
+        finally:
+            server.close()
+        return
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--self-test", action="store_true", help="run the limiter against the stand-in and exit")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,12 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from app.db.database import engine, SessionLocal, Base
 from app.models import User, Wallet, ServiceCategory
 from app.models.enums import UserRole
-
-pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.security.pii import set_phone
+from app.security.passwords import hash_password
 
 def create_all():
     Base.metadata.create_all(bind=engine)
@@ -24,13 +23,13 @@ def seed_minimum(session: Session):
         admin = User(
             full_name="Fixion Admin",
             email=admin_email,
-            phone_number="08000000000",
-            password_hash=pwd.hash("adminpass"),
+            password_hash=hash_password("adminpass"),
             role=UserRole.admin,
             email_verified=True,
             phone_verified=True,
             is_active=True,
         )
+        set_phone(admin, "08000000000")
         session.add(admin)
         session.flush()
         session.add(Wallet(user_id=admin.id, balance_kobo=0))
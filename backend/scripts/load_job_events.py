@@ -0,0 +1,139 @@
+# scripts/load_job_events.py
+"""
+Load test for job status push: many idle subscribers, then a burst of events.
+
+    python scripts/load_job_events.py                       # in-process, 10k subscribers
+    python scripts/load_job_events.py --subscribers 20000 --jobs 5000
+    python scripts/load_job_events.py --url http://localhost:8000 --token <jwt> --job <job_id> --subscribers 2000
+
+In-process mode (default, no DB or server needed) drives the real hub and
+stream code from app/services/job_events.py with the SSE formatting of
+GET /jobs/status/{job_id}/events, delivering events with hub.dispatch()
+as the LISTEN callback would. It reports memory per idle subscriber
+(tracemalloc), subscribe time and fan-out latency to every subscriber.
+
+HTTP mode opens --subscribers SSE streams against a running server for one
+job and holds them for --hold seconds (raise `ulimit -n` first); change the
+job's status meanwhile to watch the events arrive.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.services import job_events
+
+
+async def run_in_process(subscribers: int, jobs: int, heartbeat: float) -> None:
+    hub = job_events.JobEventHub(max_subscribers=subscribers, queue_size=8, listen=False)
+    job_ids = [str(uuid.uuid4()) for _ in range(jobs)]
+    ready = asyncio.Semaphore(0)
+    received = 0
+    all_received = asyncio.Event()
+
+    async def snapshot(job_id):
+        return {"type": "status", "job_id": job_id, "new_status": "accepted"}
+
+    async def consumer(job_id):
+        nonlocal received
+        first = True
+        async for event in job_events.stream(job_id, lambda: snapshot(job_id), heartbeat=heartbeat, events=hub):
+            _chunk = ": ping\n\n" if event is None else f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"  # same work as the SSE route
+            if first:
+                first = False
+                ready.release()
+                continue
+            if event is not None:
+                received += 1
+                if received == subscribers:
+                    all_received.set()
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    tasks = [asyncio.create_task(consumer(job_ids[i % jobs])) for i in range(subscribers)]
+    for _ in range(subscribers):
+        await ready.acquire()
+    subscribe_s = time.perf_counter() - t0
+    await asyncio.sleep(1.0)  # idle
+    idle_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    for job_id in job_ids:
+        hub.dispatch({"type": "status", "job_id": job_id, "old_status": "accepted", "new_status": "completed"})
+    await asyncio.wait_for(all_received.wait(), 60)
+    fanout_s = time.perf_counter() - t0
+    await asyncio.gather(*tasks)
+
+    print(f"{subscribers} subscribers on {jobs} jobs (in-process)")
+    print(f"  subscribe + snapshot  {subscribe_s * 1000:8.1f} ms")
+    print(f"  memory while idle     {idle_bytes / 1024 / 1024:8.1f} MB  ({idle_bytes / subscribers / 1024:.1f} KB per subscriber)")
+    print(f"  fan-out of {jobs} events to all subscribers  {fanout_s * 1000:8.1f} ms")
+    print(f"  subscribers left      {len(hub):8d}")
+
+
+async def run_http(url: str, token: str, job_id: str, subscribers: int, hold: float) -> None:
+    import httpx
+
+    connected = 0
+    events = 0
+    errors: dict[str, int] = {}
+    limits = httpx.Limits(max_connections=subscribers, max_keepalive_connections=0)
+    timeout = httpx.Timeout(30.0, read=None)
+
+    async def subscriber(client):
+        nonlocal connected, events
+        try:
+            async with client.stream("GET", f"/jobs/status/{job_id}/events") as rsp:
+                if rsp.status_code != 200:
+                    errors[str(rsp.status_code)] = errors.get(str(rsp.status_code), 0) + 1
+                    return
+                connected += 1
+                async for line in rsp.aiter_lines():
+                    if line.startswith("event:"):
+                        events += 1
+        except Exception as exc:
+            errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=timeout) as client:
+        t0 = time.perf_counter()
+        tasks = [asyncio.create_task(subscriber(client)) for _ in range(subscribers)]
+        deadline = t0 + hold
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(5)
+            print(f"  t={time.perf_counter() - t0:5.0f}s connected={connected} events={events} errors={errors}")
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    print(f"{subscribers} SSE subscribers on job {job_id}: connected={connected} events={events} errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=2500, help="in-process: distinct jobs the subscribers watch")
+    parser.add_argument("--heartbeat", type=float, default=15.0)
+    parser.add_argument("--url", help="HTTP mode: base URL of a running server")
+    parser.add_argument("--token", help="HTTP mode: access token of the job's customer or artisan")
+    parser.add_argument("--job", help="HTTP mode: job id")
+    parser.add_argument("--hold", type=float, default=60.0, help="HTTP mode: seconds to keep streams open")
+    args = parser.parse_args()
+
+    if args.url:
+        if not (args.token and args.job):
+            parser.error("--url needs --token and --job")
+        asyncio.run(run_http(args.url, args.token, args.job, args.subscribers, args.hold))
+    else:
+        asyncio.run(run_in_process(args.subscribers, min(args.jobs, args.subscribers), args.heartbeat))
+
+
+if __name__ == "__main__":
+    main()
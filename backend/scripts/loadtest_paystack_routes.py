@@ -0,0 +1,135 @@
+# scripts/loadtest_paystack_routes.py
+"""
+Throughput/latency load test for the Paystack-facing routes.
+
+Starts the fake Paystack API (scripts/fake_paystack.py, fixed latency)
+in-process and drives a running Fixion API with concurrent requests, so the
+numbers reflect how well a worker overlaps upstream waits and DB I/O (blocking
+DB calls on the event loop show up as flat throughput at any concurrency).
+
+1) start the API against the fake, single worker:
+     PAYSTACK_SECRET=sk_test_x PAYSTACK_BASE_URL=http://127.0.0.1:9009 \\
+         uvicorn app.main:app --port 8000 --workers 1
+2) run the load (token = access token of a verified user; reference = one of
+   that user's Payment references, so the verify route reaches Paystack):
+     python scripts/loadtest_paystack_routes.py --token $TOKEN --reference FIX-ABC \\
+         --concurrency 64 --duration 30 --out after.json
+3) repeat on the previous commit with --out before.json, then compare:
+     python scripts/loadtest_paystack_routes.py --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+from fake_paystack import start_in_thread as start_fake_paystack
+
+
+# load
+
+def _routes(reference: str) -> dict:
+    return {
+        "payments.verify": ("GET", f"/payments/paystack/verify/{reference}"),
+        "wallet.topup_verify": ("GET", f"/wallet/topup/paystack/verify/{reference}"),
+        "payouts.my": ("GET", "/payouts/my?limit=20"),
+    }
+
+
+async def run_load(api_url: str, token: str, reference: str, concurrency: int, duration: float) -> dict:
+    routes = _routes(reference)
+    names = list(routes)
+    samples = {n: [] for n in names}
+    errors = {n: 0 for n in names}
+    deadline = time.perf_counter() + duration
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=api_url, headers=headers, limits=limits, timeout=30.0) as client:
+        async def worker(i: int):
+            k = i
+            while time.perf_counter() < deadline:
+                name = names[k % len(names)]
+                k += 1
+                method, path = routes[name]
+                t0 = time.perf_counter()
+                try:
+                    rsp = await client.request(method, path)
+                    ok = rsp.status_code < 500
+                except httpx.HTTPError:
+                    ok = False
+                samples[name].append((time.perf_counter() - t0) * 1000)
+                if not ok:
+                    errors[name] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = {"concurrency": concurrency, "duration_s": round(elapsed, 2), "routes": {}}
+    total = 0
+    for name in names:
+        s = sorted(samples[name])
+        total += len(s)
+        result["routes"][name] = {
+            "requests": len(s),
+            "errors": errors[name],
+            "rps": round(len(s) / elapsed, 1),
+            "p50_ms": round(statistics.median(s), 2) if s else None,
+            "p99_ms": round(s[min(len(s) - 1, int(len(s) * 0.99))], 2) if s else None,
+        }
+    result["total_rps"] = round(total / elapsed, 1)
+    return result
+
+
+def print_result(label: str, r: dict) -> None:
+    print(f"[{label}] concurrency={r['concurrency']} duration={r['duration_s']}s total={r['total_rps']} req/s")
+    for name, m in r["routes"].items():
+        print(f"  {name:<22} {m['rps']:>8} req/s  p50={m['p50_ms']} ms  p99={m['p99_ms']} ms  errors={m['errors']}")
+
+
+def compare(before_path: str, after_path: str) -> None:
+    before = json.loads(Path(before_path).read_text())
+    after = json.loads(Path(after_path).read_text())
+    print_result("before", before)
+    print_result("after", after)
+    if before["total_rps"]:
+        print(f"throughput change: x{after['total_rps'] / before['total_rps']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", help="bearer access token")
+    parser.add_argument("--reference", default="FIX-LOADTEST", help="payment reference visible to the token's user")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--stub-port", type=int, default=9009, help="port for the fake Paystack (0 = do not start it)")
+    parser.add_argument("--stub-latency", type=int, default=150, help="fake Paystack response latency in ms")
+    parser.add_argument("--out", help="write the result as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if not args.token:
+        parser.error("--token is required")
+
+    if args.stub_port:
+        # non-success verify status: exercises the full route without writing ledger rows
+        start_fake_paystack(args.stub_port, latency_ms=args.stub_latency, verify_status="abandoned")
+    result = asyncio.run(run_load(args.api_url, args.token, args.reference, args.concurrency, args.duration))
+    print_result("run", result)
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# scripts/rebuild_artisan_ratings.py
+"""
+Re-derive artisan rating aggregates from reviews and report drift.
+
+    python scripts/rebuild_artisan_ratings.py                 # report only
+    python scripts/rebuild_artisan_ratings.py --fix           # report and repair
+    python scripts/rebuild_artisan_ratings.py --fix --interval 86400   # run daily
+
+Run with --fix after changing RATING_PRIOR_MEAN / RATING_PRIOR_WEIGHT.
+Exits with status 2 when drift was found in a one-shot run (handy for cron alerts).
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.db.database import SessionLocal
+from app.models import *  # noqa: F401,F403 (register all mappers)
+from app.services.rating_service import rebuild_ratings
+
+
+def run_once(fix: bool) -> int:
+    db = SessionLocal()
+    try:
+        drift = rebuild_ratings(db, fix=fix)
+        if fix:
+            db.commit()
+        else:
+            db.rollback()
+    except Exception as e:
+        db.rollback()
+        print("ERROR:", e)
+        return -1
+    finally:
+        db.close()
+
+    for d in drift:
+        print(f"[drift] artisan_id={d['artisan_id']} stored={d['stored']} reviews={d['reviews']}")
+    status = "repaired" if fix else "found"
+    print(f"[ok] {len(drift)} drifted artisan rating(s) {status}")
+    return len(drift)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fix", action="store_true", help="overwrite drifted aggregates with values derived from reviews")
+    parser.add_argument("--interval", type=int, default=0, help="repeat every N seconds (0 = run once)")
+    args = parser.parse_args()
+
+    if args.interval <= 0:
+        found = run_once(args.fix)
+        sys.exit(1 if found < 0 else (2 if found else 0))
+
+    while True:
+        run_once(args.fix)
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
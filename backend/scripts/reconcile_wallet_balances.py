@@ -0,0 +1,64 @@
+# scripts/reconcile_wallet_balances.py
+"""
+Re-derive wallet_balances from wallet_ledger and report drift.
+
+    python scripts/reconcile_wallet_balances.py               # report only
+    python scripts/reconcile_wallet_balances.py --fix         # report and repair
+    python scripts/reconcile_wallet_balances.py --fix --interval 3600   # run hourly
+
+Exits with status 2 when drift was found in a one-shot run (handy for cron alerts).
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.db.database import SessionLocal
+from app.models import *  # noqa: F401,F403 (register all mappers)
+from app.services.wallet_balance_service import reconcile_wallet_balances
+
+
+def run_once(fix: bool) -> int:
+    db = SessionLocal()
+    try:
+        drift = reconcile_wallet_balances(db, fix=fix)
+        if fix:
+            db.commit()
+        else:
+            db.rollback()
+    except Exception as e:
+        db.rollback()
+        print("ERROR:", e)
+        return -1
+    finally:
+        db.close()
+
+    for d in drift:
+        print(
+            f"[drift] user_id={d['user_id']} currency={d['currency']} "
+            f"snapshot={d['snapshot']} ledger={d['ledger']} diff={d['diff']}"
+        )
+    status = "repaired" if fix else "found"
+    print(f"[ok] {len(drift)} drifted wallet balance(s) {status}")
+    return len(drift)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fix", action="store_true", help="overwrite drifted snapshot rows with ledger totals")
+    parser.add_argument("--interval", type=int, default=0, help="repeat every N seconds (0 = run once)")
+    args = parser.parse_args()
+
+    if args.interval <= 0:
+        found = run_once(args.fix)
+        sys.exit(1 if found < 0 else (2 if found else 0))
+
+    while True:
+        run_once(args.fix)
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# scripts/run_outbound_worker.py
+"""
+Deliver queued emails/SMS from outbound_messages (see app/services/outbound_queue.py).
+
+    python scripts/run_outbound_worker.py                      # run until Ctrl-C
+    python scripts/run_outbound_worker.py --once               # drain the queue and exit
+    python scripts/run_outbound_worker.py --stats              # counts per status
+    python scripts/run_outbound_worker.py --list-dead          # dead-lettered messages
+    python scripts/run_outbound_worker.py --requeue-dead [ID ...]
+    python scripts/run_outbound_worker.py --purge-days 30      # drop old sent/dead rows
+
+Several workers may run side by side (rows are claimed with SKIP LOCKED).
+Set OUTBOUND_WORKER_IN_PROCESS=false on the API when running this.
+"""
+import argparse
+import logging
+import signal
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.db.database import SessionLocal
+from app.models import *  # noqa: F401,F403 (register all mappers)
+from app.services import outbound_queue
+from app.services.email_service import smtp_pool
+
+
+def _with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch", type=int, default=20, help="messages claimed per round")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel sends")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds to wait when the queue is empty")
+    parser.add_argument("--once", action="store_true", help="exit when nothing is due")
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--list-dead", action="store_true")
+    parser.add_argument("--requeue-dead", nargs="*", metavar="ID", help="requeue dead messages (all if no ids)")
+    parser.add_argument("--purge-days", type=int, help="delete sent/dead messages older than N days")
+    args = parser.parse_args()
+
+    if args.stats:
+        for status, n in sorted(_with_session(outbound_queue.queue_stats).items()):
+            print(f"{status:<8} {n}")
+        return
+    if args.list_dead:
+        for m in _with_session(outbound_queue.list_dead):
+            print(f"{m.id} {m.channel:<5} {m.kind:<16} attempts={m.attempts} created={m.created_at} error={m.last_error}")
+        return
+    if args.requeue_dead is not None:
+        n = _with_session(outbound_queue.requeue_dead, args.requeue_dead)
+        print(f"[ok] requeued {n} message(s)")
+        return
+    if args.purge_days is not None:
+        n = _with_session(outbound_queue.purge, args.purge_days)
+        print(f"[ok] purged {n} message(s)")
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        outbound_queue.run_worker(
+            SessionLocal,
+            batch_size=args.batch,
+            concurrency=args.concurrency,
+            poll_interval=args.poll,
+            stop=stop,
+            once=args.once,
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        smtp_pool.close()
+
+
+if __name__ == "__main__":
+    main()
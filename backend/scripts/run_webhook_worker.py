@@ -0,0 +1,86 @@
+# scripts/run_webhook_worker.py
+"""
+Apply stored webhooks from webhook_inbox, and inspect/replay them (see app/services/webhook_inbox.py).
+
+    python scripts/run_webhook_worker.py --workers 8              # run until Ctrl-C
+    python scripts/run_webhook_worker.py --once                   # drain what is due and exit
+    python scripts/run_webhook_worker.py --stats
+    python scripts/run_webhook_worker.py --list dead              # or: pending / done
+    python scripts/run_webhook_worker.py --replay ID [ID ...]     # re-apply specific events (any status)
+    python scripts/run_webhook_worker.py --replay-dead
+    python scripts/run_webhook_worker.py --replay-since 2025-10-01T00:00:00 --include-done
+
+Replayed events are applied again in arrival order per reference; the handlers
+are idempotent (ledger rows are checked by reference before insert).
+"""
+import argparse
+import logging
+import signal
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.db.database import SessionLocal
+from app.models import *  # noqa: F401,F403 (register all mappers)
+from app.models.webhook_inbox import WEBHOOK_DEAD, WEBHOOK_DONE
+from app.services import webhook_inbox
+
+
+def _with_session(fn, *args, **kwargs):
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4, help="worker threads")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds to wait when nothing is due")
+    parser.add_argument("--once", action="store_true", help="exit when nothing is due")
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--list", metavar="STATUS", help="list events with this status")
+    parser.add_argument("--replay", nargs="+", metavar="ID", help="replay these events")
+    parser.add_argument("--replay-dead", action="store_true", help="replay all dead events")
+    parser.add_argument("--replay-since", metavar="ISO_TIME", help="replay dead events received since this time")
+    parser.add_argument("--include-done", action="store_true", help="with --replay-since: also replay done events")
+    args = parser.parse_args()
+
+    if args.stats:
+        stats = _with_session(webhook_inbox.inbox_stats)
+        for status, n in sorted(stats["by_status"].items()):
+            print(f"{status:<8} {n}")
+        print(f"oldest pending: {stats['oldest_pending_created_at']}")
+        return
+    if args.list:
+        for e in _with_session(webhook_inbox.list_events, args.list):
+            print(f"{e.id} seq={e.seq} {e.event:<20} ref={e.reference} attempts={e.attempts} "
+                  f"created={e.created_at} error={e.last_error}")
+        return
+    if args.replay or args.replay_dead or args.replay_since:
+        statuses = [WEBHOOK_DEAD]
+        if args.replay or args.include_done:
+            statuses.append(WEBHOOK_DONE)
+        since = datetime.fromisoformat(args.replay_since) if args.replay_since else None
+        n = _with_session(webhook_inbox.replay, ids=args.replay, statuses=statuses, since=since)
+        print(f"[ok] {n} event(s) queued for replay")
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    if args.once:
+        webhook_inbox.run_worker(SessionLocal, once=True)
+        return
+    stop = webhook_inbox.start_worker_threads(SessionLocal, args.workers, poll_interval=args.poll)
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        stop.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# tests/conftest.py
+from contextlib import contextmanager
+
+import pytest
+
+from app.observability import sql
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Query budget for the requests made inside the block; the test fails when
+    they issue more than `max_queries` statements, or one statement shape more
+    than `max_repeats` times (the N+1 signature):
+
+        with query_budget(max_queries=3, max_repeats=1):
+            client.get(f"/jobs/status/{job_id}")
+    """
+    @contextmanager
+    def budget(max_queries=None, max_repeats=None):
+        try:
+            with sql.query_budget(max_queries, max_repeats) as stats:
+                yield stats
+        except sql.QueryBudgetExceeded as exc:
+            pytest.fail(f"query budget exceeded: {exc}", pytrace=False)
+
+    return budget
@@ -0,0 +1,59 @@
+# tests/test_query_budget.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.observability.sql import QueryStatsMiddleware
+
+
+@pytest.fixture
+def client():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE jobs (id INTEGER PRIMARY KEY, artisan_id INTEGER)"))
+        conn.execute(text("CREATE TABLE artisans (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO artisans VALUES (1, 'a'), (2, 'b'), (3, 'c')"))
+        conn.execute(text("INSERT INTO jobs VALUES (1, 1), (2, 2), (3, 3), (4, 1)"))
+
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/jobs/n-plus-one")
+    def jobs_n_plus_one():
+        with engine.connect() as conn:
+            jobs = conn.execute(text("SELECT id, artisan_id FROM jobs")).all()
+            return [
+                conn.execute(text("SELECT name FROM artisans WHERE id = :id"), {"id": j.artisan_id}).scalar()
+                for j in jobs
+            ]
+
+    @app.get("/jobs/joined")
+    def jobs_joined():
+        with engine.connect() as conn:
+            return conn.execute(
+                text("SELECT a.name FROM jobs j JOIN artisans a ON a.id = j.artisan_id ORDER BY j.id")
+            ).scalars().all()
+
+    with TestClient(app) as c:
+        yield c
+    engine.dispose()
+
+
+def test_within_budget(client, query_budget):
+    with query_budget(max_queries=1, max_repeats=1) as stats:
+        assert client.get("/jobs/joined").json() == ["a", "b", "c", "a"]
+    assert stats.count == 1
+
+
+def test_n_plus_one_fails_budget(client, query_budget):
+    with pytest.raises(pytest.fail.Exception, match=r"4x SELECT name FROM artisans"):
+        with query_budget(max_queries=5, max_repeats=1):
+            client.get("/jobs/n-plus-one")
+
+
+def test_query_count_over_budget(client, query_budget):
+    with pytest.raises(pytest.fail.Exception, match=r"5 queries \(budget 2\)"):
+        with query_budget(max_queries=2):
+            client.get("/jobs/n-plus-one")